@@ -0,0 +1,202 @@
+# backend/agents/context_builder.py
+"""
+Per-agent projection of the profile and orchestration state into prompt text.
+
+Each agent declares which profile fields and which state keys it actually
+reads, plus a token budget for each. Agents call render_profile() and
+render_state() instead of dumping `str(dict)` into their prompts, so Mongo
+ids, unrelated fields and the full medical report no longer ride along on
+every LLM call. The state keys are also the source of the scheduler's
+dependency graph (agent_dependencies()), so an agent waits for exactly the
+agents whose output it is shown.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+# Rough chars-per-token ratio for Llama-family tokenizers on English text;
+# close enough for budgeting without shipping a tokenizer.
+CHARS_PER_TOKEN = 4
+
+_TRUNCATION_MARK = " …[truncated]"
+
+
+class ContextSpec(NamedTuple):
+    """What one agent consumes and how many tokens it may spend on it."""
+    profile_fields: Tuple[str, ...]
+    state_keys: Tuple[str, ...]
+    profile_budget: int
+    state_budget: int
+
+
+_BODY = ("age", "gender", "weight_kg", "height_cm", "bmi")
+
+AGENT_CONTEXT: Dict[str, ContextSpec] = {
+    "SymptomAgent": ContextSpec(
+        _BODY + ("health_conditions", "medical_report_text"),
+        (),
+        profile_budget=700, state_budget=0,
+    ),
+    # The specialists only build on the symptom analysis, so after
+    # SymptomAgent they can all run side by side.
+    "DietAgent": ContextSpec(
+        _BODY + ("diet_type", "fitness_goal", "health_conditions", "medical_report_text"),
+        ("symptoms", "note"),
+        profile_budget=450, state_budget=600,
+    ),
+    "FitnessAgent": ContextSpec(
+        _BODY + ("activity_level", "fitness_goal", "health_conditions"),
+        ("symptoms", "note"),
+        profile_budget=200, state_budget=700,
+    ),
+    "LifestyleAgent": ContextSpec(
+        ("age", "gender", "activity_level", "sleep_hours", "fitness_goal", "health_conditions", "bio"),
+        ("symptoms", "note"),
+        profile_budget=200, state_budget=600,
+    ),
+    # The supervisor only needs enough to route: what the user is like and
+    # which specialists have already spoken (not their full output).
+    "Supervisor": ContextSpec(
+        ("age", "diet_type", "fitness_goal", "activity_level", "health_conditions", "medical_report_text"),
+        ("symptoms", "diet", "fitness", "lifestyle", "note"),
+        profile_budget=120, state_budget=200,
+    ),
+    "Synthesizer": ContextSpec(
+        (),
+        ("symptoms", "diet", "lifestyle", "fitness", "note"),
+        profile_budget=0, state_budget=1500,
+    ),
+}
+
+# Who wrote each state key, so prompts keep saying "SymptomAgent: ...".
+_STATE_LABELS = {
+    "symptoms": "SymptomAgent",
+    "diet": "DietAgent",
+    "fitness": "FitnessAgent",
+    "lifestyle": "LifestyleAgent",
+    "note": "Note",
+}
+
+
+def agent_dependencies(agent: str) -> Tuple[str, ...]:
+    """The specialist agents whose output `agent` reads, per its state keys."""
+    return tuple(
+        _STATE_LABELS[key] for key in AGENT_CONTEXT[agent].state_keys
+        if _STATE_LABELS.get(key, "").endswith("Agent")
+    )
+
+
+# Fields that are only worth a short mention in routing prompts.
+_ROUTING_SUMMARY_FIELDS = {"medical_report_text"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _truncate(text: str, tokens: int) -> str:
+    """Cut `text` to roughly `tokens` tokens, marking the cut."""
+    limit = max(tokens, 0) * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[: max(limit - len(_TRUNCATION_MARK), 0)].rstrip() + _TRUNCATION_MARK
+
+
+def _fit_budget(items: list, budget: int) -> list:
+    """
+    Shrink (label, text) pairs until they fit `budget` tokens together.
+
+    The longest entry is trimmed first, so short facts (age, diet type) always
+    survive and only bulky fields such as a medical report get cut.
+    """
+    items = [list(item) for item in items]
+    while items:
+        sizes = [estimate_tokens(text) for _, text in items]
+        total = sum(sizes)
+        if total <= budget:
+            break
+        idx = max(range(len(items)), key=sizes.__getitem__)
+        allowance = max(budget - (total - sizes[idx]), sizes[idx] // 2, 8)
+        trimmed = _truncate(items[idx][1], allowance)
+        if trimmed == items[idx][1]:
+            break
+        items[idx][1] = trimmed
+    return [tuple(item) for item in items]
+
+
+# ---- profile rendering (cached per profile object) ----------------------
+
+# The orchestrator passes the same profile dict to every agent in a turn, so
+# rendered field values are cached by object identity. Holding the profile
+# in the entry keeps its id from being reused while cached.
+_PROFILE_CACHE_SIZE = 256
+_profile_cache: "OrderedDict[int, tuple]" = OrderedDict()
+_profile_cache_lock = threading.Lock()
+
+
+def _rendered_fields(profile: dict) -> Dict[str, str]:
+    with _profile_cache_lock:
+        entry = _profile_cache.get(id(profile))
+        if entry is not None and entry[0] is profile:
+            _profile_cache.move_to_end(id(profile))
+            return entry[1]
+
+    rendered = {k: " ".join(str(v).split()) for k, v in profile.items() if v not in (None, "", [], {})}
+    with _profile_cache_lock:
+        _profile_cache[id(profile)] = (profile, rendered)
+        while len(_profile_cache) > _PROFILE_CACHE_SIZE:
+            _profile_cache.popitem(last=False)
+    return rendered
+
+
+def render_profile(profile: Optional[dict], agent: str) -> str:
+    """
+    Render the profile fields `agent` declares, within its token budget.
+
+    Args:
+        profile: The user's health profile (may be None or empty).
+        agent: Key into AGENT_CONTEXT.
+
+    Returns:
+        str: One `field: value` line per present field, or "None".
+    """
+    spec = AGENT_CONTEXT[agent]
+    if not profile or not spec.profile_fields:
+        return "None"
+
+    fields = _rendered_fields(profile)
+    items = []
+    for name in spec.profile_fields:
+        if name not in fields:
+            continue
+        value = fields[name]
+        if agent == "Supervisor" and name in _ROUTING_SUMMARY_FIELDS:
+            value = f"uploaded ({estimate_tokens(value)} tokens)"
+        items.append((name, value))
+
+    if not items:
+        return "None"
+    return "\n".join(f"{k}: {v}" for k, v in _fit_budget(items, spec.profile_budget))
+
+
+def render_state(state: Optional[dict], agent: str) -> str:
+    """
+    Render the state keys `agent` declares, within its token budget.
+
+    Args:
+        state: The current orchestration state.
+        agent: Key into AGENT_CONTEXT.
+
+    Returns:
+        str: Labelled agent outputs, or "None yet." when nothing relevant ran.
+    """
+    spec = AGENT_CONTEXT[agent]
+    items = [
+        (_STATE_LABELS.get(key, key), str(state[key]).strip())
+        for key in spec.state_keys
+        if state and state.get(key)
+    ]
+    if not items:
+        return "None yet."
+    return "\n\n".join(f"{label}:\n{text}" for label, text in _fit_budget(items, spec.state_budget))
@@ -8,40 +8,30 @@ Its output is captured by the orchestrator and written into the shared state
 dictionary under the `DietAgent` key for downstream agents to reference.
 """
 from agents.groq_client import get_llm
+from agents.context_builder import render_profile, render_state
+from agents.stage_memo import invoke_text, ainvoke_text
 from typing import Optional
 
-llm = get_llm()
+llm = get_llm("DietAgent")
 
-def run_diet_agent(state: dict, profile: Optional[dict]) -> str:
-    """
-    Invoke the Diet Agent LLM chain.
-
-    Args:
-        state: The current orchestration state containing outputs from any
-            agents that have already run during this turn.
-        profile: The user's health profile (metrics, goals, conditions).
-
-    Returns:
-        str: A short, practical markdown section containing a critique of
-        prior findings and a specific nutritional plan.
-    """
-
-    prompt = f"""
+def _diet_prompt(state: dict, profile: Optional[dict]) -> str:
+    """Render the DietAgent prompt shared by the sync and async entry points."""
+    return f"""
 You are the DietAgent in a wellness assistant.
 
 You must:
 - Give simple, practical diet suggestions.
-- Use the user's profile if available (age, weight, height, diet_type, goal, health_conditions).
+- Use the user's profile if available (age, weight, height, diet_type, fitness_goal, health_conditions).
 - NEVER ask the user questions.
 - NEVER say "I need more info".
 - Keep the answer short (4–6 lines max).
 - Adapt food suggestions to their diet_type (veg, non-veg, eggetarian, vegan).
 
 User profile (may be null):
-{profile}
+{render_profile(profile, "DietAgent")}
 
 Previous agent notes (state):
-{state}
+{render_state(state, "DietAgent")}
 
 Your output:
 - Analyzes the Symptom Agent's findings (if any).
@@ -53,5 +43,25 @@ Your output:
   - **Plan**: Specific foods to eat/avoid.
 """
 
-    response = llm.invoke(prompt).content
+
+def run_diet_agent(state: dict, profile: Optional[dict]) -> str:
+    """
+    Invoke the Diet Agent LLM chain.
+
+    Args:
+        state: The current orchestration state containing outputs from any
+            agents that have already run during this turn.
+        profile: The user's health profile (metrics, goals, conditions).
+
+    Returns:
+        str: A short, practical markdown section containing a critique of
+        prior findings and a specific nutritional plan.
+    """
+    response = invoke_text("DietAgent", llm, _diet_prompt(state, profile))
+    return response.strip()
+
+
+async def arun_diet_agent(state: dict, profile: Optional[dict]) -> str:
+    """Async variant of run_diet_agent using `ainvoke`."""
+    response = await ainvoke_text("DietAgent", llm, _diet_prompt(state, profile))
     return response.strip()
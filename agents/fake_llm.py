@@ -0,0 +1,249 @@
+# backend/agents/fake_llm.py
+"""
+Deterministic fake chat model for offline load tests and profiling.
+
+With LLM_BACKEND=fake, get_llm() hands out FakeChatModel instead of
+ChatGroq, so the whole orchestration runs without a Groq key or network.
+The reply is a pure function of the prompt. The model recognizes which
+stage is calling from the prompt text and answers in that stage's format:
+classifier JSON (single or batched), supervisor step/group/plan JSON
+picked by keywords in the user message, specialist bullet lists, the
+Synthesizer's Markdown report, or a summary. Each call still goes through
+the rate-limit scheduler as a simulated HTTP exchange: latency is drawn
+from FAKE_LLM_LATENCY (fixed, lognormal or heavy_tail), and failures are
+injected at FAKE_LLM_ERROR_RATE (500s) and FAKE_LLM_RATE_LIMIT_RATE (429s
+with Retry-After). Queuing, retries and backoff therefore behave as they
+would against Groq.
+"""
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from agents.llm_scheduler import llm_scheduler
+from config import (
+    FAKE_LLM_LATENCY,
+    FAKE_LLM_LATENCY_MS,
+    FAKE_LLM_LATENCY_SIGMA,
+    FAKE_LLM_TAIL_ALPHA,
+    FAKE_LLM_ERROR_RATE,
+    FAKE_LLM_RATE_LIMIT_RATE,
+    FAKE_LLM_SEED,
+    LLM_READ_TIMEOUT_S,
+)
+
+# Agents in the order the supervisor prompts team them up, with the words
+# that send a message their way.
+_ROUTE_KEYWORDS = {
+    "SymptomAgent": ("pain", "hurt", "ache", "headache", "symptom", "tired", "fatigue", "bloated",
+                     "sick", "fever", "vitamin", "report", "blood"),
+    "DietAgent": ("diet", "food", "meal", "eat", "nutrition", "protein", "vegetarian", "calorie"),
+    "LifestyleAgent": ("sleep", "stress", "burnt out", "burnout", "screen", "routine", "habit", "anxious"),
+    "FitnessAgent": ("workout", "exercise", "muscle", "stamina", "endurance", "fitness", "belly fat", "run"),
+}
+_WELLNESS_WORDS = ("health", "wellness", "weight", "body", "feel", "doctor")
+_STREAM_CHUNK_WORDS = 4
+# Spacing between streamed chunks, as a share of the drawn latency.
+_STREAM_SPREAD = 0.5
+
+_rng = random.Random(FAKE_LLM_SEED)
+
+
+class FakeLLMError(RuntimeError):
+    """A simulated LLM failure that survived the scheduler's retries."""
+
+
+def _section(prompt: str, header: str, until: Optional[str] = None) -> str:
+    """Text following `header` up to the next blank line, or up to `until` if given."""
+    end = re.escape(until) if until else r"\n\s*\n"
+    match = re.search(re.escape(header) + r"\s*\n(.*?)(?:" + end + r"|$)", prompt, re.DOTALL)
+    return match.group(1).strip() if match else ""
+
+
+def _route(message: str) -> List[str]:
+    text = message.lower()
+    agents = [agent for agent, words in _ROUTE_KEYWORDS.items() if any(w in text for w in words)]
+    return agents or ["LifestyleAgent"]
+
+
+def _is_wellness(message: str) -> bool:
+    text = message.lower()
+    return any(w in text for words in _ROUTE_KEYWORDS.values() for w in words) or any(
+        w in text for w in _WELLNESS_WORDS
+    )
+
+
+def _bullets(topic: str, message: str) -> str:
+    return "\n".join(
+        f"- {line}"
+        for line in (
+            f"{topic} guidance for: {message[:80]}",
+            f"Keep a simple daily log related to {topic.lower()} for a week.",
+            f"Make one small, sustainable {topic.lower()} change at a time.",
+        )
+    )
+
+
+def fake_reply(prompt: str) -> str:
+    """The canned answer for a prompt, recognizing the calling stage by its text."""
+    if "intention classifier" in prompt:
+        if "For EACH message" in prompt:
+            messages = json.loads(_section(prompt, "Messages (JSON array):") or "[]")
+            return json.dumps([_is_wellness(m) for m in messages])
+        match = re.search(r'User message: "(.*)"', prompt, re.DOTALL)
+        return json.dumps({"is_wellness": _is_wellness(match.group(1) if match else prompt)})
+
+    if "SUPERVISOR" in prompt:
+        message = _section(prompt, "CURRENT USER MESSAGE:")
+        route = _route(message)
+        if "Plan the COMPLETE" in prompt:
+            rest = [a for a in route if a != "SymptomAgent"]
+            parallel = ([["SymptomAgent"]] if "SymptomAgent" in route else []) + ([rest] if rest else [])
+            return json.dumps({"agents": route, "parallel": parallel})
+        # Agent outputs are separated by blank lines, so read the whole block.
+        done = _section(prompt, "CURRENT ORCHESTRATION STATE (agent outputs so far in THIS turn):", "USER INTENT:")
+        remaining = [a for a in route if f"{a}:" not in done]
+        if '"next_agents"' in prompt:
+            return json.dumps({"next_agents": remaining or ["FINISH"]})
+        return json.dumps({"next_agent": remaining[0] if remaining else "FINISH"})
+
+    for agent, topic in (("SymptomAgent", "Symptom"), ("DietAgent", "Diet"),
+                         ("FitnessAgent", "Fitness"), ("LifestyleAgent", "Lifestyle")):
+        if f"You are the {agent}" in prompt:
+            message = _section(prompt, "User message:").strip('"') or "your goals"
+            return _bullets(topic, message)
+
+    if "Synthesizer Agent" in prompt:
+        question = re.search(r'User Question: "(.*?)"', prompt, re.DOTALL)
+        outputs = prompt.split("Agent Outputs:", 1)[-1].split("REQUIRED OUTPUT FORMAT", 1)[0]
+        parts = [f"### Wellness Summary\nHere is guidance for: {question.group(1) if question else 'your question'}"]
+        for label, header in (("DietAgent", "### 🍽 Diet Plan"), ("LifestyleAgent", "### 🧘 Lifestyle & Sleep Tips"),
+                              ("FitnessAgent", "### 🏃 Exercise Plan")):
+            if f"{label}:" in outputs:
+                parts.append(f"{header}\n{_section(outputs, f'{label}:') or '- See above.'}")
+        parts.append("### ⚠ Disclaimer\nThis is general wellness guidance and not a medical diagnosis.")
+        return "\n\n".join(parts)
+
+    if "running summary" in prompt:
+        lines = [l for l in prompt.splitlines() if l.startswith(("Human:", "AI:"))]
+        return "\n".join(f"- {l[:100]}" for l in lines[-6:]) or "- (no durable facts yet)"
+
+    return "OK"
+
+
+def _latency_s() -> float:
+    """One latency sample (seconds) from the configured distribution."""
+    median = FAKE_LLM_LATENCY_MS / 1000.0
+    if FAKE_LLM_LATENCY == "fixed":
+        value = median
+    elif FAKE_LLM_LATENCY == "heavy_tail":
+        # Pareto scaled so its median is `median`.
+        value = median / 2 ** (1 / FAKE_LLM_TAIL_ALPHA) * _rng.paretovariate(FAKE_LLM_TAIL_ALPHA)
+    else:
+        value = _rng.lognormvariate(math.log(median), FAKE_LLM_LATENCY_SIGMA) if median > 0 else 0.0
+    # A real call this slow would have hit the client's read timeout.
+    return min(value, LLM_READ_TIMEOUT_S)
+
+
+def _outcome() -> tuple:
+    """(latency, status, headers) for one simulated request."""
+    roll = _rng.random()
+    if roll < FAKE_LLM_RATE_LIMIT_RATE:
+        return _latency_s() * 0.1, 429, {"retry-after": f"{_rng.uniform(0.5, 2.0):.2f}"}
+    if roll < FAKE_LLM_RATE_LIMIT_RATE + FAKE_LLM_ERROR_RATE:
+        return _latency_s(), 500, {}
+    return _latency_s(), 200, {}
+
+
+def _request(prompt: str, kwargs: dict) -> httpx.Request:
+    body = {"model": kwargs.get("model", "fake"), "max_tokens": kwargs.get("max_tokens"),
+            "messages": [{"role": "user", "content": prompt}]}
+    return httpx.Request("POST", "https://fake-llm.local/v1/chat/completions", json=body)
+
+
+def _check(response: httpx.Response):
+    if response.status_code != 200:
+        raise FakeLLMError(f"Simulated LLM error: HTTP {response.status_code}")
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Drop-in stand-in for ChatGroq. Accepts the same per-stage settings
+    (model, max_tokens, temperature, stop) as call kwargs; max_tokens caps
+    the reply at roughly four characters per token.
+    """
+
+    model_name: str = "fake"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-wellness"
+
+    @staticmethod
+    def _prompt(messages: List[BaseMessage]) -> str:
+        return "\n".join(str(m.content) for m in messages)
+
+    @staticmethod
+    def _reply(prompt: str, stop: Optional[List[str]], kwargs: dict) -> str:
+        text = fake_reply(prompt)
+        for token in stop or ():
+            text = text.split(token, 1)[0]
+        max_tokens = kwargs.get("max_tokens")
+        return text[: max_tokens * 4] if max_tokens else text
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        prompt = self._prompt(messages)
+
+        def send(request: httpx.Request) -> httpx.Response:
+            latency, status, headers = _outcome()
+            time.sleep(latency)
+            return httpx.Response(status, headers=headers, request=request)
+
+        _check(llm_scheduler.send(send, _request(prompt, kwargs)))
+        text = self._reply(prompt, stop, kwargs)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _acall(self, prompt: str, kwargs: dict, share: float = 1.0):
+        async def send(request: httpx.Request) -> httpx.Response:
+            latency, status, headers = _outcome()
+            await asyncio.sleep(latency * share)
+            return httpx.Response(status, headers=headers, request=request)
+
+        _check(await llm_scheduler.asend(send, _request(prompt, kwargs)))
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        prompt = self._prompt(messages)
+        await self._acall(prompt, kwargs)
+        text = self._reply(prompt, stop, kwargs)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        result = self._generate(messages, stop, **kwargs)
+        yield ChatGenerationChunk(message=AIMessageChunk(content=result.generations[0].message.content))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        # Part of the latency goes to the first token, the rest is spread
+        # over the chunks, like a real token stream.
+        prompt = self._prompt(messages)
+        await self._acall(prompt, kwargs, share=1 - _STREAM_SPREAD)
+        words = re.findall(r"\S+\s*", self._reply(prompt, stop, kwargs))
+        chunks = ["".join(words[i : i + _STREAM_CHUNK_WORDS]) for i in range(0, len(words), _STREAM_CHUNK_WORDS)]
+        delay = _latency_s() * _STREAM_SPREAD / max(len(chunks), 1)
+        for text in chunks:
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                await run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+            await asyncio.sleep(delay)
@@ -8,45 +8,54 @@ identified by prior agents. Its output is captured by the orchestrator and
 written into the shared state dictionary under the `FitnessAgent` key.
 """
 from agents.groq_client import get_llm
-llm = get_llm()
+from agents.context_builder import render_profile, render_state
+from agents.stage_memo import invoke_text, ainvoke_text
+llm = get_llm("FitnessAgent")
 
-def run_fitness_agent(state, profile):
-    """
-    Invoke the Fitness Agent LLM chain.
-
-    Args:
-        state: The current orchestration state containing outputs from any
-            agents that have already run during this turn.
-        profile: The user's health profile (metrics, goals, conditions).
-
-    Returns:
-        str: A concise markdown section analyzing how other agents' findings
-        affect fitness, followed by a specific workout plan.
-    """
-    prompt = f"""
+def _fitness_prompt(state, profile):
+    """Render the FitnessAgent prompt shared by the sync and async entry points."""
+    return f"""
 You are the FitnessAgent in a Digital Wellness multi-agent system.
 
 Your job:
 - Provide PRACTICAL and ACTIONABLE fitness guidance.
-- Use user profile + extracted state from previous agents.
+- Use user profile + the symptom analysis from the previous agent.
 - Do NOT repeat what the user already said.
 - Focus on exercises, routine improvements, posture, stamina, energy, motivation.
 
 User Profile:
-{profile}
+{render_profile(profile, "FitnessAgent")}
 
-State (information extracted by previous agents):
-{state}
+State (information extracted by the Symptom agent):
+{render_state(state, "FitnessAgent")}
 
 RESPONSE RULES:
-- Review outputs from Symptom, Diet, and Lifestyle agents.
-- "Symptom agent noted X, Diet suggested Y..." -> "Therefore I recommend Z."
+- Review the Symptom agent's findings (if any).
+- "Symptom agent noted X..." -> "Therefore I recommend Z."
 - Safety Check: If symptoms (e.g. back pain) contraindicate certain exercises, explicitely say "Avoid X due to back pain".
 - Format:
-  - **Analysis**: How other agents' findings affect fitness.
+  - **Analysis**: How the symptom findings affect fitness.
   - **Workout Plan**: Specific exercises adjusted for safety.
 - Keep it concise, action-oriented.
 
 Now provide a concise, helpful fitness response.
 """
-    return llm.invoke(prompt).content.strip()
+
+def run_fitness_agent(state, profile):
+    """
+    Invoke the Fitness Agent LLM chain.
+
+    Args:
+        state: The current orchestration state containing outputs from any
+            agents that have already run during this turn.
+        profile: The user's health profile (metrics, goals, conditions).
+
+    Returns:
+        str: A concise markdown section analyzing how the symptom findings
+        affect fitness, followed by a specific workout plan.
+    """
+    return invoke_text("FitnessAgent", llm, _fitness_prompt(state, profile)).strip()
+
+async def arun_fitness_agent(state, profile):
+    """Async variant of run_fitness_agent using `ainvoke`."""
+    return (await ainvoke_text("FitnessAgent", llm, _fitness_prompt(state, profile))).strip()
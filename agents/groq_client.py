@@ -3,26 +3,231 @@
 Shared factory for the Groq-hosted LLM client.
 
 Every agent (diet, fitness, symptom, lifestyle, supervisor, etc.) calls
-get_llm() to obtain the same configured model instance instead of
-constructing ChatGroq directly, keeping model settings in one place.
+get_llm(stage) to obtain the same configured model instance instead of
+constructing ChatGroq directly, keeping model settings in one place. The
+stage name selects that stage's model, max_tokens, temperature and stop
+sequences (LLM_STAGE_DEFAULTS / LLM_STAGE_SETTINGS in config). With
+LLM_BACKEND=fake the shared instance is the offline FakeChatModel instead.
+
+There is one process-wide ChatGroq backed by one pooled httpx client per
+mode (sync and async), so every stage of a turn reuses the same keep-alive
+connections instead of opening its own pool and paying a TLS handshake.
+Pool size, keep-alive and timeouts come from config; requests and newly
+opened connections are counted so connection reuse shows up in /metrics
+and get_client_stats(). Both transports hand each request to the rate-limit
+scheduler (agents/llm_scheduler.py), which owns queuing and retries, so the
+SDK's own retries are turned off.
 """
+import asyncio
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+
+from agents.llm_scheduler import llm_scheduler
+from config import (
+    GROQ_API_KEY,
+    MODEL_NAME,
+    LLM_BACKEND,
+    LLM_STAGE_DEFAULTS,
+    LLM_STAGE_SETTINGS,
+    LLM_POOL_MAX_CONNECTIONS,
+    LLM_POOL_MAX_KEEPALIVE,
+    LLM_KEEPALIVE_EXPIRY_S,
+    LLM_CONNECT_TIMEOUT_S,
+    LLM_READ_TIMEOUT_S,
+)
+from core.metrics import LLM_HTTP_REQUESTS, LLM_HTTP_CONNECTIONS
+
+_DEFAULT_TEMPERATURE = 0.2
+_DEFAULT_MAX_TOKENS = 512
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY_S,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(LLM_READ_TIMEOUT_S, connect=LLM_CONNECT_TIMEOUT_S)
+
+
+class _ConnectionStats:
+    """Requests sent and TCP connections opened, per client mode."""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.requests = 0
+        self.connections = 0
+        self.connect_failures = 0
+        self._requests = LLM_HTTP_REQUESTS.labels(mode)
+        self._connections = LLM_HTTP_CONNECTIONS.labels(mode)
+
+    def request(self):
+        self.requests += 1
+        self._requests.inc()
+
+    def connection(self, event: str):
+        # httpcore reports a fresh TCP connect only when the pool had no
+        # idle keep-alive connection to hand out.
+        if event == "connection.connect_tcp.complete":
+            self.connections += 1
+            self._connections.inc()
+        elif event == "connection.connect_tcp.failed":
+            # The request never reached a socket, so it neither opened nor
+            # reused a connection.
+            self.connect_failures += 1
+
+    def to_dict(self) -> dict:
+        reused = max(self.requests - self.connections - self.connect_failures, 0)
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections,
+            "connect_failures": self.connect_failures,
+            "reuse_ratio": reused / self.requests if self.requests else 0.0,
+        }
+
+
+class _CountingTransport(httpx.BaseTransport):
+    """Pooled, rate-limited sync transport that reports requests and new connections."""
+
+    def __init__(self, stats: _ConnectionStats):
+        self.stats = stats
+        self._transport = httpx.HTTPTransport(limits=_limits())
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        def trace(event: str, info: dict):
+            self.stats.connection(event)
+
+        def send(request: httpx.Request) -> httpx.Response:
+            self.stats.request()
+            request.extensions["trace"] = trace
+            return self._transport.handle_request(request)
+
+        return llm_scheduler.send(send, request)
+
+    def close(self):
+        self._transport.close()
+
+
+class _LoopLocalTransport(httpx.AsyncBaseTransport):
+    """
+    Pooled, rate-limited async transport with one connection pool per event loop.
+
+    Async connections belong to the loop that opened them, and this process
+    runs more than one (the ASGI server's and the sync bridge's), so each
+    loop gets its own pool behind the single shared client.
+    """
+
+    def __init__(self, stats: _ConnectionStats):
+        self.stats = stats
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _pool(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = self._pools[loop] = httpx.AsyncHTTPTransport(limits=_limits())
+        return pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        async def trace(event: str, info: dict):
+            self.stats.connection(event)
+
+        async def send(request: httpx.Request) -> httpx.Response:
+            self.stats.request()
+            request.extensions["trace"] = trace
+            return await self._pool().handle_async_request(request)
+
+        return await llm_scheduler.asend(send, request)
+
+    async def aclose(self):
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.aclose()
+
+
+_sync_stats = _ConnectionStats("sync")
+_async_stats = _ConnectionStats("async")
+_llm = None
+_llm_lock = threading.Lock()
+
 
-from langchain_groq import ChatGroq
-from config import GROQ_API_KEY, MODEL_NAME
+def _shared_llm():
+    global _llm
+    with _llm_lock:
+        if _llm is None and LLM_BACKEND == "fake":
+            from agents.fake_llm import FakeChatModel
 
+            _llm = FakeChatModel()
+        elif _llm is None:
+            # Imported here so the fake backend runs without langchain_groq.
+            from langchain_groq import ChatGroq
 
-def get_llm():
+            _llm = ChatGroq(
+                groq_api_key=GROQ_API_KEY,
+                model=MODEL_NAME,
+                temperature=_DEFAULT_TEMPERATURE,
+                max_tokens=_DEFAULT_MAX_TOKENS,
+                request_timeout=_timeout(),
+                max_retries=0,
+                http_client=httpx.Client(transport=_CountingTransport(_sync_stats), timeout=_timeout()),
+                http_async_client=httpx.AsyncClient(
+                    transport=_LoopLocalTransport(_async_stats), timeout=_timeout()
+                ),
+            )
+    return _llm
+
+
+def stage_settings(stage: str) -> dict:
     """
-    Build a ChatGroq client using the app's configured API key and model.
+    Resolve a stage's generation settings.
 
     Returns:
-        ChatGroq: configured with low temperature (0.2) for consistent,
-        less "creative" wellness advice, and a 512-token cap to keep
-        responses short across all agents.
+        dict: `model`, `temperature`, `max_tokens` and, when configured,
+        `stop`, from the app defaults overlaid with LLM_STAGE_DEFAULTS and
+        then LLM_STAGE_SETTINGS for this stage.
     """
-    return ChatGroq(
-        groq_api_key=GROQ_API_KEY,
-        model=MODEL_NAME,
-        temperature=0.2,
-        max_tokens=512
-    )
+    settings = {"model": MODEL_NAME, "temperature": _DEFAULT_TEMPERATURE, "max_tokens": _DEFAULT_MAX_TOKENS}
+    settings.update(LLM_STAGE_DEFAULTS.get(stage, {}))
+    settings.update(LLM_STAGE_SETTINGS.get(stage, {}))
+    if not settings.get("stop"):
+        settings.pop("stop", None)
+    return settings
+
+
+def get_llm(stage: Optional[str] = None, temperature: Optional[float] = None, max_tokens: Optional[int] = None):
+    """
+    Return the process-wide ChatGroq client, bound to a stage's settings.
+
+    Args:
+        stage: Pipeline stage ("intent", "supervisor", "DietAgent",
+            "synthesizer", ...) whose settings to apply; see stage_settings().
+        temperature: Overrides the stage's temperature.
+        max_tokens: Overrides the stage's completion cap.
+
+    Returns:
+        ChatGroq (or a binding of it carrying per-stage settings): by
+        default low temperature (0.2) for consistent, less "creative"
+        wellness advice and a 512-token cap to keep responses short. Every
+        caller shares the same underlying HTTP connection pools whatever
+        model it runs.
+    """
+    llm = _shared_llm()
+    settings = stage_settings(stage) if stage else {}
+    if temperature is not None:
+        settings["temperature"] = temperature
+    if max_tokens is not None:
+        settings["max_tokens"] = max_tokens
+    return llm.bind(**settings) if settings else llm
+
+
+def get_client_stats() -> dict:
+    """Connection reuse of the shared LLM client plus its scheduler's queue and retries."""
+    return {"sync": _sync_stats.to_dict(), "async": _async_stats.to_dict(), "scheduler": llm_scheduler.stats()}
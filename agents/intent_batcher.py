@@ -0,0 +1,195 @@
+# backend/agents/intent_batcher.py
+"""
+Cross-user micro-batching of intent classification.
+
+Each intent call is a tiny prompt with a one-bit answer, so at peak most of
+the request quota goes to them. With INTENT_BATCHING_ENABLED, messages that
+reach the LLM stage of aclassify_intent within INTENT_BATCH_WINDOW_MS of
+each other (from any user) are classified together in one prompt that
+returns a JSON array, and each caller gets its own entry back. If the
+batch answer can't be parsed (or the call fails) every message falls back
+to its own single call. Batched results are written to the stage memo
+under the single-call key, so memo hits look the same either way.
+
+The batch call is traced on its own "intent" span, which every caller's
+span links to; fallback single calls count towards their caller's span.
+"""
+import asyncio
+import contextvars
+import itertools
+import json
+import weakref
+from typing import List, Optional, Tuple
+
+from agents.stage_memo import generation_settings, stage_memo
+from config import INTENT_BATCH_WINDOW_MS, INTENT_BATCH_MAX_SIZE
+from core.logging_config import get_logger
+from core.metrics import INTENT_BATCH_SIZE
+from orchestrator.tracing import Span, TurnTrace, current_span
+
+logger = get_logger(__name__)
+
+
+def _batch_prompt(messages: List[str]) -> str:
+    """Render the classifier prompt for several messages at once."""
+    return f"""
+You are an intention classifier for a digital wellness assistant.
+
+Task:
+- For EACH message below, decide if it is related to health, wellness, stress, diet, fitness, sleep, OR medical report analysis.
+- "Analyze my report", "Read my PDF", "What does my blood test say" are ALL valid wellness queries.
+
+You MUST respond ONLY with a JSON array of exactly {len(messages)} booleans, one per
+message and in the same order (true = wellness), e.g. [true, false].
+
+DO NOT add any explanation or extra text.
+
+Messages (JSON array):
+{json.dumps(messages, ensure_ascii=False)}
+"""
+
+
+def _parse_batch(raw: str, size: int) -> Optional[List[bool]]:
+    """The batch answer as `size` booleans, or None if it doesn't fit."""
+    text = (raw or "").strip()
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end <= start:
+        return None
+    try:
+        items = json.loads(text[start : end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(items, list) or len(items) != size:
+        return None
+    flags = []
+    for item in items:
+        if isinstance(item, dict):
+            item = item.get("is_wellness")
+        if not isinstance(item, bool):
+            return None
+        flags.append(item)
+    return flags
+
+
+# (message, single-call prompt, memo key, caller's future, caller's span)
+_Item = Tuple[str, str, str, asyncio.Future, Optional[Span]]
+
+
+class _Pending:
+    """Messages waiting for the next flush on one event loop."""
+
+    def __init__(self):
+        self.items: List[_Item] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class IntentBatcher:
+    """
+    Collects intent prompts per event loop and flushes them as one call
+    after `window_ms`, or as soon as `max_batch` are waiting.
+
+    Args:
+        window_ms: How long the first message of a batch waits for company.
+        max_batch: Most messages classified in one prompt.
+    """
+
+    def __init__(self, window_ms: float, max_batch: int):
+        self.window_s = window_ms / 1000.0
+        self.max_batch = max(max_batch, 1)
+        self._pending: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _Pending]" = weakref.WeakKeyDictionary()
+        self._tasks: set = set()
+        self._batch_ids = itertools.count(1)
+
+    async def classify(self, llm, message: str, prompt: str, parse) -> dict:
+        """
+        Classify one message, batched with whatever arrives alongside it.
+
+        Args:
+            llm: The chat model to call.
+            message: The raw user message (what goes into the batch prompt).
+            prompt: Its single-call prompt (memo key and fallback prompt).
+            parse: Turns a single-call answer into the intent dict.
+        """
+        key = stage_memo.key("intent", prompt, generation_settings(llm))
+        if stage_memo.enabled:
+            text = stage_memo.get("intent", key)
+            if text is not None:
+                return parse(text)
+
+        loop = asyncio.get_running_loop()
+        pending = self._pending.get(loop)
+        if pending is None:
+            pending = self._pending[loop] = _Pending()
+        future = loop.create_future()
+        pending.items.append((message, prompt, key, future, current_span()))
+        if len(pending.items) >= self.max_batch:
+            self._flush(loop, llm)
+        elif pending.timer is None:
+            pending.timer = loop.call_later(self.window_s, self._flush, loop, llm)
+        return parse(await future)
+
+    def _flush(self, loop: asyncio.AbstractEventLoop, llm):
+        pending = self._pending.pop(loop, None)
+        if pending is None:
+            return
+        if pending.timer is not None:
+            pending.timer.cancel()
+        # Callers that gave up (e.g. a cancelled turn) are left out.
+        items = [item for item in pending.items if not item[3].done()]
+        if not items:
+            return
+        # A fresh context, so the flush doesn't inherit the span of the
+        # caller whose timer (or append) triggered it.
+        task = contextvars.Context().run(loop.create_task, self._run(llm, items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, llm, items: List[_Item]):
+        INTENT_BATCH_SIZE.observe(len(items))
+        flags = None
+        if len(items) > 1:
+            # The call serves every caller, so it gets its own span rather
+            # than counting towards whichever turn happened to arrive first.
+            span = TurnTrace().span("intent", batch_id=next(self._batch_ids), batch_size=len(items))
+            try:
+                # The intent stage's cap is sized for one answer; allow a
+                # few tokens per message.
+                batch_llm = llm.bind(max_tokens=16 + 4 * len(items))
+                result = await span.arun(batch_llm.ainvoke(_batch_prompt([item[0] for item in items])))
+            except Exception as e:
+                logger.warning(f"Batched intent call failed ({e}); classifying {len(items)} messages singly")
+            else:
+                flags = _parse_batch(result.content, len(items))
+                if flags is None:
+                    logger.warning(f"Unusable batched intent answer; classifying {len(items)} messages singly")
+            finally:
+                for caller in {id(item[4]): item[4] for item in items if item[4] is not None}.values():
+                    caller.link(span)
+
+        if flags is not None:
+            for (_, _, key, future, _), flag in zip(items, flags):
+                text = json.dumps({"is_wellness": flag})
+                if stage_memo.enabled:
+                    stage_memo.put(key, text)
+                if not future.done():
+                    future.set_result(text)
+            return
+
+        await asyncio.gather(*(self._single(llm, item) for item in items))
+
+    async def _single(self, llm, item: _Item):
+        _, prompt, key, future, caller = item
+        try:
+            call = llm.ainvoke(prompt)
+            text = (await (caller.attach(call) if caller is not None else call)).content
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if stage_memo.enabled:
+            stage_memo.put(key, text)
+        if not future.done():
+            future.set_result(text)
+
+
+intent_batcher = IntentBatcher(INTENT_BATCH_WINDOW_MS, INTENT_BATCH_MAX_SIZE)
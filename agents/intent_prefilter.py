@@ -0,0 +1,188 @@
+# backend/agents/intent_prefilter.py
+"""
+Local lexicon-based prefilter in front of the intention classifier.
+
+Scores the raw message against health, diet, fitness, sleep/stress and
+medical-report vocabulary plus obvious off-topic patterns, all on the CPU.
+Clear-cut messages are decided here in microseconds; only ambiguous ones are
+sent to the LLM classifier. Exposes prefilter_intent() and its counters.
+"""
+import re
+import threading
+from typing import Optional
+
+from config import (
+    INTENT_PREFILTER_ENABLED,
+    INTENT_PREFILTER_WELLNESS_THRESHOLD,
+    INTENT_PREFILTER_OFFTOPIC_THRESHOLD,
+)
+
+# (weight, terms). Terms match whole words and may only take a plain
+# inflection (-s, -es, -ed, -ing), so "headache" also covers "headaches" but
+# "pain" no longer fires on "painted" or "nap" on "Napoleon"; other forms are
+# listed explicitly. Strong terms count double; a single strong hit is not
+# enough to skip the LLM (see INTENT_PREFILTER_WELLNESS_THRESHOLD).
+_WELLNESS_LEXICON = {
+    "health": (2.0, [
+        "symptom", "pain", "painful", "ache", "aching", "headache", "migraine", "fever",
+        "nausea", "nauseous", "dizzy", "dizziness", "fatigue", "fatigued", "tired",
+        "exhausted", "exhaustion", "bloat", "cramp", "sore", "injury", "injuries", "injured",
+        "hurt", "inflammation", "inflamed", "cough", "allergy", "allergies", "allergic",
+        "diabetes", "diabetic", "thyroid", "cholesterol", "hypertension", "anxiety", "anxious",
+        "depression", "depressed", "wellness", "wellbeing", "well-being", "health", "medical",
+        "medicine", "medication", "doctor", "stomach", "knee", "acne", "constipation",
+        "constipated", "diarrhea", "diarrhoea",
+    ]),
+    "diet": (2.0, [
+        "diet", "dietary", "nutrition", "nutrient", "nutritious", "meal", "protein", "calorie",
+        "carb", "carbohydrate", "vegan", "vegetarian", "eggetarian", "breakfast", "lunch",
+        "dinner", "snack", "vitamin", "fiber", "fibre", "hydration", "hydrated", "dehydrated",
+        "recipe", "keto", "fasting", "sugar", "supplement",
+    ]),
+    "fitness": (2.0, [
+        "workout", "exercise", "exercising", "gym", "fitness", "stamina", "endurance", "muscle",
+        "cardio", "yoga", "stretch", "posture", "squat", "pushup", "push-up", "running", "jog",
+        "jogging", "belly fat", "lose weight", "weight loss",
+    ]),
+    "sleep": (2.0, [
+        "sleep", "sleepy", "insomnia", "nap", "napping", "stress", "stressful", "burnout",
+        "burnt out", "burned out", "relax", "relaxation", "meditate", "meditation",
+        "meditating", "screen time", "routine", "habit",
+    ]),
+    "report": (2.0, [
+        "blood test", "blood report", "medical report", "lab report", "my report",
+        "hemoglobin", "haemoglobin", "ng/ml", "mg/dl", "bmi", "pdf",
+    ]),
+    "weak": (1.0, [
+        "eat", "food", "drink", "water", "weight", "body", "feel", "energy",
+        "mood", "walk", "coffee", "plan", "healthy", "joint",
+    ]),
+}
+
+_OFFTOPIC_LEXICON = {
+    "tech": (2.0, [
+        "python", "javascript", "java", "code", "coding", "debug", "debugging",
+        "compile", "sql", "html", "css", "api", "github", "linux",
+    ]),
+    "finance": (2.0, ["stock", "crypto", "bitcoin", "invest", "investment", "tax", "loan", "mortgage"]),
+    "trivia": (2.0, [
+        "capital of", "president of", "who won", "weather", "movie", "song",
+        "lyrics", "football score", "cricket score", "translate",
+    ]),
+    "creative": (2.0, ["write a poem", "write a story", "tell me a joke", "essay"]),
+}
+
+
+def _compile(lexicon: dict) -> list:
+    """Compile each category's terms into a single whole-word regex."""
+    return [
+        (weight, re.compile(
+            r"\b(?:" + "|".join(re.escape(t) for t in terms) + r")(?:s|es|ed|ing)?\b", re.IGNORECASE
+        ))
+        for weight, terms in lexicon.values()
+    ]
+
+
+_WELLNESS_PATTERNS = _compile(_WELLNESS_LEXICON)
+_OFFTOPIC_PATTERNS = _compile(_OFFTOPIC_LEXICON)
+
+# Bare arithmetic ("what is 12*7") is never a wellness question.
+_ARITHMETIC = re.compile(r"^\s*(what\s+is\s+)?[\d\s\.\+\-\*/\(\)x=]+\??\s*$", re.IGNORECASE)
+
+
+def _score(patterns: list, text: str) -> float:
+    """Sum weights of every distinct lexicon hit in `text`."""
+    total = 0.0
+    for weight, pattern in patterns:
+        total += weight * len(set(m.lower() for m in pattern.findall(text)))
+    return total
+
+
+def score_message(message: str) -> dict:
+    """
+    Score a message against both lexicons.
+
+    Args:
+        message: The raw text of the user's input.
+
+    Returns:
+        dict: `wellness` and `offtopic` scores, plus the `is_wellness` lean and
+        its `confidence` in [0, 1). Confidence grows with the score margin:
+        each point of margin halves the remaining doubt.
+    """
+    wellness = _score(_WELLNESS_PATTERNS, message)
+    offtopic = _score(_OFFTOPIC_PATTERNS, message)
+    if _ARITHMETIC.match(message):
+        offtopic += 4.0
+
+    margin = wellness - offtopic
+    return {
+        "wellness": wellness,
+        "offtopic": offtopic,
+        "is_wellness": margin >= 0,
+        "confidence": 1.0 - 0.5 ** abs(margin),
+    }
+
+
+class PrefilterStats:
+    """Thread-safe counters for how often the prefilter answered on its own."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.decided_wellness = 0
+        self.decided_offtopic = 0
+        self.deferred_to_llm = 0
+
+    def record(self, decision: Optional[bool]):
+        with self._lock:
+            if decision is None:
+                self.deferred_to_llm += 1
+            elif decision:
+                self.decided_wellness += 1
+            else:
+                self.decided_offtopic += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            skipped = self.decided_wellness + self.decided_offtopic
+            total = skipped + self.deferred_to_llm
+            return {
+                "decided_wellness": self.decided_wellness,
+                "decided_offtopic": self.decided_offtopic,
+                "deferred_to_llm": self.deferred_to_llm,
+                "llm_calls_skipped": skipped,
+                "skip_rate": skipped / total if total else 0.0,
+            }
+
+
+prefilter_stats = PrefilterStats()
+
+
+def prefilter_intent(message: str) -> Optional[dict]:
+    """
+    Decide clear-cut intents locally.
+
+    Args:
+        message: The raw text of the user's input.
+
+    Returns:
+        dict | None: `{"is_wellness": bool}` when the lexicon score clears the
+        configured confidence threshold for its side, otherwise None (the
+        caller should ask the LLM classifier). Turning away a wellness
+        question costs more than one extra LLM call, so a message is only
+        rejected locally when it has no wellness vocabulary at all.
+    """
+    if not INTENT_PREFILTER_ENABLED:
+        return None
+
+    scores = score_message(message)
+    threshold = (
+        INTENT_PREFILTER_WELLNESS_THRESHOLD if scores["is_wellness"]
+        else INTENT_PREFILTER_OFFTOPIC_THRESHOLD
+    )
+    if scores["confidence"] >= threshold and (scores["is_wellness"] or not scores["wellness"]):
+        prefilter_stats.record(scores["is_wellness"])
+        return {"is_wellness": scores["is_wellness"]}
+
+    prefilter_stats.record(None)
+    return None
@@ -3,14 +3,21 @@
 Agent responsible for categorizing user intent.
 
 Reads the raw user message and determines if it is health/wellness-related
-before engaging the full agent orchestration pipeline. This agent does not
+before engaging the full agent orchestration pipeline. Clear-cut messages are
+answered by the local lexicon prefilter (agents/intent_prefilter.py) without
+an LLM call; with INTENT_BATCHING_ENABLED the remaining async calls are
+micro-batched across users (agents/intent_batcher.py). This agent does not
 write to the shared state dictionary, as it runs as a pre-check before
 the supervisor is invoked.
 """
 import json
 from agents.groq_client import get_llm
+from agents.intent_prefilter import prefilter_intent
+from agents.stage_memo import invoke_text, ainvoke_text
+from agents.intent_batcher import intent_batcher
+from config import INTENT_BATCHING_ENABLED
 
-llm = get_llm()
+llm = get_llm("intent")
 
 def _extract_json(text: str):
     """
@@ -33,17 +40,9 @@ def _extract_json(text: str):
     except json.JSONDecodeError:
         return None
 
-def classify_intent(message: str):
-    """
-    Determine if a user's message pertains to health, wellness, or medical reports.
-
-    Args:
-        message: The raw text of the user's input.
-
-    Returns:
-        dict: A dictionary containing the key `is_wellness` (bool).
-    """
-    prompt = f"""
+def _intent_prompt(message: str) -> str:
+    """Render the classifier prompt shared by the sync and async entry points."""
+    return f"""
 You are an intention classifier for a digital wellness assistant.
 
 Task:
@@ -59,9 +58,18 @@ DO NOT add any explanation or extra text.
 
 User message: "{message}"
 """
-    res = llm.invoke(prompt)
-    raw = res.content or ""
-    data = _extract_json(raw)
+
+def _parse_intent(raw: str) -> dict:
+    """
+    Turn the classifier's raw text into the intent dict.
+
+    Args:
+        raw: The raw string response from the LLM.
+
+    Returns:
+        dict: A dictionary containing the key `is_wellness` (bool).
+    """
+    data = _extract_json(raw or "")
 
     # If parsing fails, default to treating it as wellness (so the app continues)
     # NOTE: The LLM occasionally wraps JSON in prose, causing the parser to fail.
@@ -70,3 +78,30 @@ User message: "{message}"
         data = {"is_wellness": True}
 
     return data
+
+def classify_intent(message: str):
+    """
+    Determine if a user's message pertains to health, wellness, or medical reports.
+
+    Args:
+        message: The raw text of the user's input.
+
+    Returns:
+        dict: A dictionary containing the key `is_wellness` (bool).
+    """
+    # Clear-cut messages are decided locally; only ambiguous ones cost an LLM call.
+    decision = prefilter_intent(message)
+    if decision is not None:
+        return decision
+
+    return _parse_intent(invoke_text("intent", llm, _intent_prompt(message)))
+
+async def aclassify_intent(message: str):
+    """Async variant of classify_intent using `ainvoke`."""
+    decision = prefilter_intent(message)
+    if decision is not None:
+        return decision
+
+    if INTENT_BATCHING_ENABLED:
+        return await intent_batcher.classify(llm, message, _intent_prompt(message), _parse_intent)
+    return _parse_intent(await ainvoke_text("intent", llm, _intent_prompt(message)))
@@ -8,26 +8,15 @@ orchestrator and written into the shared state dictionary under the
 `LifestyleAgent` key for downstream agents to reference.
 """
 from agents.groq_client import get_llm
+from agents.context_builder import render_profile, render_state
+from agents.stage_memo import invoke_text, ainvoke_text
 from typing import Optional
 
-llm = get_llm()
+llm = get_llm("LifestyleAgent")
 
-def run_lifestyle_agent(message: str, profile: Optional[dict], state: dict = None) -> str:
-    """
-    Invoke the Lifestyle Agent LLM chain.
-
-    Args:
-        message: The raw text of the user's input.
-        profile: The user's health profile (metrics, goals, conditions).
-        state: The current orchestration state containing outputs from any
-            agents that have already run during this turn.
-
-    Returns:
-        str: Short, actionable bullet points containing lifestyle tips that
-        refine or support previous agent suggestions.
-    """
-
-    prompt = f"""
+def _lifestyle_prompt(message: str, profile: Optional[dict], state: dict = None) -> str:
+    """Render the LifestyleAgent prompt shared by the sync and async entry points."""
+    return f"""
 You are the LifestyleAgent in a wellness assistant.
 
 Your job:
@@ -53,13 +42,34 @@ User message:
 \"\"\"{message}\"\"\"
 
 User Profile:
-{profile}
+{render_profile(profile, "LifestyleAgent")}
 
 State (previous agent insights):
-{state}
+{render_state(state, "LifestyleAgent")}
 
 Give ONLY helpful lifestyle tips. Refine or support previous agent suggestions if present.
 """
 
-    response = llm.invoke(prompt).content
+
+def run_lifestyle_agent(message: str, profile: Optional[dict], state: dict = None) -> str:
+    """
+    Invoke the Lifestyle Agent LLM chain.
+
+    Args:
+        message: The raw text of the user's input.
+        profile: The user's health profile (metrics, goals, conditions).
+        state: The current orchestration state containing outputs from any
+            agents that have already run during this turn.
+
+    Returns:
+        str: Short, actionable bullet points containing lifestyle tips that
+        refine or support previous agent suggestions.
+    """
+    response = invoke_text("LifestyleAgent", llm, _lifestyle_prompt(message, profile, state))
+    return response.strip()
+
+
+async def arun_lifestyle_agent(message: str, profile: Optional[dict], state: dict = None) -> str:
+    """Async variant of run_lifestyle_agent using `ainvoke`."""
+    response = await ainvoke_text("LifestyleAgent", llm, _lifestyle_prompt(message, profile, state))
     return response.strip()
@@ -0,0 +1,268 @@
+# backend/agents/llm_scheduler.py
+"""
+Rate-limit-aware scheduling of outbound LLM requests.
+
+Every HTTP request the shared LLM client sends (agents/groq_client.py)
+passes through the process-wide `llm_scheduler` first. It holds two token
+buckets, one for requests per minute and one for tokens per minute. Each
+call reserves its share up front and waits until the buckets cover it, so
+a burst is queued and spread out instead of running into Groq's limits.
+Requests that still come back 429 (or 5xx, or fail to connect) are retried
+after the server's Retry-After, which also holds back every other queued
+call, or else with jittered exponential backoff.
+The remaining-tokens header of each response resets the token bucket to
+the server's count, less what other calls have reserved but not finished,
+so an over-estimated reservation is given back and a tighter server-side
+view pulls the bucket down.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from config import (
+    LLM_RATE_LIMIT_RPM,
+    LLM_RATE_LIMIT_TPM,
+    LLM_MAX_RETRIES,
+    LLM_BACKOFF_BASE_S,
+    LLM_BACKOFF_MAX_S,
+)
+from core.logging_config import get_logger
+from core.metrics import LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT_SECONDS, LLM_RETRIES
+
+logger = get_logger(__name__)
+
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Failures before the server saw the request, or a pooled connection the
+# server had already closed; read timeouts are not retried.
+_RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+# Rough characters-per-token ratio for sizing a request before it is sent.
+_CHARS_PER_TOKEN = 4
+
+
+class TokenBucket:
+    """
+    Per-minute budget refilled continuously. reserve() may drive the level
+    negative; the caller then waits until the refill has covered its share,
+    which makes waiting callers queue in arrival order.
+
+    Args:
+        per_minute: Budget per minute (0 disables the bucket).
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take `amount` and return the seconds until it is actually available."""
+        if not self.capacity:
+            return 0.0
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+        return max(-self.level / self.rate, 0.0)
+
+    def refund(self, amount: float):
+        if self.capacity:
+            self.level = min(self.capacity, self.level + min(amount, self.capacity))
+
+    def sync(self, remaining: float, now: float):
+        """Set the level to what the server says is left, up or down."""
+        if self.capacity:
+            self._refill(now)
+            self.level = min(self.capacity, remaining)
+
+
+class LLMScheduler:
+    """
+    Request/token budgets plus retry policy for the shared LLM client.
+    Thread-safe; the sync and async transports both go through it.
+    """
+
+    def __init__(self, rpm: float, tpm: float, max_retries: int, backoff_base_s: float, backoff_max_s: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        # Tokens reserved by calls the server hasn't answered yet.
+        self._outstanding_tokens = 0
+        self.waiting = 0
+        self.retries = 0
+
+    @staticmethod
+    def estimate_tokens(request: httpx.Request) -> int:
+        """Prompt tokens (from the JSON body) plus the completion cap."""
+        try:
+            body = json.loads(request.content or b"{}")
+        except (ValueError, httpx.RequestNotRead):
+            return 0
+        prompt_chars = sum(len(str(m.get("content") or "")) for m in body.get("messages", ()))
+        return prompt_chars // _CHARS_PER_TOKEN + int(body.get("max_tokens") or 0)
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._outstanding_tokens += tokens
+            return max(
+                self.requests.reserve(1, now),
+                self.tokens.reserve(tokens, now),
+                self._paused_until - now,
+            )
+
+    def _refund(self, tokens: int):
+        with self._lock:
+            self._outstanding_tokens -= tokens
+            self.requests.refund(1)
+            self.tokens.refund(tokens)
+
+    def _settle(self, tokens: int, response: Optional[httpx.Response] = None):
+        """Close out one attempt's reservation, syncing to the server's count if it sent one."""
+        remaining = response.headers.get("x-ratelimit-remaining-tokens") if response is not None else None
+        try:
+            value = float(remaining) if remaining is not None else None
+        except ValueError:
+            value = None
+        with self._lock:
+            self._outstanding_tokens -= tokens
+            if value is not None:
+                # The server has already counted this call's real usage.
+                self.tokens.sync(value - self._outstanding_tokens, time.monotonic())
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response], reason: str) -> Optional[float]:
+        """Seconds to wait before retry number `attempt`, or None to give up."""
+        if attempt > self.max_retries:
+            return None
+        self.retries += 1
+        LLM_RETRIES.labels(reason).inc()
+        backoff = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** (attempt - 1)))
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after is not None:
+            try:
+                seconds = float(retry_after)
+            except ValueError:
+                return backoff
+            # The limit is shared, so hold back every caller, not just this
+            # one; the jitter keeps them from all retrying at the same instant.
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            return seconds + random.uniform(0, self.backoff_base_s)
+        return backoff
+
+    def _waiting(self, delay: float):
+        self.waiting += 1
+        LLM_QUEUE_DEPTH.inc()
+        LLM_QUEUE_WAIT_SECONDS.observe(delay)
+
+    def _done_waiting(self):
+        self.waiting -= 1
+        LLM_QUEUE_DEPTH.dec()
+
+    def send(self, send: Callable[[httpx.Request], httpx.Response], request: httpx.Request) -> httpx.Response:
+        """Blocking: wait for budget, send, and retry retryable failures."""
+        tokens = self.estimate_tokens(request)
+        attempt = 0
+        while True:
+            delay = self._reserve(tokens)
+            if delay:
+                self._waiting(delay)
+                try:
+                    time.sleep(delay)
+                finally:
+                    self._done_waiting()
+            attempt += 1
+            try:
+                response = send(request)
+            except _RETRY_ERRORS as e:
+                self._settle(tokens)
+                wait = self._retry_delay(attempt, None, type(e).__name__)
+                if wait is None:
+                    raise
+                logger.warning(f"LLM request failed ({e!r}); retry {attempt} in {wait:.1f}s")
+                time.sleep(wait)
+                continue
+            except BaseException:
+                self._settle(tokens)
+                raise
+            self._settle(tokens, response)
+            if response.status_code not in _RETRY_STATUSES:
+                return response
+            wait = self._retry_delay(attempt, response, str(response.status_code))
+            if wait is None:
+                return response
+            response.close()
+            logger.warning(f"LLM request got {response.status_code}; retry {attempt} in {wait:.1f}s")
+            time.sleep(wait)
+
+    async def asend(self, send: Callable[[httpx.Request], Awaitable[httpx.Response]],
+                    request: httpx.Request) -> httpx.Response:
+        """Async variant of send(); a call cancelled while queued gives its budget back."""
+        tokens = self.estimate_tokens(request)
+        attempt = 0
+        while True:
+            delay = self._reserve(tokens)
+            if delay:
+                self._waiting(delay)
+                try:
+                    await asyncio.sleep(delay)
+                except asyncio.CancelledError:
+                    self._refund(tokens)
+                    raise
+                finally:
+                    self._done_waiting()
+            attempt += 1
+            try:
+                response = await send(request)
+            except _RETRY_ERRORS as e:
+                self._settle(tokens)
+                wait = self._retry_delay(attempt, None, type(e).__name__)
+                if wait is None:
+                    raise
+                logger.warning(f"LLM request failed ({e!r}); retry {attempt} in {wait:.1f}s")
+                await asyncio.sleep(wait)
+                continue
+            except BaseException:
+                self._settle(tokens)
+                raise
+            self._settle(tokens, response)
+            if response.status_code not in _RETRY_STATUSES:
+                return response
+            wait = self._retry_delay(attempt, response, str(response.status_code))
+            if wait is None:
+                return response
+            await response.aclose()
+            logger.warning(f"LLM request got {response.status_code}; retry {attempt} in {wait:.1f}s")
+            await asyncio.sleep(wait)
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            self.requests._refill(now)
+            self.tokens._refill(now)
+            return {
+                "waiting": self.waiting,
+                "retries": self.retries,
+                "requests_available": self.requests.level if self.requests.capacity else None,
+                "tokens_available": self.tokens.level if self.tokens.capacity else None,
+            }
+
+
+llm_scheduler = LLMScheduler(
+    rpm=LLM_RATE_LIMIT_RPM,
+    tpm=LLM_RATE_LIMIT_TPM,
+    max_retries=LLM_MAX_RETRIES,
+    backoff_base_s=LLM_BACKOFF_BASE_S,
+    backoff_max_s=LLM_BACKOFF_MAX_S,
+)
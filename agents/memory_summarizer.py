@@ -0,0 +1,47 @@
+# backend/agents/memory_summarizer.py
+"""
+Agent responsible for condensing older conversation turns.
+
+Used by the orchestrator's SummarizingMemory: takes the running summary plus
+the exchanges that just left the verbatim window and returns an updated,
+short summary. It never touches the orchestration state and runs after the
+turn's answer has been sent.
+"""
+from typing import List
+from agents.groq_client import get_llm
+
+llm = get_llm("summarizer")
+
+
+def _summary_prompt(previous_summary: str, lines: List[str]) -> str:
+    """Render the summarizer prompt."""
+    new_turns = "\n".join(lines)
+    return f"""
+You maintain a running summary of a user's chat with a digital wellness assistant.
+
+Current summary (may be empty):
+{previous_summary or "(none)"}
+
+New conversation lines to fold in:
+{new_turns}
+
+RULES:
+- Return ONLY the updated summary, at most 6 short bullet points.
+- Keep durable facts: symptoms, conditions, goals, preferences, advice already given.
+- Drop greetings, small talk and repeated details.
+"""
+
+
+async def asummarize_history(previous_summary: str, lines: List[str]) -> str:
+    """
+    Fold new history lines into the running summary.
+
+    Args:
+        previous_summary: The summary so far ("" for none).
+        lines: "Human: ..." / "AI: ..." lines leaving the verbatim window.
+
+    Returns:
+        str: The updated summary text.
+    """
+    response = (await llm.ainvoke(_summary_prompt(previous_summary, lines))).content
+    return response.strip()
@@ -5,34 +5,24 @@ Agent responsible for merging all specialist outputs into a final report.
 Reads the user's original message and the complete orchestration state
 (containing outputs from all agents that ran this turn) to generate a
 clean, structured Markdown response. Its output is returned by the
-orchestrator and typically written to the `final_response` key.
+orchestrator and typically written to the `final_response` key. The report
+can also be streamed incrementally (astream_synthesis) for the websocket UI.
 """
 from agents.groq_client import get_llm
+from agents.context_builder import render_state
 
-llm = get_llm()
+llm = get_llm("synthesizer")
 
-def synthesize_output(state: dict, message: str) -> str:
-    """
-    Invoke the Synthesizer Agent LLM chain.
-
-    Args:
-        state: The complete orchestration state containing all specialist
-            agent outputs from this turn.
-        message: The raw text of the user's input.
-
-    Returns:
-        str: A professional Markdown-formatted health report combining all
-        agent insights and answering the user's question directly.
-    """
-
-    prompt = f"""
+def _synthesis_prompt(state: dict, message: str) -> str:
+    """Render the Synthesizer prompt shared by the sync and async entry points."""
+    return f"""
 You are the Synthesizer Agent.
 Your job is to combine these agent outputs into a CLEAN, STRUCTURED Health Report that DIRECTLY ANSWERS the user's current question.
 
 User Question: "{message}"
 
 Agent Outputs:
-{state}
+{render_state(state, "Synthesizer")}
 
 REQUIRED OUTPUT FORMAT (Markdown):
 
@@ -61,6 +51,45 @@ This is general wellness guidance and not a medical diagnosis.
 (Skip sections if NO data exists for them in agent outputs).
 Smooth out the text to look professional.
 """
-    
-    response = llm.invoke(prompt).content
+
+
+def synthesize_output(state: dict, message: str) -> str:
+    """
+    Invoke the Synthesizer Agent LLM chain.
+
+    Args:
+        state: The complete orchestration state containing all specialist
+            agent outputs from this turn.
+        message: The raw text of the user's input.
+
+    Returns:
+        str: A professional Markdown-formatted health report combining all
+        agent insights and answering the user's question directly.
+    """
+    response = llm.invoke(_synthesis_prompt(state, message)).content
     return response.strip()
+
+
+async def asynthesize_output(state: dict, message: str) -> str:
+    """Async variant of synthesize_output using `ainvoke`."""
+    response = (await llm.ainvoke(_synthesis_prompt(state, message))).content
+    return response.strip()
+
+
+
+async def astream_synthesis(state: dict, message: str):
+    """
+    Stream the synthesized report token by token using `astream`.
+
+    Args:
+        state: The complete orchestration state containing all specialist
+            agent outputs from this turn.
+        message: The raw text of the user's input.
+
+    Yields:
+        str: Text fragments in generation order. Joined and stripped, they
+        equal what asynthesize_output would have returned.
+    """
+    async for chunk in llm.astream(_synthesis_prompt(state, message)):
+        if chunk.content:
+            yield chunk.content
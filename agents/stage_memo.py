@@ -0,0 +1,121 @@
+# backend/agents/stage_memo.py
+"""
+Memoization of individual LLM stages (intent, supervisor, specialists).
+
+At low temperature a stage's output is effectively a function of its exact
+inputs, so agents route their LLM calls through ainvoke_text()/invoke_text(),
+which key a bounded LRU on (stage, generation settings such as the model,
+rendered prompt or chain inputs).
+Repeated or retried turns then skip every stage whose inputs they share.
+Only successful calls are stored. STAGE_MEMO_ENABLED is the kill switch;
+stage_memo.enabled can also be flipped at runtime.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from config import MODEL_NAME, STAGE_MEMO_ENABLED, STAGE_MEMO_MAX_ENTRIES
+from core.metrics import STAGE_MEMO_LOOKUPS
+
+
+class StageMemo:
+    """Thread-safe LRU of stage outputs with per-stage hit/miss counters."""
+
+    def __init__(self, max_entries: int, enabled: bool = True):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def key(stage: str, inputs: Any, settings: Optional[dict] = None) -> str:
+        raw = json.dumps([stage, settings or {"model": MODEL_NAME}, inputs], sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, stage: str, result: str):
+        counts = self._counts.setdefault(stage, {"hits": 0, "misses": 0})
+        counts[result] += 1
+        STAGE_MEMO_LOOKUPS.labels(stage, "hit" if result == "hits" else "miss").inc()
+
+    def get(self, stage: str, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self._count(stage, "misses")
+                return None
+            self._entries.move_to_end(key)
+            self._count(stage, "hits")
+            return text
+
+    def put(self, key: str, text: str):
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "stages": {stage: dict(counts) for stage, counts in self._counts.items()},
+            }
+
+
+stage_memo = StageMemo(STAGE_MEMO_MAX_ENTRIES, enabled=STAGE_MEMO_ENABLED)
+
+
+def generation_settings(runnable) -> dict:
+    """The model binding's settings (model, max_tokens...) a model or chain runs with."""
+    # In a `prompt | llm [| parser]` chain the model is the last step that has them.
+    for step in reversed(getattr(runnable, "steps", None) or [runnable]):
+        model = getattr(step, "bound", step)
+        if hasattr(step, "kwargs") or hasattr(model, "model_name"):
+            settings = dict(getattr(step, "kwargs", None) or {})
+            settings.setdefault("model", getattr(model, "model_name", MODEL_NAME))
+            return settings
+    return {"model": MODEL_NAME}
+
+
+def _text(result) -> str:
+    # Bare models return an AIMessage; chains ending in StrOutputParser a str.
+    return result if isinstance(result, str) else result.content
+
+
+def invoke_text(stage: str, runnable, inputs) -> str:
+    """
+    `runnable.invoke(inputs)` as text, memoized per stage.
+
+    Args:
+        stage: Counter label and key namespace (e.g. "DietAgent").
+        runnable: The LLM or chain to call on a miss.
+        inputs: The rendered prompt or the chain's input dict.
+    """
+    if not stage_memo.enabled:
+        return _text(runnable.invoke(inputs))
+    key = stage_memo.key(stage, inputs, generation_settings(runnable))
+    text = stage_memo.get(stage, key)
+    if text is None:
+        text = _text(runnable.invoke(inputs))
+        stage_memo.put(key, text)
+    return text
+
+
+async def ainvoke_text(stage: str, runnable, inputs) -> str:
+    """Async variant of invoke_text using `ainvoke`."""
+    if not stage_memo.enabled:
+        return _text(await runnable.ainvoke(inputs))
+    key = stage_memo.key(stage, inputs, generation_settings(runnable))
+    text = stage_memo.get(stage, key)
+    if text is None:
+        text = _text(await runnable.ainvoke(inputs))
+        stage_memo.put(key, text)
+    return text
@@ -5,17 +5,20 @@ Agent responsible for routing decisions in the multi-agent orchestration.
 Reads the user's message, their profile, the conversation history, and the
 current state (which agents have already run) to decide the next step. It
 does not write to the state dictionary itself; it returns the name of the next
-agent to run, or "FINISH" to terminate the loop.
+agent to run, or "FINISH" to terminate the loop. In plan mode it instead
+returns the full ordered route for the turn in a single call.
 """
 
 import json
 import re
-from typing import Optional
+from typing import List, Optional
 from langchain_core.prompts import PromptTemplate
 from core.logging_config import get_logger
 from agents.groq_client import get_llm
+from agents.context_builder import render_profile, render_state
+from agents.stage_memo import invoke_text, ainvoke_text
 
-llm = get_llm()
+llm = get_llm("supervisor")
 logger = get_logger(__name__)
 
 def extract_json_block(text: str) -> Optional[dict]:
@@ -73,13 +76,94 @@ SELECTION GUIDELINES (VERY IMPORTANT):
 
 OUTPUT FORMAT (STRICT):
 Respond with ONLY the JSON object. No reasoning, no explanation, no markdown fences, no text before or after. Your entire response must be parseable by json.loads() as-is.
-Example: {{"next_agent": "SymptomAgent"}} or {{"next_agent": "FINISH"}}
+{output_format}
 """,
-    input_variables=["conversation_history", "user_message", "profile", "cleaned_state", "intent"]
+    input_variables=["conversation_history", "user_message", "profile", "cleaned_state", "intent", "output_format"]
 )
 
-# Create the Chain
-supervisor_chain = supervisor_prompt | llm
+STEP_OUTPUT_FORMAT = 'Example: {"next_agent": "SymptomAgent"} or {"next_agent": "FINISH"}'
+
+# Parallel scheduling: the supervisor may hand back several agents at once.
+# The orchestrator's scheduler still orders them by their data dependencies,
+# so listing a whole team is safe.
+GROUP_OUTPUT_FORMAT = (
+    "You MAY select several agents at once when the user needs a TEAM; list them in order and "
+    "the system runs independent ones in parallel.\n"
+    'Example: {"next_agents": ["SymptomAgent", "DietAgent", "LifestyleAgent"]} '
+    'or {"next_agents": ["DietAgent"]} or {"next_agents": ["FINISH"]}'
+)
+
+# Create the Chains
+supervisor_chain = supervisor_prompt.partial(output_format=STEP_OUTPUT_FORMAT) | llm
+supervisor_group_chain = supervisor_prompt.partial(output_format=GROUP_OUTPUT_FORMAT) | llm
+
+# Plan mode: one call returns the whole route for the turn instead of one
+# decision per step, removing N supervisor round trips from every turn.
+plan_prompt = PromptTemplate(
+    template="""You are the SUPERVISOR of a multi-agent Digital Wellness Assistant.
+
+Your role:
+- Plan the COMPLETE, ORDERED list of specialized agents needed to answer this message.
+- Use deep reasoning, not simple keyword matching.
+- You must consider intent, profile and history.
+
+CONVERSATION HISTORY:
+{conversation_history}
+
+CURRENT USER MESSAGE:
+{user_message}
+
+USER PROFILE:
+{profile}
+
+USER INTENT:
+{intent}
+
+AVAILABLE AGENTS:
+1. SymptomAgent: Physical/mental symptoms, pain, fatigue, feeling unwell.
+2. DietAgent: Food, nutrition, digestion, weight, diet plans.
+3. FitnessAgent: Exercise, workouts, stamina, muscle, posture.
+4. LifestyleAgent: Sleep, stress, habits, routines, burnout.
+
+SELECTION GUIDELINES (VERY IMPORTANT):
+1. **COMPLEX SYMPTOMS**: If user has health issues/pain, Form a TEAM: `SymptomAgent` -> `DietAgent` -> `LifestyleAgent` -> `FitnessAgent`.
+2. **SPECIFIC REQUESTS**: If user asks for ONE thing (e.g. "Diet plan"), plan ONLY that agent.
+3. **GENERAL**: Never list the same agent twice.
+4. **PARALLEL** (optional): Agents that don't need each other's output may share a group in `parallel`.
+   DietAgent, LifestyleAgent and FitnessAgent only need SymptomAgent's output.
+
+OUTPUT FORMAT (STRICT):
+Respond with ONLY the JSON object. No reasoning, no explanation, no markdown fences, no text before or after. Your entire response must be parseable by json.loads() as-is.
+Example: {{"agents": ["SymptomAgent", "DietAgent", "LifestyleAgent"], "parallel": [["SymptomAgent"], ["DietAgent", "LifestyleAgent"]]}}
+Example: {{"agents": ["DietAgent"]}}
+""",
+    input_variables=["conversation_history", "user_message", "profile", "intent"]
+)
+
+plan_chain = plan_prompt | llm
+
+def _supervisor_inputs(user_message: str, profile: Optional[dict], state: dict) -> dict:
+    """Build the prompt variables shared by the sync and async entry points."""
+    conversation_history = state.get("conversation_history", "No previous conversation yet.")
+    intent = state.get("intent", {})
+    # Only what routing needs: a compact profile and a short digest of which
+    # specialists already answered (see agents/context_builder.py).
+    return {
+        "conversation_history": conversation_history,
+        "user_message": user_message,
+        "profile": render_profile(profile, "Supervisor"),
+        "cleaned_state": render_state(state, "Supervisor"),
+        "intent": str(intent)
+    }
+
+def _parse_decision(raw_text: str) -> str:
+    """Pull `next_agent` out of the supervisor's reply, defaulting to FINISH."""
+    parsed_json = extract_json_block(raw_text)
+
+    if parsed_json and "next_agent" in parsed_json:
+        return parsed_json["next_agent"]
+    logger.error(f"Failed to extract valid JSON from Supervisor LLM output. Raw text:\n{raw_text}")
+    return "FINISH"
 
 def supervisor(user_message: str, profile: Optional[dict], state: dict) -> str:
     """
@@ -95,29 +179,103 @@ def supervisor(user_message: str, profile: Optional[dict], state: dict) -> str:
         str: The exact name of the next agent to invoke (e.g., "DietAgent"),
         or "FINISH" if the response is complete.
     """
-    conversation_history = state.get("conversation_history", "No previous conversation yet.")
-    intent = state.get("intent", {})
-    cleaned_state = {k: v for k, v in state.items() if k not in ["conversation_history", "intent"]}
+    try:
+        result = invoke_text("supervisor", supervisor_chain, _supervisor_inputs(user_message, profile, state))
+        return _parse_decision(result)
+
+    except Exception as e:
+        logger.error(f"Supervisor Error: {e}")
+        return "FINISH"
 
+async def asupervisor(user_message: str, profile: Optional[dict], state: dict) -> str:
+    """Async variant of supervisor using `ainvoke`; same FINISH-on-error contract."""
     try:
-        result = supervisor_chain.invoke({
-            "conversation_history": conversation_history,
-            "user_message": user_message,
-            "profile": str(profile),
-            "cleaned_state": str(cleaned_state),
-            "intent": str(intent)
-        })
-        
-        # The result from llm without parser is an AIMessage
-        raw_text = result.content
-        parsed_json = extract_json_block(raw_text)
-        
-        if parsed_json and "next_agent" in parsed_json:
-            return parsed_json["next_agent"]
-        else:
-            logger.error(f"Failed to extract valid JSON from Supervisor LLM output. Raw text:\n{raw_text}")
-            return "FINISH"
+        result = await ainvoke_text("supervisor", supervisor_chain, _supervisor_inputs(user_message, profile, state))
+        return _parse_decision(result)
 
     except Exception as e:
         logger.error(f"Supervisor Error: {e}")
         return "FINISH"
+
+def _parse_group(raw_text: str) -> List[str]:
+    """Pull the agent list out of a group decision, accepting the single-agent shape too."""
+    parsed_json = extract_json_block(raw_text)
+
+    if parsed_json:
+        agents = parsed_json.get("next_agents", parsed_json.get("next_agent"))
+        if isinstance(agents, str):
+            agents = [agents]
+        if isinstance(agents, list) and agents and all(isinstance(a, str) for a in agents):
+            return agents
+    logger.error(f"Failed to extract valid JSON from Supervisor LLM output. Raw text:\n{raw_text}")
+    return ["FINISH"]
+
+async def asupervisor_group(user_message: str, profile: Optional[dict], state: dict) -> List[str]:
+    """
+    Ask the supervisor for the next group of agents (parallel scheduling mode).
+
+    Args:
+        user_message: The raw text of the user's input.
+        profile: The user's health profile (metrics, goals, conditions).
+        state: The current orchestration state.
+
+    Returns:
+        list: Agent names to run next, or ["FINISH"] when the response is
+        complete or the call fails.
+    """
+    try:
+        result = await ainvoke_text("supervisor_group", supervisor_group_chain, _supervisor_inputs(user_message, profile, state))
+        return _parse_group(result)
+
+    except Exception as e:
+        logger.error(f"Supervisor Error: {e}")
+        return ["FINISH"]
+
+def _parse_plan(raw_text: str) -> Optional[dict]:
+    """
+    Validate a plan-mode reply.
+
+    Returns:
+        dict | None: `{"agents": [...], "parallel": [[...], ...] | None}`, or
+        None if the reply is not a usable plan. `parallel` is dropped when its
+        groups don't cover exactly the planned agents.
+    """
+    parsed_json = extract_json_block(raw_text)
+    agents = parsed_json.get("agents") if parsed_json else None
+    if not isinstance(agents, list) or not all(isinstance(a, str) for a in agents):
+        logger.error(f"Failed to extract a valid plan from Supervisor LLM output. Raw text:\n{raw_text}")
+        return None
+
+    agents = [a for a in dict.fromkeys(agents) if a != "FINISH"]
+    parallel = parsed_json.get("parallel")
+    if not (
+        isinstance(parallel, list)
+        and all(isinstance(g, list) for g in parallel)
+        and sorted(a for g in parallel for a in g) == sorted(agents)
+    ):
+        parallel = None
+
+    return {"agents": agents, "parallel": parallel}
+
+async def aplan_route(user_message: str, profile: Optional[dict], state: dict) -> Optional[dict]:
+    """
+    Ask the supervisor for the whole agent route of this turn in one call.
+
+    Args:
+        user_message: The raw text of the user's input.
+        profile: The user's health profile (metrics, goals, conditions).
+        state: The current orchestration state (history and intent).
+
+    Returns:
+        dict | None: The validated plan (see _parse_plan), or None on failure
+        so the caller can fall back to step-wise routing.
+    """
+    inputs = _supervisor_inputs(user_message, profile, state)
+    inputs.pop("cleaned_state")
+    try:
+        result = await ainvoke_text("supervisor_plan", plan_chain, inputs)
+        return _parse_plan(result)
+
+    except Exception as e:
+        logger.error(f"Supervisor Error: {e}")
+        return None
@@ -12,8 +12,10 @@ from typing import Optional
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from agents.groq_client import get_llm
+from agents.context_builder import render_profile
+from agents.stage_memo import invoke_text, ainvoke_text
 
-llm = get_llm()
+llm = get_llm("SymptomAgent")
 
 # Define Prompt Template
 symptom_prompt = PromptTemplate(
@@ -46,6 +48,13 @@ CRITICAL: If user asks to analyze a PDF but none is present, output ONLY: "Pleas
 # Create Chain
 symptom_chain = symptom_prompt | llm | StrOutputParser()
 
+def _symptom_inputs(message: str, profile: Optional[dict]) -> dict:
+    """Build the prompt variables shared by the sync and async entry points."""
+    return {
+        "message": message,
+        "profile": render_profile(profile, "SymptomAgent")
+    }
+
 def run_symptom_agent(message: str, profile: Optional[dict]) -> str:
     """
     Invoke the Symptom Agent LLM chain.
@@ -59,10 +68,18 @@ def run_symptom_agent(message: str, profile: Optional[dict]) -> str:
         causes, and risk level.
     """
     try:
-        response = symptom_chain.invoke({
-            "message": message,
-            "profile": str(profile) if profile else "None"
-        })
+        response = invoke_text("SymptomAgent", symptom_chain, _symptom_inputs(message, profile))
+        return response.strip()
+    except Exception as e:
+        return f"Error analyzing symptoms: {str(e)}"
+
+async def arun_symptom_agent(message: str, profile: Optional[dict]) -> str:
+    """
+    Async variant of run_symptom_agent using `ainvoke`, so the event loop
+    stays free for other users while the Groq request is in flight.
+    """
+    try:
+        response = await ainvoke_text("SymptomAgent", symptom_chain, _symptom_inputs(message, profile))
         return response.strip()
     except Exception as e:
-        return f"Error analyzing symptoms: {str(e)}"
\ No newline at end of file
+        return f"Error analyzing symptoms: {str(e)}"
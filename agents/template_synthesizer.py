@@ -0,0 +1,70 @@
+# backend/agents/template_synthesizer.py
+"""
+Local Markdown formatter used in place of the Synthesizer LLM call.
+
+Maps each specialist's output from the orchestration state into the report
+sections the Synthesizer prompt defines (summary, diet, lifestyle, exercise,
+disclaimer). The orchestrator uses it for single-agent turns, where the LLM
+would only reformat one section, and optionally for every turn under load.
+"""
+import re
+
+DISCLAIMER = "This is general wellness guidance and not a medical diagnosis."
+
+# (state key, section heading), in the Synthesizer's section order.
+_SECTIONS = (
+    ("diet", "### 🍽 Diet Plan"),
+    ("lifestyle", "### 🧘 Lifestyle & Sleep Tips"),
+    ("fitness", "### 🏃 Exercise Plan"),
+)
+
+_HEADING = re.compile(r"^\s*#{1,6}\s*(.+?)\s*#*\s*$")
+
+
+def _clean(text: str) -> str:
+    """
+    Fit an agent's Markdown inside a report section.
+
+    Agents sometimes open with their own headings; those are turned into bold
+    lines so they don't compete with the report's `###` sections.
+    """
+    lines = []
+    for line in str(text).strip().splitlines():
+        match = _HEADING.match(line)
+        lines.append(f"**{match.group(1)}**" if match else line.rstrip())
+    return "\n".join(lines).strip()
+
+
+def can_format(state: dict) -> bool:
+    """True when the state holds at least one specialist output to format."""
+    return any(state.get(key) for key in ("symptoms", "diet", "lifestyle", "fitness"))
+
+
+def format_report(state: dict, message: str) -> str:
+    """
+    Build the final Markdown report without an LLM call.
+
+    Args:
+        state: The orchestration state containing specialist outputs.
+        message: The raw text of the user's input.
+
+    Returns:
+        str: A report using the Synthesizer's section layout; sections with no
+        agent output are skipped, and the disclaimer is always included.
+    """
+    parts = ["### Wellness Summary"]
+    if state.get("symptoms"):
+        parts.append(_clean(state["symptoms"]))
+    else:
+        parts.append(f'Here is personalised guidance for: "{message.strip()}"')
+    if state.get("note"):
+        parts.append(f"_{state['note']}_")
+
+    for key, heading in _SECTIONS:
+        if state.get(key):
+            parts.append(heading)
+            parts.append(_clean(state[key]))
+
+    parts.append("### ⚠ Disclaimer")
+    parts.append(DISCLAIMER)
+    return "\n\n".join(parts)
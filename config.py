@@ -6,6 +6,7 @@ Centralizes all environment variables (API keys, JWT settings, model name)
 by loading them from .env. Other modules import these constants instead of
 calling os.getenv() directly.
 """
+import json
 import os
 from dotenv import load_dotenv
 
@@ -23,3 +24,149 @@ JWT_ALGORITHM = "HS256"
 
 # Define the specific LLM model used by all agents in the pipeline
 MODEL_NAME = "llama-3.1-8b-instant"
+
+# Per-stage generation settings (model tiering). Every LLM stage ("intent",
+# "supervisor", "SymptomAgent", "DietAgent", "FitnessAgent", "LifestyleAgent",
+# "synthesizer", "summarizer") runs MODEL_NAME at temperature 0.2 with a
+# 512-token cap unless LLM_STAGE_DEFAULTS or the LLM_STAGE_SETTINGS JSON env
+# var say otherwise, per key: "model", "max_tokens", "temperature", "stop".
+# Routing stages only emit a short JSON object, so they get tight caps;
+# e.g. LLM_STAGE_SETTINGS='{"synthesizer": {"model": "llama-3.3-70b-versatile"}}'
+LLM_STAGE_DEFAULTS = {
+    "intent": {"max_tokens": 32, "temperature": 0.0},
+    "supervisor": {"max_tokens": 128, "temperature": 0.0},
+    "synthesizer": {"max_tokens": 1024},
+}
+LLM_STAGE_SETTINGS = json.loads(os.getenv("LLM_STAGE_SETTINGS") or "{}")
+
+# LLM backend: "groq", or "fake" for the offline stand-in in
+# agents/fake_llm.py (canned per-stage answers, no key or network needed).
+# The fake draws each call's latency from FAKE_LLM_LATENCY: "fixed"
+# (FAKE_LLM_LATENCY_MS), "lognormal" (median FAKE_LLM_LATENCY_MS, shape
+# FAKE_LLM_LATENCY_SIGMA) or "heavy_tail" (Pareto with that median and
+# FAKE_LLM_TAIL_ALPHA), and fails that share of calls with a 500 or a 429.
+# Fake calls still queue against LLM_RATE_LIMIT_RPM/TPM when those are set,
+# to see how the orchestration behaves under a given account's limits
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq").lower()
+FAKE_LLM_LATENCY = os.getenv("FAKE_LLM_LATENCY", "lognormal").lower()
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "400"))
+FAKE_LLM_LATENCY_SIGMA = float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.5"))
+FAKE_LLM_TAIL_ALPHA = float(os.getenv("FAKE_LLM_TAIL_ALPHA", "1.5"))
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_RATE_LIMIT_RATE = float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0"))
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+
+# Connection pool of the shared LLM client (agents/groq_client.py). Every
+# agent reuses these keep-alive connections; idle ones are closed after
+# LLM_KEEPALIVE_EXPIRY_S. Timeouts apply per request
+LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "20"))
+LLM_POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "10"))
+LLM_KEEPALIVE_EXPIRY_S = float(os.getenv("LLM_KEEPALIVE_EXPIRY_S", "60"))
+LLM_CONNECT_TIMEOUT_S = float(os.getenv("LLM_CONNECT_TIMEOUT_S", "5"))
+LLM_READ_TIMEOUT_S = float(os.getenv("LLM_READ_TIMEOUT_S", "30"))
+
+# Outbound LLM scheduling (agents/llm_scheduler.py): calls are queued
+# against requests- and tokens-per-minute budgets instead of running into
+# 429s. Both are off (0) by default; set them to the account's limits (Groq's
+# free tier for the default model is 30 RPM / 6000 TPM). Failed calls
+# (429/5xx/connect errors) are retried up to LLM_MAX_RETRIES times after
+# Retry-After or a jittered exponential backoff
+LLM_RATE_LIMIT_RPM = float(os.getenv("LLM_RATE_LIMIT_RPM", "0"))
+LLM_RATE_LIMIT_TPM = float(os.getenv("LLM_RATE_LIMIT_TPM", "0"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", "0.5"))
+LLM_BACKOFF_MAX_S = float(os.getenv("LLM_BACKOFF_MAX_S", "20"))
+
+# Parallel fan-out: let the supervisor pick a group of agents per step and run
+# the ones that don't depend on each other concurrently (see orchestrator/scheduler.py)
+PARALLEL_AGENTS = os.getenv("PARALLEL_AGENTS", "false").lower() == "true"
+
+# Supervisor routing: "step" asks the supervisor before every agent (and once
+# more to FINISH); "plan" asks once for the whole ordered route of the turn;
+# "learned" predicts the route locally and only asks the supervisor (step-wise)
+# when the model's confidence is below LEARNED_ROUTER_MIN_CONFIDENCE
+ROUTING_MODE = os.getenv("ROUTING_MODE", "step").lower()
+LEARNED_ROUTER_PATH = os.getenv("LEARNED_ROUTER_PATH", "models/learned_router.json")
+LEARNED_ROUTER_MIN_CONFIDENCE = float(os.getenv("LEARNED_ROUTER_MIN_CONFIDENCE", "0.6"))
+
+# Local intent prefilter: lexicon scores whose confidence clears these
+# thresholds are decided without an LLM call; anything in between goes to the
+# LLM classifier. One strong term scores 0.75, so both defaults need a
+# second term (0.875 with a weak one, 0.9375 with another strong one).
+# Off-topic is only decided locally when there is no wellness term at all
+INTENT_PREFILTER_ENABLED = os.getenv("INTENT_PREFILTER_ENABLED", "true").lower() == "true"
+INTENT_PREFILTER_WELLNESS_THRESHOLD = float(os.getenv("INTENT_PREFILTER_WELLNESS_THRESHOLD", "0.85"))
+INTENT_PREFILTER_OFFTOPIC_THRESHOLD = float(os.getenv("INTENT_PREFILTER_OFFTOPIC_THRESHOLD", "0.85"))
+
+# Intent micro-batching (agents/intent_batcher.py): messages that need the
+# LLM classifier within INTENT_BATCH_WINDOW_MS of each other, across users,
+# are classified in one call of up to INTENT_BATCH_MAX_SIZE messages
+INTENT_BATCHING_ENABLED = os.getenv("INTENT_BATCHING_ENABLED", "false").lower() == "true"
+INTENT_BATCH_WINDOW_MS = float(os.getenv("INTENT_BATCH_WINDOW_MS", "10"))
+INTENT_BATCH_MAX_SIZE = int(os.getenv("INTENT_BATCH_MAX_SIZE", "16"))
+
+# Speculative execution: start SymptomAgent as soon as the profile is loaded,
+# before intent and routing are known; the result is used if the route picks
+# SymptomAgent and discarded otherwise (see scheduler.speculation_stats)
+SPECULATIVE_SYMPTOM_AGENT = os.getenv("SPECULATIVE_SYMPTOM_AGENT", "false").lower() == "true"
+
+# Template synthesis: build the final report locally instead of with the
+# Synthesizer LLM. "single" = only for turns where one specialist answered,
+# "always" = every turn, "off" = never. Under load (in-flight turns at or above
+# the threshold; 0 disables) every turn is templated
+TEMPLATE_SYNTHESIS = os.getenv("TEMPLATE_SYNTHESIS", "single").lower()
+TEMPLATE_SYNTHESIS_LOAD_THRESHOLD = int(os.getenv("TEMPLATE_SYNTHESIS_LOAD_THRESHOLD", "0"))
+
+# Chat memory bounds: max users kept (LRU), seconds of inactivity before a
+# user's memory is dropped, and per-user caps on exchanges and characters
+# (0 disables any of them)
+MEMORY_MAX_USERS = int(os.getenv("MEMORY_MAX_USERS", "5000"))
+MEMORY_IDLE_TTL_S = float(os.getenv("MEMORY_IDLE_TTL_S", "21600"))
+MEMORY_MAX_TURNS = int(os.getenv("MEMORY_MAX_TURNS", "20"))
+MEMORY_MAX_CHARS = int(os.getenv("MEMORY_MAX_CHARS", "12000"))
+
+# Chat memory mode: "buffer" keeps raw turns (capped above); "summary" keeps
+# the last MEMORY_SUMMARY_KEEP_TURNS exchanges verbatim and folds older ones
+# into a running summary of at most MEMORY_SUMMARY_MAX_CHARS, updated in the
+# background after each turn
+MEMORY_MODE = os.getenv("MEMORY_MODE", "buffer").lower()
+MEMORY_SUMMARY_KEEP_TURNS = int(os.getenv("MEMORY_SUMMARY_KEEP_TURNS", "4"))
+MEMORY_SUMMARY_MAX_CHARS = int(os.getenv("MEMORY_SUMMARY_MAX_CHARS", "1500"))
+
+# Chat memory storage: "inprocess" (per worker, bounded), "mongo" (snapshot
+# stored with conversation_turns, consistent across workers) or "redis"
+# (shared JSON snapshots, needs REDIS_URL). Memory that isn't cached is
+# rebuilt from the last MEMORY_REHYDRATE_TURNS stored turns (0 disables)
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "inprocess").lower()
+MEMORY_REHYDRATE_TURNS = int(os.getenv("MEMORY_REHYDRATE_TURNS", "10"))
+REDIS_URL = os.getenv("REDIS_URL")
+MEMORY_REDIS_TTL_S = int(os.getenv("MEMORY_REDIS_TTL_S", "86400"))
+
+# Latency budget: default per-turn deadline in seconds (0 disables; clients
+# may send their own `deadline_s`). As it runs out the orchestrator stops
+# routing, skips agents and falls back to template synthesis. The reserve is
+# time kept back for the Synthesizer LLM; no supervisor call or agent wave
+# starts with less than DEADLINE_MIN_STEP_S of routing time left
+TURN_DEADLINE_S = float(os.getenv("TURN_DEADLINE_S", "0"))
+DEADLINE_SYNTHESIS_RESERVE_S = float(os.getenv("DEADLINE_SYNTHESIS_RESERVE_S", "3"))
+DEADLINE_MIN_STEP_S = float(os.getenv("DEADLINE_MIN_STEP_S", "1"))
+
+# Final-response cache: a repeated question from the same user, with the same
+# profile and the same last RESPONSE_CACHE_CONTEXT_TURNS exchanges, replays
+# the stored answer instead of re-running the agents. Bounded by entry count
+# and TTL; a user's entries are dropped when they save their profile
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+RESPONSE_CACHE_TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", "3600"))
+RESPONSE_CACHE_CONTEXT_TURNS = int(os.getenv("RESPONSE_CACHE_CONTEXT_TURNS", "1"))
+
+# Singleflight coalescing: while a (user, message) turn is in flight, an
+# identical request (retry, double-click, second tab) attaches to it and
+# receives the same events instead of running and persisting its own turn
+COALESCE_IDENTICAL_TURNS = os.getenv("COALESCE_IDENTICAL_TURNS", "true").lower() == "true"
+
+# Stage memoization: identical intent/supervisor/specialist LLM calls (same
+# stage, model and rendered inputs) reuse the earlier output from a bounded
+# LRU. STAGE_MEMO_ENABLED=false is the kill switch
+STAGE_MEMO_ENABLED = os.getenv("STAGE_MEMO_ENABLED", "true").lower() == "true"
+STAGE_MEMO_MAX_ENTRIES = int(os.getenv("STAGE_MEMO_MAX_ENTRIES", "2000"))
@@ -0,0 +1,134 @@
+# backend/core/metrics.py
+"""
+Prometheus metrics for the API, the orchestrator and the LLM/Mongo layers.
+
+Defines every metric in one place (on prometheus_client's default registry)
+plus small helpers the rest of the app calls. Updates are a dict lookup and
+an uncontended per-series lock, cheap enough to stay on under load. Served
+as text by GET /metrics in main.py.
+"""
+import functools
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# LLM calls and HTTP requests run from tens of ms up to tens of seconds.
+_SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+# Mongo operations are usually single-digit ms.
+_FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+    buckets=_SLOW_BUCKETS,
+)
+LLM_CALL_SECONDS = Histogram(
+    "llm_call_duration_seconds",
+    "LLM call latency by calling agent/stage.",
+    ("agent", "outcome"),
+    buckets=_SLOW_BUCKETS,
+)
+LLM_HTTP_REQUESTS = Counter(
+    "llm_http_requests_total",
+    "HTTP requests sent by the shared LLM client, by client mode (sync/async).",
+    ("mode",),
+)
+LLM_HTTP_CONNECTIONS = Counter(
+    "llm_http_connections_opened_total",
+    "New TCP connections opened by the shared LLM client; requests minus these were served on reused keep-alive connections.",
+    ("mode",),
+)
+LLM_QUEUE_DEPTH = Gauge(
+    "llm_scheduler_queue_depth",
+    "LLM calls currently waiting for rate-limit budget.",
+)
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "llm_scheduler_wait_seconds",
+    "Time LLM calls were held back to stay within rate limits.",
+    buckets=_SLOW_BUCKETS,
+)
+LLM_RETRIES = Counter(
+    "llm_scheduler_retries_total",
+    "LLM requests retried, by reason (HTTP status or connection error).",
+    ("reason",),
+)
+INTENT_BATCH_SIZE = Histogram(
+    "intent_batch_size",
+    "Messages classified per batched intent flush.",
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16, 24, 32),
+)
+SUPERVISOR_STEPS = Histogram(
+    "orchestrator_supervisor_steps_per_turn",
+    "Supervisor routing calls made per turn.",
+    buckets=(0, 1, 2, 3, 4, 5, 6, 8),
+)
+ROUTING_DECISIONS = Counter(
+    "orchestrator_routing_decisions_total",
+    "Agents chosen by routing, by router source.",
+    ("source", "agent"),
+)
+MONGO_OPERATION_SECONDS = Histogram(
+    "mongo_operation_duration_seconds",
+    "Mongo latency per repository function.",
+    ("operation",),
+    buckets=_FAST_BUCKETS,
+)
+WS_INFLIGHT = Gauge(
+    "orchestrator_websocket_turns_in_flight",
+    "WebSocket orchestrations currently running.",
+)
+TURNS_CANCELLED = Counter(
+    "orchestrator_turns_cancelled_total",
+    "Turns abandoned before their answer was complete, by the stage running at the time.",
+    ("stage",),
+)
+LLM_CALLS_SAVED = Counter(
+    "orchestrator_llm_calls_saved_total",
+    "Estimated LLM calls avoided (or cut short) by cancelling turns.",
+)
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "orchestrator_response_cache_lookups_total",
+    "Final-response cache lookups, by result (hit/miss).",
+    ("result",),
+)
+TURNS_COALESCED = Counter(
+    "orchestrator_turns_coalesced_total",
+    "Requests that attached to an identical in-flight turn instead of running their own.",
+)
+STAGE_MEMO_LOOKUPS = Counter(
+    "llm_stage_memo_lookups_total",
+    "Memoized LLM stage lookups, by stage and result (hit/miss).",
+    ("stage", "result"),
+)
+DEGRADATIONS = Counter(
+    "orchestrator_degradations_total",
+    "Shortcuts taken to meet a turn's latency budget, by kind.",
+    ("kind",),
+)
+
+
+def mongo_timed(fn):
+    """Decorator recording a repository function's latency."""
+    observe = MONGO_OPERATION_SECONDS.labels(fn.__name__).observe
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            observe(time.perf_counter() - t0)
+
+    return wrapper
+
+
+def record_routing(source: str, agents) -> None:
+    """Count one routing decision ("FINISH" included) per chosen agent."""
+    for agent in agents:
+        ROUTING_DECISIONS.labels(source, agent).inc()
+
+
+def render_latest():
+    """Return (body, content type) for the /metrics response."""
+    return generate_latest(), CONTENT_TYPE_LATEST
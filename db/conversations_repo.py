@@ -3,16 +3,19 @@
 Data access for conversation history.
 """
 import uuid
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 from datetime import datetime
 from db.client import conversation_collection, _ensure_collection
+from core.metrics import mongo_timed
 
+@mongo_timed
 def append_conversation_turn(
     user_id: Any,
     user_message: str,
     assistant_response: str,
     agents_used: List[str],
     reasoning_logs: List[Dict[str, Any]] = None,
+    spans: List[Dict[str, Any]] = None,
 ) -> None:
     """
     Store a single conversation turn in the user's history.
@@ -23,6 +26,7 @@ def append_conversation_turn(
         assistant_response: The final Markdown report from the synthesizer.
         agents_used: List of agent names that contributed to the response.
         reasoning_logs: Optional list of intermediate logging events.
+        spans: Optional per-stage timing spans for the turn.
     """
     coll = _ensure_collection(conversation_collection, "conversation_turns")
     uid = str(user_id)
@@ -33,6 +37,7 @@ def append_conversation_turn(
         "assistant_response": assistant_response,
         "agents_used": agents_used,
         "reasoning_logs": reasoning_logs or [],
+        "spans": spans or [],
     }
     coll.update_one(
         {"user_id": uid},
@@ -41,6 +46,7 @@ def append_conversation_turn(
     )
 
 
+@mongo_timed
 def get_conversation_history(user_id: Any) -> List[Dict[str, Any]]:
     """
     Retrieve all stored conversation turns for a user.
@@ -71,6 +77,72 @@ def get_conversation_history(user_id: Any) -> List[Dict[str, Any]]:
             
     return turns
 
+@mongo_timed
+def get_recent_conversation_turns(user_id: Any, limit: int) -> List[Dict[str, Any]]:
+    """
+    Retrieve only the last `limit` turns for a user (used to rehydrate chat
+    memory), letting Mongo slice the array instead of shipping all of it.
+
+    Args:
+        user_id: The unique identifier for the user.
+        limit: Maximum number of most recent turns to return.
+
+    Returns:
+        list: The turns, oldest first.
+    """
+    coll = _ensure_collection(conversation_collection, "conversation_turns")
+    doc = coll.find_one(
+        {"user_id": str(user_id)},
+        {"_id": 0, "turns": {"$slice": -limit}},
+    )
+    return doc.get("turns", []) if doc else []
+
+@mongo_timed
+def get_memory_snapshot(user_id: Any) -> Optional[Dict[str, Any]]:
+    """
+    Retrieve the user's stored chat-memory snapshot (MEMORY_BACKEND=mongo).
+
+    Args:
+        user_id: The unique identifier for the user.
+
+    Returns:
+        dict | None: The snapshot saved by save_memory_snapshot, or None.
+    """
+    coll = _ensure_collection(conversation_collection, "conversation_turns")
+    doc = coll.find_one({"user_id": str(user_id)}, {"_id": 0, "memory": 1})
+    return doc.get("memory") if doc else None
+
+@mongo_timed
+def save_memory_snapshot(user_id: Any, snapshot: Dict[str, Any]) -> None:
+    """
+    Store the user's chat-memory snapshot (verbatim turns, pending turns and
+    running summary) next to their conversation turns.
+
+    Args:
+        user_id: The unique identifier for the user.
+        snapshot: The memory's to_dict() output.
+    """
+    coll = _ensure_collection(conversation_collection, "conversation_turns")
+    coll.update_one(
+        {"user_id": str(user_id)},
+        {"$set": {"memory": snapshot}},
+        upsert=True,
+    )
+
+def iter_all_conversation_turns() -> Iterator[Dict[str, Any]]:
+    """
+    Stream every stored turn across all users (offline jobs such as training
+    the learned router).
+
+    Yields:
+        dict: Each turn's `user_message` and `agents_used`.
+    """
+    coll = _ensure_collection(conversation_collection, "conversation_turns")
+    projection = {"_id": 0, "turns.user_message": 1, "turns.agents_used": 1}
+    for doc in coll.find({}, projection):
+        yield from doc.get("turns", [])
+
+@mongo_timed
 def delete_conversation_turn(user_id: Any, turn_id: str) -> bool:
     """
     Remove a specific conversation turn from a user's history by its ID.
@@ -85,9 +157,11 @@ def delete_conversation_turn(user_id: Any, turn_id: str) -> bool:
     coll = _ensure_collection(conversation_collection, "conversation_turns")
     uid = str(user_id)
     
-    # Pull the item from array where id == turn_id
+    # Pull the item from array where id == turn_id, and drop the memory
+    # snapshot so the deleted turn leaves the chat context too (it is
+    # rebuilt from the remaining turns on the next load).
     res = coll.update_one(
         {"user_id": uid},
-        {"$pull": {"turns": {"id": turn_id}}}
+        {"$pull": {"turns": {"id": turn_id}}, "$unset": {"memory": ""}}
     )
     return res.modified_count > 0
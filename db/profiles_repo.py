@@ -2,10 +2,21 @@
 """
 Data access for profiles.
 """
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List
 from db.client import profiles_collection, _ensure_collection
+from core.metrics import mongo_timed
 from db.users_repo import update_user_profile_complete
 
+# Callbacks run with the user id after each profile save (e.g. to drop
+# cached answers computed from the old profile).
+_profile_saved_hooks: List[Callable[[str], None]] = []
+
+
+def on_profile_saved(hook: Callable[[str], None]) -> None:
+    """Register `hook(user_id)` to run after every save_profile()."""
+    _profile_saved_hooks.append(hook)
+
+@mongo_timed
 def save_profile(user_id: Any, profile_data: Dict[str, Any]) -> None:
     """
     Create or update a health profile for the given user.
@@ -32,7 +43,14 @@ def save_profile(user_id: Any, profile_data: Dict[str, Any]) -> None:
     except Exception:
         pass
 
+    for hook in _profile_saved_hooks:
+        try:
+            hook(uid)
+        except Exception:
+            pass
+
 
+@mongo_timed
 def get_profile(user_id: Any) -> Dict[str, Any]:
     """
     Retrieve the health profile for a specific user.
@@ -5,7 +5,9 @@ Data access for users.
 from typing import Dict, Any, Optional
 from bson.objectid import ObjectId
 from db.client import users_collection, _ensure_collection
+from core.metrics import mongo_timed
 
+@mongo_timed
 def save_user(user_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Save a new user and return the full user record (including its id).
@@ -37,6 +39,7 @@ def save_user(user_data: Dict[str, Any]) -> Dict[str, Any]:
     return user_record
 
 
+@mongo_timed
 def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
     """
     Retrieve a user record by their email address.
@@ -63,6 +66,7 @@ def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
     return user
 
 
+@mongo_timed
 def get_user_by_id(user_id: Any) -> Optional[Dict[str, Any]]:
     """
     Retrieve a user record by their unique ID.
@@ -98,6 +102,7 @@ def get_user_by_id(user_id: Any) -> Optional[Dict[str, Any]]:
     return user
 
 
+@mongo_timed
 def update_user_profile_complete(user_id: Any, profile_complete: bool) -> bool:
     """
     Update a user's profile_complete status flag.
@@ -2,15 +2,34 @@
 Latency benchmark: measures end-to-end response time for the orchestrator
 by simulating what the WebSocket endpoint does.
 Does NOT require a live server - calls the same orchestrator code directly.
-Requires: GROQ_API_KEY and MONGODB_URI in a .env file or environment.
+Requires: GROQ_API_KEY and MONGODB_URI in a .env file or environment
+(--fake-llm swaps Groq for the offline fake model, so only Mongo is needed).
+
+Each turn's per-stage spans are aggregated into a p50/p95 table, so a
+latency regression can be attributed to the stage that caused it.
 
 Run: python latency_benchmark.py
+     python latency_benchmark.py --compare-routers   # learned router vs LLM supervisor
+     python latency_benchmark.py --tiers tiers.json  # compare model tier configs
+     python latency_benchmark.py --fake-llm          # offline, simulated LLM latency
+
+A tiers file maps a tier name to LLM_STAGE_SETTINGS for that run, e.g.
+  {"baseline": {},
+   "big-synth": {"synthesizer": {"model": "llama-3.3-70b-versatile"}}}
+Each tier runs in its own process (stage settings are read at import).
 """
 
+import argparse
+import json
+import math
+import subprocess
 import time
 import sys
 import os
 
+# Prefix of the machine-readable summary line a tier's child run prints.
+SUMMARY_PREFIX = "BENCHMARK_SUMMARY "
+
 # ---- Test queries covering all 4 domains ----
 TEST_QUERIES = [
     ("I have been having severe headaches for the past 3 days", "SymptomAgent"),
@@ -30,15 +49,72 @@ TEST_QUERIES = [
     ("My knees hurt when I climb stairs", "SymptomAgent"),
 ]
 
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+def run_turn(process_query_generator, user_id, query):
+    """Run one turn and return (response, agents_used, spans) from its final event."""
+    final = None
+    for event in process_query_generator(user_id, query):
+        if event["type"] == "final":
+            final = event
+    if final is None:
+        return "Error processing request", [], []
+    return final["response"], final["agents_used"], final.get("spans", [])
+
+def print_stage_table(turn_spans):
+    """
+    Print per-stage latency (count, p50, p95, max in ms) across all turns.
+
+    Agent spans are broken out per agent; speculative runs are listed apart
+    because their time overlaps routing.
+    """
+    by_stage = {}
+    for spans in turn_spans:
+        for span in spans:
+            if span.get("duration_ms") is None:
+                continue
+            label = span.get("agent", span["stage"])
+            if span.get("speculative"):
+                label += " (speculative)"
+            by_stage.setdefault(label, []).append(span["duration_ms"])
+
+    print(f"\nPer-stage latency (ms):")
+    print(f"  {'stage':32s} {'count':>5s} {'p50':>8s} {'p95':>8s} {'max':>8s}")
+    rows = sorted(by_stage.items(), key=lambda kv: percentile(kv[1], 95), reverse=True)
+    for label, durations in rows:
+        print(f"  {label:32s} {len(durations):5d} {percentile(durations, 50):8.0f} "
+              f"{percentile(durations, 95):8.0f} {max(durations):8.0f}")
+
+def stage_p50s(turn_spans):
+    """Median duration (ms) per LLM stage across all turns."""
+    by_stage = {}
+    for spans in turn_spans:
+        for span in spans:
+            if span.get("llm_calls") and span.get("duration_ms") is not None:
+                by_stage.setdefault(span.get("agent", span["stage"]), []).append(span["duration_ms"])
+    return {label: percentile(durations, 50) for label, durations in by_stage.items()}
+
 def run_benchmark():
+    """
+    Run TEST_QUERIES through the orchestrator and print the results.
+
+    Returns:
+        dict | None: Summary (latency percentiles, routing accuracy, LLM
+        stage medians), or None if nothing could run.
+    """
     try:
-        from orchestrator.orchestrator import process_query
+        from orchestrator.orchestrator import process_query_generator
     except Exception as e:
         print(f"[ERROR] Cannot import orchestrator: {e}")
         print("Make sure GROQ_API_KEY and MONGODB_URI are set and dependencies are installed.")
-        return
+        return None
 
     latencies = []
+    turn_spans = []
     routing_results = []
     correct_routes = 0
 
@@ -50,9 +126,10 @@ def run_benchmark():
         print(f"[{i:02d}/{len(TEST_QUERIES)}] Query: {query[:60]}...")
         t0 = time.perf_counter()
         try:
-            response, agents_used = process_query("benchmark_user_001", query)
+            response, agents_used, spans = run_turn(process_query_generator, "benchmark_user_001", query)
             elapsed = time.perf_counter() - t0
             latencies.append(elapsed)
+            turn_spans.append(spans)
             primary_agent = agents_used[0] if agents_used else "NONE"
             is_correct = primary_agent == expected_agent
             if is_correct:
@@ -93,13 +170,144 @@ def run_benchmark():
         print(f"Avg latency:        {avg:.2f}s")
         print(f"Min latency:        {mn:.2f}s")
         print(f"Max latency:        {mx:.2f}s")
+        print(f"P95 latency:        {percentile(latencies, 95):.2f}s")
         print(f"Routing accuracy:   {correct_routes}/{len(TEST_QUERIES)} = {accuracy:.1f}%")
-        print(f"\nDetailed routing table:")
-        for r in routing_results:
-            tick = "[OK]" if r["correct"] else "[FAIL]"
-            print(f"  {tick} [{r['latency_s']:5.2f}s] {r['expected']:15s} -> {r['got']:15s} | {r['query']}")
-    else:
-        print("[NO RESULTS] All queries failed. Cannot compute stats.")
+        print_routing_table("Detailed routing table", routing_results)
+        print_stage_table(turn_spans)
+        return {
+            "runs": len(latencies),
+            "avg_s": avg,
+            "p50_s": percentile(latencies, 50),
+            "p95_s": percentile(latencies, 95),
+            "accuracy": accuracy,
+            "stage_p50_ms": stage_p50s(turn_spans),
+        }
+    print("[NO RESULTS] All queries failed. Cannot compute stats.")
+    return None
+
+def run_tier_comparison(tiers_path):
+    """
+    Benchmark every tier in `tiers_path` and print them side by side.
+
+    Each tier runs this script in a child process with LLM_STAGE_SETTINGS
+    set to the tier's settings, so caches and clients start fresh per tier.
+    """
+    with open(tiers_path) as f:
+        tiers = json.load(f)
+
+    summaries = {}
+    for name, settings in tiers.items():
+        print(f"\n{'='*60}\nTier '{name}': {json.dumps(settings)}\n{'='*60}")
+        env = {**os.environ, "LLM_STAGE_SETTINGS": json.dumps(settings)}
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--summary-json"],
+            env=env, capture_output=True, text=True,
+        )
+        summary = None
+        for line in proc.stdout.splitlines():
+            if line.startswith(SUMMARY_PREFIX):
+                summary = json.loads(line[len(SUMMARY_PREFIX):])
+        if summary is None:
+            print(f"  [ERROR] tier '{name}' produced no results (exit {proc.returncode})")
+            print((proc.stdout + proc.stderr)[-2000:])
+            continue
+        summaries[name] = summary
+        print(f"  avg {summary['avg_s']:.2f}s, p95 {summary['p95_s']:.2f}s, accuracy {summary['accuracy']:.1f}%")
+
+    if not summaries:
+        return
+    print(f"\n{'='*60}\nTIER COMPARISON\n{'='*60}")
+    print(f"  {'tier':20s} {'runs':>4s} {'avg s':>7s} {'p50 s':>7s} {'p95 s':>7s} {'acc %':>6s}")
+    for name, s in summaries.items():
+        print(f"  {name:20s} {s['runs']:4d} {s['avg_s']:7.2f} {s['p50_s']:7.2f} {s['p95_s']:7.2f} {s['accuracy']:6.1f}")
+
+    stages = sorted({stage for s in summaries.values() for stage in s["stage_p50_ms"]})
+    print(f"\nLLM stage p50 (ms):")
+    print(f"  {'stage':20s} " + " ".join(f"{name[:12]:>12s}" for name in summaries))
+    for stage in stages:
+        cells = []
+        for s in summaries.values():
+            ms = s["stage_p50_ms"].get(stage)
+            cells.append(f"{ms:12.0f}" if ms is not None else f"{'-':>12s}")
+        print(f"  {stage:20s} " + " ".join(cells))
+
+def print_routing_table(title, routing_results):
+    """Print the per-query routing table shared by every benchmark mode."""
+    print(f"\n{title}:")
+    for r in routing_results:
+        tick = "[OK]" if r["correct"] else "[FAIL]"
+        print(f"  {tick} [{r['latency_s']:5.2f}s] {r['expected']:15s} -> {r['got']:15s} | {r['query']}")
+
+def run_router_comparison():
+    """
+    Compare the learned router with the LLM supervisor on TEST_QUERIES.
+
+    Only the routing decision is measured (no agents or synthesis run), so the
+    latency column is the cost of routing alone.
+    """
+    try:
+        from config import LEARNED_ROUTER_PATH
+        from orchestrator.learned_router import get_learned_router
+        from agents.supervisor_agent import supervisor
+    except Exception as e:
+        print(f"[ERROR] Cannot import routers: {e}")
+        return
+
+    learned = get_learned_router(LEARNED_ROUTER_PATH)
+    if learned is None:
+        print(f"[ERROR] No learned router at {LEARNED_ROUTER_PATH}. Train one with:")
+        print("        python -m orchestrator.learned_router")
+        return
+
+    def learned_route(query):
+        route, _ = learned.predict(query)
+        return route[0] if route else "FINISH"
+
+    def supervisor_route(query):
+        state = {"intent": {"is_wellness": True}, "conversation_history": "No previous conversation yet."}
+        return supervisor(query, None, state)
+
+    for name, route in (("Learned router", learned_route), ("LLM supervisor", supervisor_route)):
+        results = []
+        for query, expected_agent in TEST_QUERIES:
+            t0 = time.perf_counter()
+            try:
+                got = route(query)
+            except Exception as e:
+                got = "ERROR"
+                print(f"  [ERROR] {name}: {e}")
+            results.append({
+                "query": query[:60],
+                "expected": expected_agent,
+                "got": got,
+                "correct": got == expected_agent,
+                "latency_s": round(time.perf_counter() - t0, 2)
+            })
+        correct = sum(r["correct"] for r in results)
+        avg = sum(r["latency_s"] for r in results) / len(results)
+        print(f"\n{'='*60}")
+        print(f"{name}: accuracy {correct}/{len(results)} = {100 * correct / len(results):.1f}%, avg routing latency {avg:.2f}s")
+        print_routing_table(f"{name} routing table", results)
 
 if __name__ == "__main__":
-    run_benchmark()
+    parser = argparse.ArgumentParser(description="Orchestrator latency benchmark.")
+    parser.add_argument("--compare-routers", action="store_true",
+                        help="compare the learned router against the LLM supervisor")
+    parser.add_argument("--tiers", metavar="TIERS_JSON",
+                        help="compare model tier configurations (tier name -> LLM_STAGE_SETTINGS)")
+    parser.add_argument("--fake-llm", action="store_true",
+                        help="use the offline fake LLM (LLM_BACKEND=fake; see FAKE_LLM_* in config.py)")
+    parser.add_argument("--summary-json", action="store_true",
+                        help=argparse.SUPPRESS)  # used by --tiers child runs
+    args = parser.parse_args()
+    if args.fake_llm:
+        # Set before config is imported; --tiers child runs inherit it.
+        os.environ["LLM_BACKEND"] = "fake"
+    if args.compare_routers:
+        run_router_comparison()
+    elif args.tiers:
+        run_tier_comparison(args.tiers)
+    else:
+        summary = run_benchmark()
+        if args.summary_json and summary is not None:
+            print(SUMMARY_PREFIX + json.dumps(summary))
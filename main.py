@@ -2,14 +2,17 @@
 """
 FastAPI application entry point.
 
-Initializes the FastAPI application, configures CORS middleware, registers
-all routing endpoints, and provides basic root/health-check endpoints.
+Initializes the FastAPI application, configures CORS and request-timing
+middleware, registers all routing endpoints, and provides basic
+root/health-check endpoints plus Prometheus /metrics.
 Also serves as the launch script for the uvicorn development server.
 """
 import os
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from routers import auth, profile, chat, history, agent_stream, upload, google_auth
+from core.metrics import HTTP_REQUEST_SECONDS, render_latest
 
 app = FastAPI()
 
@@ -29,6 +32,26 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """
+    Observe each HTTP request's latency under its route template.
+
+    Labels use the matched path template (e.g. /history/{user_id}), never the
+    raw URL, so the number of series stays bounded.
+    """
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(
+            request.method, getattr(route, "path", "unmatched"), str(status)
+        ).observe(time.perf_counter() - t0)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(profile.router)
@@ -62,6 +85,19 @@ def health_check():
     """
     return {"status": "healthy", "jwt_configured": True}
 
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus scrape endpoint.
+
+    Route: GET /metrics
+
+    Returns:
+        Response: All metrics from core/metrics.py in the text exposition format.
+    """
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
     import uvicorn
     # The port must be dynamic for Render (os.getenv("PORT"))
@@ -0,0 +1,90 @@
+# backend/orchestrator/budget.py
+"""
+Per-turn latency budget.
+
+A TurnBudget turns a deadline (seconds from the start of the turn) into the
+decisions the orchestrator makes as time runs out: whether another
+supervisor call or agent wave still fits, how long a stage may wait, and
+whether the Synthesizer LLM is still affordable. Every shortcut taken is
+recorded as a degradation code that the final event reports.
+"""
+import asyncio
+import math
+import time
+from typing import Awaitable, List, Optional
+
+from core.metrics import DEGRADATIONS
+
+
+class TurnBudget:
+    """
+    Deadline bookkeeping for one turn. With no deadline every check passes
+    and every timeout is None, so callers needn't special-case it.
+
+    Args:
+        deadline_s: Seconds the whole turn may take (0/None disables).
+        synthesis_reserve_s: Time kept back for the Synthesizer LLM; routing
+            and agents only get what is left above it.
+        min_step_s: Least time worth starting a supervisor call or an agent
+            wave with; below it the remaining steps are skipped.
+    """
+
+    def __init__(self, deadline_s: Optional[float], synthesis_reserve_s: float, min_step_s: float):
+        self.started = time.perf_counter()
+        self.deadline_s = deadline_s if deadline_s and deadline_s > 0 else None
+        self.synthesis_reserve_s = synthesis_reserve_s
+        self.min_step_s = min_step_s
+        self.degradations: List[str] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.deadline_s is not None
+
+    def remaining(self) -> float:
+        """Seconds until the deadline (infinite when disabled)."""
+        if self.deadline_s is None:
+            return math.inf
+        return self.deadline_s - (time.perf_counter() - self.started)
+
+    def routing_time(self) -> float:
+        """Seconds available for routing and agents before synthesis."""
+        return self.remaining() - self.synthesis_reserve_s
+
+    def can_route(self) -> bool:
+        """True if another supervisor call or agent wave still fits."""
+        return self.routing_time() >= self.min_step_s
+
+    def can_synthesize(self) -> bool:
+        """
+        True if the Synthesizer LLM still fits in the budget.
+
+        The reserve belongs to synthesis once routing stops. A routing stage
+        that timed out ends right at the reserve, and the bookkeeping after
+        it eats a few milliseconds more, so up to `min_step_s` of slack is
+        allowed rather than giving up the reserve the turn kept for this.
+        """
+        return self.remaining() >= self.synthesis_reserve_s - self.min_step_s
+
+    def timeout(self, for_routing: bool = True) -> Optional[float]:
+        """asyncio timeout for the next stage (None when disabled)."""
+        if self.deadline_s is None:
+            return None
+        return max(self.routing_time() if for_routing else self.remaining(), 0.0)
+
+    async def wait_for(self, awaitable: Awaitable, for_routing: bool = True):
+        """
+        Await `awaitable` within the stage timeout.
+
+        Raises:
+            asyncio.TimeoutError: if the budget runs out first (the awaitable
+                is cancelled).
+        """
+        if self.deadline_s is None:
+            return await awaitable
+        return await asyncio.wait_for(awaitable, self.timeout(for_routing))
+
+    def degrade(self, code: str):
+        """Record a degradation (e.g. "agent_skipped:DietAgent") once."""
+        if code not in self.degradations:
+            self.degradations.append(code)
+            DEGRADATIONS.labels(code.split(":", 1)[0]).inc()
@@ -0,0 +1,121 @@
+# backend/orchestrator/coalescing.py
+"""
+Singleflight coalescing of identical in-flight turns.
+
+Frontend retries, double-clicks and a second open tab often send the same
+message for the same user while the first copy is still running. Instead
+of orchestrating (and persisting) each copy, the first request becomes the
+leader: its event stream runs in a task whose events are buffered, and
+every identical request that arrives before it finishes attaches as a
+follower, replaying the buffer and then receiving new events as they come.
+The turn is cancelled only once every subscriber has gone away.
+"""
+import asyncio
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, Dict, Hashable, List, Optional
+
+from core.metrics import TURNS_COALESCED
+
+
+class _Flight:
+    """One shared event stream: a pump task plus the events seen so far."""
+
+    def __init__(self, source: AsyncIterator[dict]):
+        self.events: List[dict] = []
+        self.error: Optional[BaseException] = None
+        self.done = False
+        # Set once the last subscriber has left; new requests start afresh.
+        self.abandoned = False
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    def _wake(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _pump(self, source: AsyncIterator[dict]):
+        # Nobody awaits this task, so failures are handed to the subscribers
+        # instead of being raised here.
+        try:
+            async with aclosing(source) as events:
+                async for event in events:
+                    self.events.append(event)
+                    self._wake()
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._wake()
+
+    def leave(self):
+        """Drop one subscriber; the last one to go cancels an unfinished stream."""
+        self.subscribers -= 1
+        if self.subscribers == 0 and not self.done:
+            self.abandoned = True
+            self.task.cancel()
+
+    async def subscribe(self, follower: bool) -> AsyncIterator[dict]:
+        seen = 0
+        while True:
+            while seen < len(self.events):
+                event = self.events[seen]
+                seen += 1
+                if follower and event["type"] == "final":
+                    event = {**event, "coalesced": True}
+                yield event
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class Singleflight:
+    """
+    Registry of in-flight event streams, keyed per event loop (the sync
+    bridge and the ASGI server each run their own).
+    """
+
+    def __init__(self):
+        self._flights: Dict[tuple, _Flight] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def stream(self, key: Hashable, start: Callable[[], AsyncIterator[dict]]) -> AsyncIterator[dict]:
+        """
+        Yield the events of the in-flight stream for `key`, starting one
+        with `start()` if there is none. Followers' final events carry
+        "coalesced": True.
+
+        Raises:
+            Whatever the shared stream raised, in every subscriber.
+        """
+        flight_key = (asyncio.get_running_loop(), key)
+        flight = self._flights.get(flight_key)
+        follower = flight is not None and not flight.done and not flight.abandoned
+        if follower:
+            self.followers += 1
+            TURNS_COALESCED.inc()
+        else:
+            flight = _Flight(start())
+            self._flights[flight_key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(flight_key, flight))
+            self.leaders += 1
+
+        # Registered before anything can be awaited, and released however the
+        # subscriber leaves, even if it is cancelled before the first event.
+        flight.subscribers += 1
+        try:
+            async with aclosing(flight.subscribe(follower)) as events:
+                async for event in events:
+                    yield event
+        finally:
+            flight.leave()
+
+    def _forget(self, flight_key: tuple, flight: _Flight):
+        if self._flights.get(flight_key) is flight:
+            del self._flights[flight_key]
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._flights), "leaders": self.leaders, "followers": self.followers}
@@ -0,0 +1,217 @@
+# backend/orchestrator/learned_router.py
+"""
+Local routing model trained from stored conversation turns.
+
+Every turn in `conversation_turns` records `user_message` and `agents_used`,
+which is labelled routing data. This module fits a small TF-IDF + softmax
+(multinomial logistic regression) classifier over those turns, predicting the
+whole ordered agent route for a message on the CPU. The orchestrator uses it
+in ROUTING_MODE=learned and falls back to the LLM supervisor when confidence
+is low.
+
+Train offline with:
+    python -m orchestrator.learned_router --out models/learned_router.json
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+KNOWN_AGENTS = ("SymptomAgent", "DietAgent", "FitnessAgent", "LifestyleAgent")
+_ROUTE_SEP = ">"
+_TOKEN = re.compile(r"[a-z0-9/]+")
+
+
+def _features(text: str) -> List[str]:
+    """Lowercased unigrams plus adjacent bigrams."""
+    words = _TOKEN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def route_label(agents_used: Iterable[str]) -> str:
+    """Encode an ordered route as a single class label (unknown names dropped)."""
+    return _ROUTE_SEP.join(a for a in dict.fromkeys(agents_used) if a in KNOWN_AGENTS)
+
+
+class LearnedRouter:
+    """TF-IDF features feeding a multinomial logistic regression over routes."""
+
+    def __init__(self, idf: Dict[str, float], labels: List[str], weights: List[Dict[str, float]], bias: List[float]):
+        self.idf = idf
+        self.labels = labels
+        self.weights = weights
+        self.bias = bias
+
+    # ---- features -------------------------------------------------------
+
+    def _vectorize(self, text: str) -> Dict[str, float]:
+        """L2-normalised TF-IDF vector restricted to the training vocabulary."""
+        counts = Counter(f for f in _features(text) if f in self.idf)
+        vec = {f: (1 + math.log(c)) * self.idf[f] for f, c in counts.items()}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        return {f: v / norm for f, v in vec.items()}
+
+    def _probabilities(self, vec: Dict[str, float]) -> List[float]:
+        logits = [
+            b + sum(w.get(f, 0.0) * v for f, v in vec.items())
+            for w, b in zip(self.weights, self.bias)
+        ]
+        top = max(logits)
+        exps = [math.exp(z - top) for z in logits]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    # ---- training -------------------------------------------------------
+
+    @classmethod
+    def fit(
+        cls,
+        messages: List[str],
+        labels: List[str],
+        epochs: int = 30,
+        learning_rate: float = 0.5,
+        l2: float = 1e-4,
+        seed: int = 13,
+    ) -> "LearnedRouter":
+        """
+        Fit the router with plain SGD on the cross-entropy loss.
+
+        Args:
+            messages: Raw user messages.
+            labels: Route labels (see route_label), aligned with `messages`.
+            epochs: Passes over the data.
+            learning_rate: SGD step size.
+            l2: L2 penalty applied to touched weights.
+            seed: Shuffle seed, for reproducible models.
+
+        Returns:
+            LearnedRouter: The trained model.
+        """
+        doc_freq = Counter(f for m in messages for f in set(_features(m)))
+        n_docs = len(messages)
+        idf = {f: math.log((1 + n_docs) / (1 + df)) + 1.0 for f, df in doc_freq.items()}
+
+        label_names = sorted(set(labels))
+        router = cls(idf, label_names, [{} for _ in label_names], [0.0] * len(label_names))
+        index = {name: i for i, name in enumerate(label_names)}
+        samples = [(router._vectorize(m), index[l]) for m, l in zip(messages, labels)]
+
+        rng = random.Random(seed)
+        for _ in range(epochs):
+            rng.shuffle(samples)
+            for vec, target in samples:
+                probs = router._probabilities(vec)
+                for k, p in enumerate(probs):
+                    grad = p - (1.0 if k == target else 0.0)
+                    weights = router.weights[k]
+                    for f, v in vec.items():
+                        w = weights.get(f, 0.0)
+                        weights[f] = w - learning_rate * (grad * v + l2 * w)
+                    router.bias[k] -= learning_rate * grad
+        return router
+
+    # ---- inference ------------------------------------------------------
+
+    def predict(self, message: str) -> Tuple[List[str], float]:
+        """
+        Predict the agent route for a message.
+
+        Returns:
+            tuple: (ordered agent names, probability of that route).
+        """
+        probs = self._probabilities(self._vectorize(message))
+        best = max(range(len(probs)), key=probs.__getitem__)
+        label = self.labels[best]
+        return (label.split(_ROUTE_SEP) if label else []), probs[best]
+
+    # ---- persistence ----------------------------------------------------
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Drop near-zero weights; they make up most of the model on disk.
+        weights = [{f: round(w, 5) for f, w in ws.items() if abs(w) > 1e-4} for ws in self.weights]
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"idf": self.idf, "labels": self.labels, "weights": weights, "bias": self.bias}, fh)
+
+    @classmethod
+    def load(cls, path: str) -> "LearnedRouter":
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        return cls(data["idf"], data["labels"], data["weights"], data["bias"])
+
+
+_loaded: Dict[str, Optional[LearnedRouter]] = {}
+
+
+def get_learned_router(path: str) -> Optional[LearnedRouter]:
+    """
+    Load (once per path) the trained router.
+
+    Returns:
+        LearnedRouter | None: None if no model file exists or it can't be
+        read, in which case callers should route with the supervisor.
+    """
+    if path not in _loaded:
+        try:
+            _loaded[path] = LearnedRouter.load(path)
+            logger.info(f"Learned router loaded from {path} ({len(_loaded[path].labels)} routes)")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Learned router unavailable at {path}: {e}")
+            _loaded[path] = None
+    return _loaded[path]
+
+
+def build_training_set(turns: Iterable[dict], min_count: int = 3) -> Tuple[List[str], List[str]]:
+    """
+    Turn stored conversation turns into (messages, labels).
+
+    Turns without specialist agents (off-topic replies, immediate FINISH) carry
+    no routing signal and are skipped, as are routes seen fewer than
+    `min_count` times.
+    """
+    pairs = []
+    for turn in turns:
+        label = route_label(turn.get("agents_used") or [])
+        message = (turn.get("user_message") or "").strip()
+        if label and message:
+            pairs.append((message, label))
+
+    counts = Counter(label for _, label in pairs)
+    pairs = [(m, l) for m, l in pairs if counts[l] >= min_count]
+    return [m for m, _ in pairs], [l for _, l in pairs]
+
+
+def main():
+    """CLI entry point: train from MongoDB and write the model file."""
+    from config import LEARNED_ROUTER_PATH
+    from db.conversations_repo import iter_all_conversation_turns
+
+    parser = argparse.ArgumentParser(description="Train the local routing model from conversation_turns.")
+    parser.add_argument("--out", default=LEARNED_ROUTER_PATH, help="where to write the model JSON")
+    parser.add_argument("--min-count", type=int, default=3, help="drop routes seen fewer times than this")
+    parser.add_argument("--epochs", type=int, default=30)
+    args = parser.parse_args()
+
+    messages, labels = build_training_set(iter_all_conversation_turns(), args.min_count)
+    if len(set(labels)) < 2:
+        print(f"[ERROR] Need at least two distinct routes to train, found {len(set(labels))} in {len(labels)} turns.")
+        return
+
+    router = LearnedRouter.fit(messages, labels, epochs=args.epochs)
+    correct = sum(router.predict(m)[0] == l.split(_ROUTE_SEP) for m, l in zip(messages, labels))
+    router.save(args.out)
+    print(f"Trained on {len(messages)} turns, {len(router.labels)} routes.")
+    print(f"Training accuracy: {correct}/{len(messages)} = {100 * correct / len(messages):.1f}%")
+    print(f"Model written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
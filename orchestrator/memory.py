@@ -0,0 +1,227 @@
+# backend/orchestrator/memory.py
+"""
+Short-term chat memory for the orchestrator.
+
+Provides the ConversationBufferMemory drop-in (one per user), the
+SummarizingMemory variant that folds older turns into a running summary, and
+the bounded MemoryStore that owns them: least-recently-used eviction past a
+user cap, idle-TTL eviction, a per-user cap on turns and characters, and
+size/eviction stats. Evicted users simply start again from "No previous
+conversation yet.".
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional
+
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+EMPTY_HISTORY = "No previous conversation yet."
+
+
+class ConversationBufferMemory:
+    """Lightweight drop-in for langchain ConversationBufferMemory (removed in 0.3.x).
+    Implements the same save_context / load_memory_variables interface used by the orchestrator.
+    Keeps at most `max_turns` exchanges and `max_chars` characters, dropping
+    the oldest exchanges first (0 disables a cap).
+    """
+    def __init__(self, return_messages: bool = False, max_turns: int = 0, max_chars: int = 0):
+        self._history: list[str] = []
+        self.max_turns = max_turns
+        self.max_chars = max_chars
+        self.size_bytes = 0
+
+    def save_context(self, inputs: dict, outputs: dict):
+        human = inputs.get("input", "")
+        ai = outputs.get("output", "")
+        self._append(f"Human: {human}", f"AI: {ai}")
+
+    def _append(self, *lines: str):
+        for line in lines:
+            self._history.append(line)
+            self.size_bytes += len(line.encode("utf-8"))
+        self._trim()
+
+    def _trim(self):
+        # Drop whole exchanges (Human + AI lines) so the history never starts
+        # mid-turn; always keep the latest exchange even if it alone is over.
+        def over() -> bool:
+            if self.max_turns and len(self._history) > 2 * self.max_turns:
+                return True
+            chars = sum(len(line) for line in self._history)
+            return bool(self.max_chars) and chars > self.max_chars
+
+        while len(self._history) > 2 and over():
+            for line in self._history[:2]:
+                self.size_bytes -= len(line.encode("utf-8"))
+            del self._history[:2]
+
+    def load_memory_variables(self, _inputs: dict) -> dict:
+        history = "\n".join(self._history) if self._history else EMPTY_HISTORY
+        return {"history": history}
+
+    def recent_lines(self, turns: Optional[int] = None) -> List[str]:
+        """The last `turns` verbatim exchanges (Human and AI lines); all of them if None."""
+        if turns is None:
+            return list(self._history)
+        return self._history[-2 * turns:] if turns > 0 else []
+
+    def to_dict(self) -> dict:
+        """Serializable snapshot, for backends that store memory out of process."""
+        return {"history": list(self._history)}
+
+    def restore(self, data: dict):
+        """Load a to_dict() snapshot into this (empty) memory, applying its caps."""
+        self._append(*data.get("history", []))
+
+
+class SummarizingMemory(ConversationBufferMemory):
+    """
+    Memory that keeps the last `keep_turns` exchanges verbatim and folds older
+    ones into a running summary, so prompt size stays bounded however long
+    the conversation gets.
+
+    Exchanges pushed out of the verbatim window wait in `_pending` (still shown
+    verbatim) until acompact() folds them into the summary, typically in the
+    background after the turn. If summarization falls behind or fails, pending
+    exchanges beyond `keep_turns` are dropped rather than growing the prompt.
+    """
+    def __init__(self, keep_turns: int = 4, summary_max_chars: int = 1500, **kwargs):
+        super().__init__(**kwargs)
+        self.keep_turns = max(keep_turns, 1)
+        self.summary_max_chars = summary_max_chars
+        self.summary = ""
+        self._pending: List[str] = []
+        self._compacting = False
+
+    def _trim(self):
+        while len(self._history) > 2 * self.keep_turns:
+            self._pending.extend(self._history[:2])
+            del self._history[:2]
+        # acompact() removes exactly the lines it folded from the front, so
+        # the backlog is only shortened while no compaction is running.
+        if not self._compacting:
+            while len(self._pending) > 2 * self.keep_turns:
+                del self._pending[:2]
+        self.size_bytes = len(self.summary.encode("utf-8")) + sum(
+            len(line.encode("utf-8")) for line in self._pending + self._history
+        )
+
+    def to_dict(self) -> dict:
+        return {"history": list(self._history), "pending": list(self._pending), "summary": self.summary}
+
+    def restore(self, data: dict):
+        self.summary = data.get("summary", "")
+        self._pending = list(data.get("pending", []))
+        self._append(*data.get("history", []))
+
+    @property
+    def needs_compaction(self) -> bool:
+        return bool(self._pending) and not self._compacting
+
+    def load_memory_variables(self, _inputs: dict) -> dict:
+        lines = []
+        if self.summary:
+            lines.append(f"Summary of earlier conversation: {self.summary}")
+        lines.extend(self._pending)
+        lines.extend(self._history)
+        return {"history": "\n".join(lines) if lines else EMPTY_HISTORY}
+
+    async def acompact(self, summarize: Callable[[str, List[str]], Awaitable[str]]):
+        """
+        Fold pending exchanges into the summary.
+
+        Args:
+            summarize: Coroutine taking (previous summary, new history lines)
+                and returning the updated summary text.
+        """
+        if not self.needs_compaction:
+            return
+        self._compacting = True
+        batch = list(self._pending)
+        try:
+            summary = await summarize(self.summary, batch)
+        except Exception as e:
+            logger.error(f"Memory summarization failed, keeping raw turns: {e}")
+            return
+        finally:
+            self._compacting = False
+        self.summary = summary.strip()[: self.summary_max_chars]
+        del self._pending[: len(batch)]
+        self._trim()
+
+
+class MemoryStore:
+    """
+    Bounded per-user memory registry.
+
+    Entries are kept in least-recently-used order. Each access first sweeps
+    entries idle for longer than `idle_ttl_s` (cheap: they sit at the front),
+    then evicts from the front while more than `max_users` remain. On a miss
+    `factory(user_id)` builds the memory outside the lock, so a slow factory
+    (e.g. one that rehydrates from Mongo) doesn't block other users.
+    """
+
+    def __init__(self, factory: Callable[[str], ConversationBufferMemory], max_users: int = 0, idle_ttl_s: float = 0):
+        self._factory = factory
+        self.max_users = max_users
+        self.idle_ttl_s = idle_ttl_s
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # user_id -> (memory, last_access)
+        self._lock = threading.Lock()
+        self.lru_evictions = 0
+        self.ttl_evictions = 0
+
+    def _sweep(self, now: float):
+        if self.idle_ttl_s:
+            while self._entries:
+                _, (_, last_access) = next(iter(self._entries.items()))
+                if now - last_access <= self.idle_ttl_s:
+                    break
+                self._entries.popitem(last=False)
+                self.ttl_evictions += 1
+        if self.max_users:
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+                self.lru_evictions += 1
+
+    def get(self, user_id: str) -> ConversationBufferMemory:
+        """Return this user's memory, creating it (and evicting others) as needed."""
+        with self._lock:
+            entry = self._entries.pop(user_id, None)
+            if entry is not None:
+                now = time.monotonic()
+                self._entries[user_id] = (entry[0], now)
+                self._sweep(now)
+                return entry[0]
+
+        memory = self._factory(user_id)
+        with self._lock:
+            # Another caller may have built it meanwhile; keep the first one.
+            entry = self._entries.pop(user_id, None)
+            memory = entry[0] if entry else memory
+            now = time.monotonic()
+            self._entries[user_id] = (memory, now)
+            self._sweep(now)
+            return memory
+
+    def peek(self, user_id: str) -> Optional[ConversationBufferMemory]:
+        """Return the cached memory without creating it or refreshing its age."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            return entry[0] if entry else None
+
+    def discard(self, user_id: str):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._sweep(time.monotonic())
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(memory.size_bytes for memory, _ in self._entries.values()),
+                "lru_evictions": self.lru_evictions,
+                "ttl_evictions": self.ttl_evictions,
+            }
@@ -0,0 +1,220 @@
+# backend/orchestrator/memory_backends.py
+"""
+Pluggable storage for per-user chat memory.
+
+A MemoryBackend hands the orchestrator a user's memory object at the start of
+a turn (load) and persists it after the turn (save). Three implementations:
+in-process (bounded MemoryStore), Mongo-backed (a snapshot on the user's
+`conversation_turns` document, so all workers agree) and Redis-style (JSON
+snapshot per user with a TTL). Whenever nothing is cached, memory is lazily
+rehydrated from the last N stored turns, so restarts, cold starts and extra
+workers don't lose a user's context. A backend that can't be reached hands
+out empty memory rather than failing the turn.
+"""
+import json
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+
+from core.logging_config import get_logger
+from orchestrator.memory import ConversationBufferMemory, MemoryStore
+
+logger = get_logger(__name__)
+
+# (user_id) -> stored turns, oldest first, each with user_message/assistant_response
+TurnLoader = Callable[[str], List[dict]]
+# (user_id) -> the memory's last saved to_dict() snapshot, or None
+SnapshotLoader = Callable[[str], Optional[Dict]]
+# (user_id, snapshot) -> None
+SnapshotSaver = Callable[[str, Dict], None]
+
+
+def rehydrate(memory: ConversationBufferMemory, turns: List[dict]) -> ConversationBufferMemory:
+    """Replay stored turns into an empty memory (its caps still apply)."""
+    for turn in turns:
+        memory.save_context(
+            {"input": turn.get("user_message", "")},
+            {"output": turn.get("assistant_response", "")},
+        )
+    return memory
+
+
+class MemoryBackend(ABC):
+    """
+    Interface for chat-memory storage. Methods may block (network I/O); the
+    orchestrator calls them from worker threads.
+    """
+
+    @abstractmethod
+    def load(self, user_id: str) -> ConversationBufferMemory:
+        """Return this user's memory for the coming turn."""
+
+    @abstractmethod
+    def save(self, user_id: str, memory: ConversationBufferMemory) -> None:
+        """Persist the memory after a turn (or a compaction)."""
+
+    def stats(self) -> dict:
+        return {}
+
+
+class InProcessMemoryBackend(MemoryBackend):
+    """Memory lives in this worker's bounded MemoryStore; misses rehydrate."""
+
+    def __init__(self, factory: Callable[[], ConversationBufferMemory], load_turns: Optional[TurnLoader] = None,
+                 max_users: int = 0, idle_ttl_s: float = 0):
+        self._factory = factory
+        self._load_turns = load_turns
+        self.rehydrations = 0
+        self.store = MemoryStore(self._build, max_users=max_users, idle_ttl_s=idle_ttl_s)
+
+    def _build(self, user_id: str) -> ConversationBufferMemory:
+        memory = self._factory()
+        if self._load_turns is None:
+            return memory
+        try:
+            turns = self._load_turns(user_id)
+        except Exception as e:
+            logger.error(f"Memory rehydration failed for {user_id}: {e}")
+            return memory
+        self.rehydrations += bool(turns)
+        return rehydrate(memory, turns)
+
+    def load(self, user_id: str) -> ConversationBufferMemory:
+        return self.store.get(user_id)
+
+    def save(self, user_id: str, memory: ConversationBufferMemory) -> None:
+        # The store already holds this very object.
+        pass
+
+    def stats(self) -> dict:
+        return {**self.store.stats(), "rehydrations": self.rehydrations}
+
+
+class MongoMemoryBackend(MemoryBackend):
+    """
+    Stores each user's memory snapshot (verbatim turns, turns awaiting
+    summarization and the running summary) in Mongo via `load_snapshot` /
+    `save_snapshot`.
+
+    Every worker therefore sees the same context, and a summary is computed
+    once and reused instead of being rebuilt from raw turns on every load.
+    Users without a snapshot are rehydrated from the last N stored turns.
+    """
+
+    def __init__(self, factory: Callable[[], ConversationBufferMemory], load_turns: Optional[TurnLoader],
+                 load_snapshot: SnapshotLoader, save_snapshot: SnapshotSaver):
+        self._factory = factory
+        self._load_turns = load_turns
+        self._load_snapshot = load_snapshot
+        self._save_snapshot = save_snapshot
+        self.loads = 0
+        self.rehydrations = 0
+        self.errors = 0
+
+    def load(self, user_id: str) -> ConversationBufferMemory:
+        self.loads += 1
+        memory = self._factory()
+        try:
+            snapshot = self._load_snapshot(user_id)
+            if snapshot is not None:
+                memory.restore(snapshot)
+            elif self._load_turns is not None:
+                turns = self._load_turns(user_id)
+                self.rehydrations += bool(turns)
+                rehydrate(memory, turns)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Memory load failed for {user_id}, starting empty: {e}")
+            return self._factory()
+        return memory
+
+    def save(self, user_id: str, memory: ConversationBufferMemory) -> None:
+        try:
+            self._save_snapshot(user_id, memory.to_dict())
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Memory save failed for {user_id}: {e}")
+
+    def stats(self) -> dict:
+        return {"loads": self.loads, "rehydrations": self.rehydrations, "errors": self.errors}
+
+
+class RedisMemoryBackend(MemoryBackend):
+    """
+    Stores each user's memory snapshot as JSON under `chat_memory:<user_id>`.
+
+    `client` needs only `get(key)` and `set(key, value, ex=seconds)`, the
+    redis-py API, so a local stand-in with the same two methods works for
+    tests. A missing key rehydrates from Mongo and is written back.
+    """
+
+    KEY_PREFIX = "chat_memory:"
+
+    def __init__(self, client, factory: Callable[[], ConversationBufferMemory],
+                 load_turns: Optional[TurnLoader] = None, ttl_s: int = 0):
+        self._client = client
+        self._factory = factory
+        self._load_turns = load_turns
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.KEY_PREFIX}{user_id}"
+
+    def load(self, user_id: str) -> ConversationBufferMemory:
+        memory = self._factory()
+        try:
+            raw = self._client.get(self._key(user_id))
+            if raw is not None:
+                self.hits += 1
+                memory.restore(json.loads(raw))
+                return memory
+
+            self.misses += 1
+            if self._load_turns is not None:
+                rehydrate(memory, self._load_turns(user_id))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Memory load failed for {user_id}, starting empty: {e}")
+            return self._factory()
+        if self._load_turns is not None:
+            self.save(user_id, memory)
+        return memory
+
+    def save(self, user_id: str, memory: ConversationBufferMemory) -> None:
+        try:
+            self._client.set(self._key(user_id), json.dumps(memory.to_dict()), ex=self.ttl_s or None)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Memory save failed for {user_id}: {e}")
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+def build_memory_backend(kind: str, factory: Callable[[], ConversationBufferMemory],
+                         load_turns: Optional[TurnLoader], *, max_users: int = 0, idle_ttl_s: float = 0,
+                         redis_url: Optional[str] = None, redis_ttl_s: int = 0,
+                         load_snapshot: Optional[SnapshotLoader] = None,
+                         save_snapshot: Optional[SnapshotSaver] = None) -> MemoryBackend:
+    """
+    Construct the backend named by MEMORY_BACKEND ("inprocess", "mongo", "redis").
+
+    Raises:
+        RuntimeError: if "redis" is selected without the redis package or a
+            URL, or "mongo" without snapshot load/save functions.
+    """
+    if kind == "mongo":
+        if load_snapshot is None or save_snapshot is None:
+            raise RuntimeError("MEMORY_BACKEND=mongo requires snapshot load/save functions")
+        return MongoMemoryBackend(factory, load_turns, load_snapshot, save_snapshot)
+    if kind == "redis":
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("MEMORY_BACKEND=redis requires the 'redis' package") from e
+        if not redis_url:
+            raise RuntimeError("MEMORY_BACKEND=redis requires REDIS_URL")
+        return RedisMemoryBackend(redis.Redis.from_url(redis_url), factory, load_turns, ttl_s=redis_ttl_s)
+    return InProcessMemoryBackend(factory, load_turns, max_users=max_users, idle_ttl_s=idle_ttl_s)
@@ -4,37 +4,70 @@ Core control loop for the multi-agent orchestration.
 
 Maintains conversation memory, classifies user intent, and repeatedly invokes
 the supervisor agent to route the query to specialist agents. Results are
-finally synthesized into a Markdown report and logged.
+finally synthesized into a Markdown report and logged. The pipeline is
+natively async (aprocess_query_generator); blocking wrappers are kept for
+REST callers.
 """
 
-from typing import Dict
-class ConversationBufferMemory:
-    """Lightweight drop-in for langchain ConversationBufferMemory (removed in 0.3.x).
-    Implements the same save_context / load_memory_variables interface used by the orchestrator.
-    """
-    def __init__(self, return_messages: bool = False):
-        self._history: list[str] = []
-
-    def save_context(self, inputs: dict, outputs: dict):
-        human = inputs.get("input", "")
-        ai = outputs.get("output", "")
-        self._history.append(f"Human: {human}")
-        self._history.append(f"AI: {ai}")
-
-    def load_memory_variables(self, _inputs: dict) -> dict:
-        history = "\n".join(self._history) if self._history else "No previous conversation yet."
-        return {"history": history}
+import asyncio
+import threading
+from contextlib import aclosing
+from typing import Optional
 
-from agents.intention_classifier import classify_intent
-from agents.supervisor_agent import supervisor
+from agents.intention_classifier import classify_intent, aclassify_intent
+from agents.supervisor_agent import supervisor, asupervisor, asupervisor_group, aplan_route
 from agents.symptom_agent import run_symptom_agent
 from agents.diet_agent import run_diet_agent
 from agents.fitness_agent import run_fitness_agent
 from agents.lifestyle_agent import run_lifestyle_agent
-from agents.output_synthesizer import synthesize_output
-from db.profiles_repo import get_profile
-from db.conversations_repo import append_conversation_turn
+from agents.output_synthesizer import synthesize_output, astream_synthesis
+from agents.template_synthesizer import can_format, format_report
+from agents.memory_summarizer import asummarize_history
+from db.profiles_repo import get_profile, on_profile_saved
+from db.conversations_repo import (
+    append_conversation_turn,
+    get_recent_conversation_turns,
+    get_memory_snapshot,
+    save_memory_snapshot,
+)
+from orchestrator.scheduler import AGENT_STEPS, run_agent_group, speculate, discard_speculation
+from orchestrator.learned_router import get_learned_router
+from orchestrator.memory import ConversationBufferMemory, SummarizingMemory
+from orchestrator.memory_backends import build_memory_backend
+from orchestrator.tracing import TurnTrace
+from orchestrator.budget import TurnBudget
+from orchestrator.response_cache import CachedTurn, ResponseCache, cache_context, cache_key, normalize_message
+from orchestrator.coalescing import Singleflight
 from core.logging_config import get_logger
+from core.metrics import SUPERVISOR_STEPS, TURNS_CANCELLED, LLM_CALLS_SAVED, RESPONSE_CACHE_LOOKUPS, record_routing
+from config import (
+    PARALLEL_AGENTS,
+    ROUTING_MODE,
+    LEARNED_ROUTER_PATH,
+    LEARNED_ROUTER_MIN_CONFIDENCE,
+    SPECULATIVE_SYMPTOM_AGENT,
+    TEMPLATE_SYNTHESIS,
+    TEMPLATE_SYNTHESIS_LOAD_THRESHOLD,
+    MEMORY_MAX_USERS,
+    MEMORY_IDLE_TTL_S,
+    MEMORY_MAX_TURNS,
+    MEMORY_MAX_CHARS,
+    MEMORY_MODE,
+    MEMORY_SUMMARY_KEEP_TURNS,
+    MEMORY_SUMMARY_MAX_CHARS,
+    MEMORY_BACKEND,
+    MEMORY_REHYDRATE_TURNS,
+    MEMORY_REDIS_TTL_S,
+    REDIS_URL,
+    TURN_DEADLINE_S,
+    DEADLINE_SYNTHESIS_RESERVE_S,
+    DEADLINE_MIN_STEP_S,
+    RESPONSE_CACHE_ENABLED,
+    COALESCE_IDENTICAL_TURNS,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_TTL_S,
+    RESPONSE_CACHE_CONTEXT_TURNS,
+)
 
 logger = get_logger(__name__)
 
@@ -43,20 +76,105 @@ logger = get_logger(__name__)
 # OFFICIAL CHAT MEMORY (LangChain ConversationBufferMemory per user)
 # -------------------------------------------------------------------
 
-_memory_store: Dict[str, ConversationBufferMemory] = {}
+def _new_memory() -> ConversationBufferMemory:
+    """Build an empty memory of the configured MEMORY_MODE."""
+    if MEMORY_MODE == "summary":
+        return SummarizingMemory(
+            keep_turns=MEMORY_SUMMARY_KEEP_TURNS,
+            summary_max_chars=MEMORY_SUMMARY_MAX_CHARS,
+        )
+    return ConversationBufferMemory(
+        return_messages=False,  # we want a text 'history', not message objects
+        max_turns=MEMORY_MAX_TURNS,
+        max_chars=MEMORY_MAX_CHARS,
+    )
+
+
+def _load_recent_turns(user_id: str) -> list:
+    """Last MEMORY_REHYDRATE_TURNS stored turns, used to rebuild cold memory."""
+    return get_recent_conversation_turns(user_id, MEMORY_REHYDRATE_TURNS)
+
+
+# In-process (LRU past MEMORY_MAX_USERS, idle users dropped after
+# MEMORY_IDLE_TTL_S), Mongo-backed or Redis-style storage; see
+# orchestrator/memory_backends.py. Cold users rehydrate from Mongo.
+_memory_backend = build_memory_backend(
+    MEMORY_BACKEND,
+    _new_memory,
+    _load_recent_turns if MEMORY_REHYDRATE_TURNS > 0 else None,
+    max_users=MEMORY_MAX_USERS,
+    idle_ttl_s=MEMORY_IDLE_TTL_S,
+    redis_url=REDIS_URL,
+    redis_ttl_s=MEMORY_REDIS_TTL_S,
+    load_snapshot=get_memory_snapshot,
+    save_snapshot=save_memory_snapshot,
+)
+
+# Strong references to fire-and-forget work (asyncio only keeps weak ones).
+_background_tasks: set = set()
 
 
 def get_memory(user_id: str) -> ConversationBufferMemory:
     """
     Get or create a LangChain ConversationBufferMemory instance for this user.
     Maintains a per-user history of chat turns to provide context to the LLM.
-    This is the ONLY chat memory used by the LLM for context.
+    This is the ONLY chat memory used by the LLM for context. May block on
+    the memory backend (Mongo/Redis); async code should use _aload_history.
     """
-    if user_id not in _memory_store:
-        _memory_store[user_id] = ConversationBufferMemory(
-            return_messages=False  # we want a text 'history', not message objects
-        )
-    return _memory_store[user_id]
+    return _memory_backend.load(user_id)
+
+
+def get_memory_stats() -> dict:
+    """Size, hit and eviction counters reported by the chat memory backend."""
+    return _memory_backend.stats()
+
+
+async def _aremember_turn(user_id: str, memory: ConversationBufferMemory, message: str, response: str):
+    """
+    Record the exchange in chat memory and persist it to the backend. For
+    summarizing memory, older turns are folded into the summary in the
+    background once the answer is out.
+    """
+    memory.save_context({"input": message}, {"output": response})
+    await asyncio.to_thread(_memory_backend.save, user_id, memory)
+
+    if getattr(memory, "needs_compaction", False):
+        async def _compact():
+            await memory.acompact(asummarize_history)
+            await asyncio.to_thread(_memory_backend.save, user_id, memory)
+
+        task = asyncio.ensure_future(_compact())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+# -------------------------------------------------------------------
+# FINAL-RESPONSE CACHE
+# -------------------------------------------------------------------
+
+# Answers keyed on user, normalized message, profile hash and the last
+# RESPONSE_CACHE_CONTEXT_TURNS exchanges before any trailing repeats of the
+# message; see orchestrator/response_cache.py.
+# A profile save changes the hash anyway, but also frees the stale entries.
+_response_cache = ResponseCache(max_entries=RESPONSE_CACHE_MAX_ENTRIES, ttl_s=RESPONSE_CACHE_TTL_S)
+on_profile_saved(_response_cache.invalidate_user)
+
+
+def get_response_cache_stats() -> dict:
+    """Entry count, hit/miss and invalidation counters of the response cache."""
+    return _response_cache.stats()
+
+
+async def _aload_history(user_id: str):
+    """
+    Fetch this user's chat memory and its rendered history for the turn.
+
+    Returns:
+        tuple: (memory object, history text for the prompts).
+    """
+    memory = await asyncio.to_thread(get_memory, user_id)
+    memory_vars = memory.load_memory_variables({})
+    return memory, memory_vars.get("history", "No previous conversation yet.")
 
 
 # -------------------------------------------------------------------
@@ -169,18 +287,236 @@ def process_query(user_id: str, message: str):
     return final_response, agents_used
 
 
-def process_query_generator(user_id: str, message: str):
+def _record_route(source: str, agents) -> None:
+    """Count a routing decision, folding names the LLM invented into "unknown"."""
+    record_routing(source, [a if a in AGENT_STEPS or a == "FINISH" else "unknown" for a in agents])
+
+
+def _admit_agents(candidates, agents_used: list, log_event):
     """
-    The real implementation of the orchestration loop, supporting streaming.
+    Filter a routing decision down to the agents that should actually run.
+
+    Skips agents that already ran, repeats within the decision and unknown
+    names. Nothing is recorded here; see _record_agents_run().
+
+    Returns:
+        tuple: (runnable agent names, log events to stream).
+    """
+    runnable: list[str] = []
+    events: list[dict] = []
+    for next_agent in candidates:
+        # NOTE: Already-used-agent guard. Prevents infinite loops if the
+        # supervisor gets stuck repeatedly recommending the same agent.
+        if next_agent in agents_used or next_agent in runnable:
+            events.append(log_event("Supervisor", f"Skipping {next_agent} (already ran)."))
+            continue
+
+        if next_agent in AGENT_STEPS:
+            runnable.append(next_agent)
+        else:
+            # Fallback for unknown agents
+            events.append(log_event("System", f"Unknown agent '{next_agent}' selected."))
+    return runnable, events
+
+
+def _record_agents_run(runnable, state: dict, agents_used: list):
+    """
+    Add to `agents_used` the agents of a finished group whose output made it
+    into `state`. Agents skipped or dropped by the time budget are left out,
+    so the final event, stored history and learned-router labels only name
+    agents that contributed.
+    """
+    for name in runnable:
+        if name not in agents_used and AGENT_STEPS[name][0] in state:
+            agents_used.append(name)
+
+
+# Turns currently being orchestrated by this process (all event loops). Only
+# read as a load signal, so the unlocked +=/-= on the GIL is good enough.
+_turns_in_flight = 0
+
+# Running mean of LLM calls per completed turn, used to estimate how many
+# calls a cancelled turn avoided. Seeded with a typical step-mode turn
+# (intent, two supervisor steps, one agent, synthesis).
+_llm_calls_per_turn = 5.0
+
+
+def _record_turn_outcome(trace: TurnTrace, outcome: str):
+    """
+    Update the LLM-calls-per-turn mean for a "completed" turn, or count a
+    "cancelled" one and the calls it saved: the expected remainder of the
+    turn, and at least every call that was cut off mid-flight. Turns that
+    ended on their own without an answer ("aborted") only get logged events.
+    """
+    global _llm_calls_per_turn
+    made = sum(span.llm_calls for span in trace.spans)
+    if outcome == "completed":
+        _llm_calls_per_turn += 0.05 * (made - _llm_calls_per_turn)
+    if outcome != "cancelled":
+        return
+
+    running = [span for span in trace.spans if span.duration_ms is None]
+    stage = running[-1].attrs.get("agent", running[-1].stage) if running else "between_stages"
+    aborted = sum(span.in_flight_llm_calls for span in running)
+    TURNS_CANCELLED.labels(stage).inc()
+    LLM_CALLS_SAVED.inc(max(round(_llm_calls_per_turn - made), aborted))
+    logger.info(f"Turn cancelled during {stage} after {made} LLM calls ({aborted} cut short)")
+
+
+def _use_template_synthesis(state: dict) -> bool:
+    """
+    Decide whether the final report can skip the Synthesizer LLM.
+
+    TEMPLATE_SYNTHESIS: "off" never, "single" when exactly one specialist
+    produced output, "always" whenever any did. Independently, once in-flight
+    turns reach TEMPLATE_SYNTHESIS_LOAD_THRESHOLD (0 disables) every turn with
+    specialist output is templated to shed load.
+    """
+    if TEMPLATE_SYNTHESIS == "off" or not can_format(state):
+        return False
+    if TEMPLATE_SYNTHESIS == "always":
+        return True
+    if 0 < TEMPLATE_SYNTHESIS_LOAD_THRESHOLD <= _turns_in_flight:
+        return True
+    outputs = sum(1 for step in AGENT_STEPS.values() if state.get(step[0]))
+    return TEMPLATE_SYNTHESIS == "single" and outputs == 1
+
+
+# Answer used when the budget ran out before any specialist produced output
+# and there is no time left for the Synthesizer either.
+_OUT_OF_TIME_RESPONSE = (
+    "Sorry, I couldn't put together a full answer in time. "
+    "Please try again, or ask about one thing at a time."
+)
+
+# Identical (user, message) turns in flight on each event loop.
+_singleflight = Singleflight()
+
+
+async def aprocess_query_generator(user_id: str, message: str, deadline_s: Optional[float] = None):
+    """
+    Run one orchestration turn, streaming its events.
+
+    `deadline_s` bounds the whole turn (None uses TURN_DEADLINE_S, 0 means
+    no deadline); see orchestrator/budget.py for how it degrades.
+
+    Thin wrapper over _arun_turn that owns the turn's background work
+    (speculative agent runs) and guarantees it is cancelled when the turn
+    ends, including when the consumer stops iterating early. Closing the
+    generator or cancelling the consuming task (e.g. on WebSocket
+    disconnect) aborts whatever LLM call is pending; such turns are counted
+    in the cancellation metrics and are not persisted unless their answer
+    was already complete.
+
+    Yields:
+      {"type": "log", "agent": "...", "message": "..."}
+      {"type": "delta", "text": "..."}   (synthesized answer, as it streams)
+      {"type": "final", "response": "...", "agents_used": [...], "spans": [...],
+       "degradations": [...]}   (plus "cached": True when replayed from the
+                                 response cache, "coalesced": True when
+                                 attached to an identical turn)
+
+    With COALESCE_IDENTICAL_TURNS, a request whose (user, normalized
+    message) matches a turn still in flight attaches to it instead of
+    running its own: it receives the same events and the turn is persisted
+    once. The shared turn keeps the leader's deadline and is cancelled only
+    when every attached consumer has gone away.
+    """
+    if COALESCE_IDENTICAL_TURNS:
+        stream = _singleflight.stream(
+            (str(user_id), normalize_message(message)),
+            lambda: _aprocess_turn(user_id, message, deadline_s),
+        )
+    else:
+        stream = _aprocess_turn(user_id, message, deadline_s)
+    async with aclosing(stream) as events:
+        async for event in events:
+            yield event
+
+
+def get_coalescing_stats() -> dict:
+    """In-flight shared turns and how many requests led or joined one."""
+    return _singleflight.stats()
+
+
+async def _aprocess_turn(user_id: str, message: str, deadline_s: Optional[float]):
+    """Run one (uncoalesced) turn; see aprocess_query_generator."""
+    global _turns_in_flight
+    speculative: dict = {}
+    trace = TurnTrace()
+    budget = TurnBudget(
+        TURN_DEADLINE_S if deadline_s is None else deadline_s,
+        synthesis_reserve_s=DEADLINE_SYNTHESIS_RESERVE_S,
+        min_step_s=DEADLINE_MIN_STEP_S,
+    )
+    outcome = "cancelled"
+    _turns_in_flight += 1
+    try:
+        async with aclosing(_arun_turn(user_id, message, speculative, trace, budget)) as events:
+            async for event in events:
+                if event["type"] == "final":
+                    outcome = "completed"
+                yield event
+        if outcome == "cancelled":
+            outcome = "aborted"  # e.g. the profile failed to load
+    finally:
+        _turns_in_flight -= 1
+        discard_speculation(speculative)
+        _record_turn_outcome(trace, outcome)
+
+
+async def _apersist_turn(user_id: str, memory, message: str, response: str,
+                         agents_used: list, reasoning_logs: list, trace: TurnTrace):
+    """
+    Save a finished turn to chat memory and the /history log.
+
+    Runs as its own task and is awaited through asyncio.shield(), so a client
+    disconnecting after the answer is complete doesn't lose the turn: it is
+    still in history on reload. Turns cancelled before the answer is complete
+    never get here and are deliberately not saved, since a half-finished
+    exchange would mislead the next turn's context.
+    """
+    async def _persist():
+        await trace.span("memory_save").arun(_aremember_turn(user_id, memory, message, response))
+        # The stored spans stop before this write; the final event also
+        # includes the "persist" span.
+        await trace.span("persist").arun(asyncio.to_thread(
+            append_conversation_turn,
+            user_id=user_id,
+            user_message=message,
+            assistant_response=response,
+            agents_used=agents_used,
+            reasoning_logs=reasoning_logs,
+            spans=trace.to_list(),
+        ))
+
+    task = asyncio.ensure_future(_persist())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    await asyncio.shield(task)
+
+
+async def _arun_turn(user_id: str, message: str, speculative: dict, trace: TurnTrace, budget: TurnBudget):
+    """
+    The real implementation of the orchestration loop, as an async generator.
 
     Classifies user intent, then loops calling the supervisor to pick the next
     agent (capped at max_steps=8 to avoid infinite loops). Streams progress
     events for the websocket UI, synthesizes a final answer, and logs the
-    conversation turn to history.
-    
+    conversation turn to history. Every LLM call goes through `ainvoke` and
+    every blocking Mongo call runs in a worker thread, so a single event loop
+    can interleave many concurrent turns. Every stage is timed as a span
+    (see orchestrator/tracing.py); the spans ride along on the final event
+    and are stored with the turn.
+
+    Under a latency budget the turn degrades instead of overrunning: intent
+    falls back to wellness, routing stops, remaining agents are skipped or
+    dropped, and synthesis switches to the local template (or keeps what was
+    streamed). Each shortcut is listed in the final event's `degradations`.
+
     Yields:
       {"type": "log", "agent": "...", "message": "..."}
-      {"type": "final", "response": "...", "agents_used": [...]}
+      {"type": "final", "response": "...", "agents_used": [...], "spans": [...]}
     """
     logger.info(f"DEBUG: process_query_generator started for {user_id}")
     reasoning_logs = []
@@ -190,32 +526,97 @@ def process_query_generator(user_id: str, message: str):
         reasoning_logs.append(event)
         return event
 
-    # 1) Load user profile (long-term memory)
+    # 1-3) Turn bootstrap. Profile (long-term memory), chat memory (short-term)
+    # and intent classification don't depend on each other, so they run
+    # concurrently and the bootstrap costs the slowest of the three rather
+    # than their sum. Each reports back as soon as it finishes.
     yield log_event("System", "Loading user profile...")
-    try:
-        profile = get_profile(user_id)
-        logger.info(f"DEBUG: Profile loaded: {profile is not None}")
-    except Exception as e:
-        logger.error(f"DEBUG: Error loading profile: {e}")
-        yield log_event("System", f"Error loading profile: {e}")
-        return
-
-    # 2) Get LangChain memory for this user (short-term conversation memory)
-    memory = get_memory(user_id)
-    memory_vars = memory.load_memory_variables({})
-    chat_history = memory_vars.get("history", "No previous conversation yet.")
-
-    # 3) Intention classification
-    # 3) Intention classification
     yield log_event("System", "Classifying intent...")
+
+    pending = {
+        asyncio.ensure_future(trace.span("profile").arun(asyncio.to_thread(get_profile, user_id))): "profile",
+        asyncio.ensure_future(trace.span("memory").arun(_aload_history(user_id))): "memory",
+        asyncio.ensure_future(trace.span("intent").arun(aclassify_intent(message))): "intent",
+    }
+    memory = chat_history = intent = None
+    profile_loaded = False
+    turn_key = cached = None
     try:
-        intent = classify_intent(message)
-        logger.info(f"DEBUG: Intent classified: {intent}")
-    except Exception as e:
-        logger.error(f"DEBUG: Error classifying intent: {e}")
-        yield log_event("System", "Error classifying intent, proceeding as wellness.")
-        intent = {"is_wellness": True}
+        while pending and cached is None:
+            # Profile and memory are needed whatever the budget; only a slow
+            # intent classification can be given up on.
+            timeout = budget.timeout() if set(pending.values()) == {"intent"} else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                budget.degrade("intent_timeout")
+                yield log_event("System", "Time budget low, proceeding as wellness.")
+                intent = {"is_wellness": True}
+                break
+            for task in done:
+                stage = pending.pop(task)
+                if stage == "profile":
+                    try:
+                        profile = task.result()
+                        logger.info(f"DEBUG: Profile loaded: {profile is not None}")
+                    except Exception as e:
+                        logger.error(f"DEBUG: Error loading profile: {e}")
+                        yield log_event("System", f"Error loading profile: {e}")
+                        return
+                    profile_loaded = True
+
+                elif stage == "memory":
+                    memory, chat_history = task.result()
+
+                else:
+                    try:
+                        intent = task.result()
+                        logger.info(f"DEBUG: Intent classified: {intent}")
+                    except Exception as e:
+                        logger.error(f"DEBUG: Error classifying intent: {e}")
+                        yield log_event("System", "Error classifying intent, proceeding as wellness.")
+                        intent = {"is_wellness": True}
+
+            # With profile and memory in hand, a repeated question can be
+            # answered from the cache before intent or routing cost anything.
+            if RESPONSE_CACHE_ENABLED and turn_key is None and profile_loaded and memory is not None:
+                with trace.span("cache"):
+                    context = cache_context(message, memory.recent_lines(), RESPONSE_CACHE_CONTEXT_TURNS)
+                    turn_key = cache_key(user_id, message, profile, context)
+                    cached = _response_cache.get(turn_key)
+                RESPONSE_CACHE_LOOKUPS.labels("hit" if cached else "miss").inc()
+
+            # SymptomAgent only needs message + profile, so it can start
+            # while intent and the first routing decision are pending (but
+            # not for a turn the cache is about to answer).
+            if (SPECULATIVE_SYMPTOM_AGENT and profile_loaded and "SymptomAgent" not in speculative
+                    and (turn_key is not None or not RESPONSE_CACHE_ENABLED) and cached is None):
+                speculative["SymptomAgent"] = speculate("SymptomAgent", message, profile, trace)
+    finally:
+        # Profile failure (or the consumer going away) abandons the rest.
+        for task in pending:
+            task.cancel()
+
+    if cached is not None:
+        # Replay the stored turn through the same event stream.
+        for event in cached.reasoning_logs:
+            yield log_event(event["agent"], event["message"])
+        yield {"type": "delta", "text": cached.response}
+        agents_used = list(cached.agents_used)
+        await _apersist_turn(user_id, memory, message, cached.response, agents_used, reasoning_logs, trace)
+        logger.info(f"Turn spans: {trace.summary()}")
+        yield {
+            "type": "final",
+            "response": cached.response,
+            "agents_used": agents_used,
+            "reasoning_logs": reasoning_logs,
+            "spans": trace.to_list(),
+            "degradations": budget.degradations,
+            "cached": True,
+        }
+        return
 
+    # Log events from here on are what a cache hit replays.
+    replay_from = len(reasoning_logs)
     is_wellness = intent.get("is_wellness", True)
 
     if not is_wellness:
@@ -224,19 +625,15 @@ def process_query_generator(user_id: str, message: str):
             "I only help with basic health, diet, fitness and lifestyle tips."
         )
 
-        memory.save_context({"input": message}, {"output": response_text})
-        append_conversation_turn(
-            user_id=user_id,
-            user_message=message,
-            assistant_response=response_text,
-            agents_used=[],
-            reasoning_logs=reasoning_logs,
-        )
+        await _apersist_turn(user_id, memory, message, response_text, [], reasoning_logs, trace)
+        logger.info(f"Turn spans: {trace.summary()}")
         yield {
             "type": "final", 
             "response": response_text, 
             "agents_used": [],
-            "reasoning_logs": reasoning_logs
+            "reasoning_logs": reasoning_logs,
+            "spans": trace.to_list(),
+            "degradations": budget.degradations,
         }
         return
 
@@ -247,59 +644,117 @@ def process_query_generator(user_id: str, message: str):
     }
     agents_used: list[str] = []
 
+    # Plan mode: one supervisor call returns the whole route for the turn.
+    # Learned mode: a local model predicts the route with no LLM call at all.
+    # If either yields no usable plan we fall through to the step-wise loop below.
+    plan = None
+    if ROUTING_MODE == "learned":
+        with trace.span("supervisor", mode="learned"):
+            router = get_learned_router(LEARNED_ROUTER_PATH)
+            route, confidence = router.predict(message) if router is not None else ([], 0.0)
+        if router is not None:
+            logger.info(f"DEBUG: Learned router -> {route} ({confidence:.2f})")
+            if confidence >= LEARNED_ROUTER_MIN_CONFIDENCE:
+                yield log_event("Supervisor", f"Routing locally ({confidence:.0%} confident).")
+                plan = {"agents": route, "parallel": None}
+                _record_route("learned", route)
+            else:
+                yield log_event("Supervisor", "Low-confidence local route, asking supervisor.")
+
+    elif ROUTING_MODE == "plan" and budget.can_route():
+        yield log_event("Supervisor", "Planning agent route...")
+        try:
+            plan = await trace.span("supervisor", mode="plan").arun(
+                budget.wait_for(aplan_route(message, profile, state))
+            )
+        except asyncio.TimeoutError:
+            budget.degrade("supervisor_timeout")
+        logger.info(f"DEBUG: Supervisor planned -> {plan}")
+        if plan is None:
+            yield log_event("Supervisor", "Plan unavailable, deciding step by step.")
+        else:
+            _record_route("plan", plan["agents"])
+
+    if plan is not None:
+        if plan["parallel"]:
+            groups = plan["parallel"]
+        elif PARALLEL_AGENTS:
+            groups = [plan["agents"]]
+        else:
+            groups = [[agent] for agent in plan["agents"]]
+
+        for group in groups:
+            runnable, events = _admit_agents(group, agents_used, log_event)
+            for event in events:
+                yield event
+            agent_events = run_agent_group(runnable, message, profile, state, log_event, speculative, trace, budget)
+            async with aclosing(agent_events):
+                async for event in agent_events:
+                    yield event
+            _record_agents_run(runnable, state, agents_used)
+
+        yield log_event("Supervisor", "Analysis complete.")
+
     # REQUIRED: Dynamic Supervisor Loop
     # The Supervisor decides which agent runs next based on context.
     
     max_steps = 8
     step_count = 0
     
-    while step_count < max_steps:
+    while plan is None and step_count < max_steps:
         step_count += 1
-        
-        # Ask Supervisor what to do next
-        yield log_event("Supervisor", "Deciding next step...")
-        next_agent = supervisor(message, profile, state)
-        logger.info(f"DEBUG: Supervisor decided -> {next_agent}")
 
-        # NOTE: FINISH is the exit condition returned by the supervisor when it
-        # determines no further specialist agents are needed to satisfy the query.
-        if next_agent == "FINISH":
-            yield log_event("Supervisor", "Analysis complete.")
+        # Out of routing time: answer with what the agents produced so far.
+        if not budget.can_route():
+            budget.degrade("supervisor_skipped")
+            yield log_event("Supervisor", "Time budget low, finishing with current findings.")
             break
 
-        # NOTE: Already-used-agent guard. Prevents infinite loops if the
-        # supervisor gets stuck repeatedly recommending the same agent.
-        if next_agent in agents_used:
-             # Prevent infinite loops if Supervisor gets stuck
-            yield log_event("Supervisor", f"Skipping {next_agent} (already ran).")
-            continue
-
-        # Execute the chosen agent
-        if next_agent == "SymptomAgent":
-            yield log_event("SymptomAgent", "Evaluating User Input...")
-            state["symptoms"] = run_symptom_agent(message, profile)
-            yield log_event("SymptomAgent", "→ Symptoms analyzed.")
+        # Ask Supervisor what to do next. In parallel mode it may hand back a
+        # whole group, which the scheduler fans out by dependency wave.
+        yield log_event("Supervisor", "Deciding next step...")
+        span = trace.span("supervisor", step=step_count)
+        try:
+            if PARALLEL_AGENTS:
+                next_agents = await span.arun(budget.wait_for(asupervisor_group(message, profile, state)))
+            else:
+                next_agents = [await span.arun(budget.wait_for(asupervisor(message, profile, state)))]
+        except asyncio.TimeoutError:
+            budget.degrade("supervisor_timeout")
+            yield log_event("Supervisor", "Time budget reached, finishing with current findings.")
+            break
+        logger.info(f"DEBUG: Supervisor decided -> {next_agents}")
+        _record_route("step", next_agents)
 
-        elif next_agent == "DietAgent":
-            yield log_event("DietAgent", "Reviewing Symptom + Medical Data...")
-            state["diet"] = run_diet_agent(state, profile)
-            yield log_event("DietAgent", "→ Diet adjusted.")
+        # NOTE: FINISH is the exit condition returned by the supervisor when it
+        # determines no further specialist agents are needed to satisfy the query.
+        if "FINISH" in next_agents:
+            next_agents = next_agents[:next_agents.index("FINISH")]
+            finished = True
+        else:
+            finished = False
 
-        elif next_agent == "FitnessAgent":
-            yield log_event("FitnessAgent", "Creating Safe Workout Plan...")
-            state["fitness"] = run_fitness_agent(state, profile)
-            yield log_event("FitnessAgent", "→ Fitness plan created.")
+        runnable, events = _admit_agents(next_agents, agents_used, log_event)
+        for event in events:
+            yield event
 
-        elif next_agent == "LifestyleAgent":
-            yield log_event("LifestyleAgent", "Improving Daily Routine...")
-            state["lifestyle"] = run_lifestyle_agent(message, profile, state)
-            yield log_event("LifestyleAgent", "→ Lifestyle tips refined.")
+        # Execute the chosen agent(s). aclosing() makes an early stop cancel
+        # the group's running agents right away rather than at GC time.
+        agent_events = run_agent_group(runnable, message, profile, state, log_event, speculative, trace, budget)
+        async with aclosing(agent_events):
+            async for event in agent_events:
+                yield event
+        _record_agents_run(runnable, state, agents_used)
 
-        else:
-             # Fallback for unknown agents
-            yield log_event("System", f"Unknown agent '{next_agent}' selected.")
+        if finished:
+            yield log_event("Supervisor", "Analysis complete.")
+            break
 
-        agents_used.append(next_agent)
+    # The route is final now; an unused speculative run is pure waste.
+    discard_speculation(speculative)
+    # Only calls that reached the LLM: the learned router's span and stage
+    # memo hits make none.
+    SUPERVISOR_STEPS.observe(sum(span.llm_calls for span in trace.spans if span.stage == "supervisor"))
 
     # 5) Final synthesis of all agent outputs
     yield log_event("Synthesizer", "Combining All Agent Evaluations...")
@@ -323,30 +778,113 @@ def process_query_generator(user_id: str, message: str):
     yield log_event("Synthesizer", "🧠 Finalizing evidence-based recommendations...")
     # ------------------------------------------------
     
-    final_response = synthesize_output(state, message)
-
-    # 6) Save to LangChain ConversationBufferMemory
-    memory.save_context({"input": message}, {"output": final_response})
-
-    # 7) Also log this turn for /history API
-    # 7) Also log this turn for /history API
-    append_conversation_turn(
-        user_id=user_id,
-        user_message=message,
-        assistant_response=final_response,
-        agents_used=agents_used,
-        reasoning_logs=reasoning_logs,
-    )
+    mode = "template" if _use_template_synthesis(state) else "llm"
+    if mode == "llm" and not budget.can_synthesize():
+        # No time for the Synthesizer LLM: template what the agents produced,
+        # or apologise if they produced nothing.
+        mode = "template" if can_format(state) else "fallback"
+        budget.degrade("synthesis_template" if mode == "template" else "synthesis_skipped")
+        yield log_event("System", "Time budget low, formatting the report locally.")
+
+    if mode == "template":
+        # One section (or load shedding): format locally, no LLM round trip.
+        with trace.span("synthesis", mode="template"):
+            final_response = format_report(state, message)
+        yield {"type": "delta", "text": final_response}
+    elif mode == "fallback":
+        final_response = _OUT_OF_TIME_RESPONSE
+        yield {"type": "delta", "text": final_response}
+    else:
+        # Stream the report as it is generated; time-to-first-token is what the
+        # user feels, and the full text still goes out in the final event below.
+        chunks: list[str] = []
+        span = trace.span("synthesis", mode="llm")
+        stream = span.aiter(astream_synthesis(state, message))
+        try:
+            async with aclosing(stream):
+                while True:
+                    try:
+                        chunk = await budget.wait_for(stream.__anext__(), for_routing=False)
+                    except StopAsyncIteration:
+                        break
+                    chunks.append(chunk)
+                    yield {"type": "delta", "text": chunk}
+            final_response = "".join(chunks).strip()
+        except asyncio.TimeoutError:
+            # Deadline hit mid-stream: the complete template report beats a
+            # cut-off one; the final event's text replaces the streamed deltas.
+            budget.degrade("synthesis_timeout")
+            yield log_event("System", "Time budget reached, finishing the report locally.")
+            final_response = format_report(state, message) if can_format(state) else "".join(chunks).strip()
+
+    # Degraded answers are worse than a fresh run would give, so they are
+    # never cached.
+    if turn_key is not None and not budget.degradations:
+        _response_cache.put(turn_key, user_id, CachedTurn(final_response, list(agents_used), reasoning_logs[replay_from:]))
+
+    # 6-7) Save to LangChain ConversationBufferMemory and log this turn for
+    # the /history API
+    await _apersist_turn(user_id, memory, message, final_response, agents_used, reasoning_logs, trace)
     logger.info("DEBUG: Pipeline finished, sending final response")
+    logger.info(f"Turn spans: {trace.summary()}")
     yield {
         "type": "final", 
         "response": final_response, 
         "agents_used": agents_used,
-        "reasoning_logs": reasoning_logs
+        "reasoning_logs": reasoning_logs,
+        "spans": trace.to_list(),
+        "degradations": budget.degradations,
     }
 
 
-def process_query(user_id: str, message: str):
+# -------------------------------------------------------------------
+# SYNC BRIDGE (for blocking callers such as POST /chat and the benchmark)
+# -------------------------------------------------------------------
+
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the background event loop that sync callers submit work to.
+
+    A single long-lived loop (on a daemon thread) is shared by every blocking
+    caller, so loop-bound helpers behave the same whether a turn arrives over
+    the websocket or through the REST wrapper.
+    """
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="orchestrator-sync-loop", daemon=True
+            ).start()
+            _sync_loop = loop
+    return _sync_loop
+
+
+def process_query_generator(user_id: str, message: str, deadline_s: Optional[float] = None):
+    """
+    Blocking generator over aprocess_query_generator.
+
+    Drives the async pipeline on the shared background loop and re-yields each
+    event, so existing synchronous consumers see the same event stream.
+    """
+    loop = _get_sync_loop()
+    agen = aprocess_query_generator(user_id, message, deadline_s)
+    try:
+        while True:
+            try:
+                event = asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+            yield event
+    finally:
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
+
+
+def process_query(user_id: str, message: str, deadline_s: Optional[float] = None):
     """
     Synchronous wrapper around the process_query_generator.
     Kept for backward compatibility with older routers that do not support streaming.
@@ -354,7 +892,7 @@ def process_query(user_id: str, message: str):
     real execution and websocket streaming, while this wrapper allows simple
     blocking calls from basic REST endpoints).
     """
-    gen = process_query_generator(user_id, message)
+    gen = process_query_generator(user_id, message, deadline_s)
     final_result = None
     for event in gen:
         if event["type"] == "final":
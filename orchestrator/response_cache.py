@@ -0,0 +1,154 @@
+# backend/orchestrator/response_cache.py
+"""
+Final-response cache for orchestration turns.
+
+Maps (user, normalized message, profile hash, recent-conversation hash) to
+a finished turn's answer, agents and log events, so a repeated question is
+answered by replaying the stored event stream instead of re-running 5-10
+LLM calls. Entries expire after a TTL, the least recently used go first
+past a size cap, and a user's entries are dropped whenever their profile is
+saved.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Set
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.,;:]+$")
+_HUMAN_PREFIX = "Human: "
+
+
+class CachedTurn(NamedTuple):
+    """What a replay needs to reproduce a finished turn."""
+    response: str
+    agents_used: List[str]
+    reasoning_logs: List[dict]
+
+
+def normalize_message(message: str) -> str:
+    """Case-, whitespace- and trailing-punctuation-insensitive form of a message."""
+    text = _WHITESPACE.sub(" ", message.strip().lower())
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+
+def _digest(value) -> str:
+    raw = json.dumps(value, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def cache_context(message: str, history: List[str], turns: int) -> List[str]:
+    """
+    The chat-memory lines that key a turn: the last `turns` exchanges before
+    any trailing exchanges that asked this same message. Asking a question
+    again right after it was answered then sees the context the first ask
+    saw, instead of a context made of the first ask itself.
+
+    Args:
+        message: The raw text of the user's input.
+        history: Verbatim memory lines, alternating "Human: ..." and "AI: ...".
+        turns: Exchanges of context to keep (0 keys on the message alone).
+    """
+    target = normalize_message(message)
+    end = len(history)
+    while end >= 2 and history[end - 2].startswith(_HUMAN_PREFIX) and (
+        normalize_message(history[end - 2][len(_HUMAN_PREFIX):]) == target
+    ):
+        end -= 2
+    return history[max(end - 2 * turns, 0):end] if turns > 0 else []
+
+
+def cache_key(user_id: str, message: str, profile: Optional[dict], recent_context: List[str]) -> str:
+    """
+    Build the cache key for a turn.
+
+    Args:
+        user_id: The user asking; answers are never shared across users.
+        message: The raw text of the user's input.
+        profile: The user's health profile as loaded for this turn.
+        recent_context: The last few chat-memory lines the agents will see.
+    """
+    return _digest([str(user_id), normalize_message(message), _digest(profile or {}), _digest(recent_context)])
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU + TTL cache of finished turns, indexed by user so a
+    profile save can drop everything cached for that user.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_s: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (user_id, turn, stored_at)
+        self._by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _drop(self, key: str):
+        user_id, _, _ = self._entries.pop(key)
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
+
+    def _sweep(self, now: float):
+        if self.ttl_s:
+            while self._entries:
+                key, (_, _, stored_at) = next(iter(self._entries.items()))
+                if now - stored_at <= self.ttl_s:
+                    break
+                self._drop(key)
+        while self.max_entries and len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def get(self, key: str) -> Optional[CachedTurn]:
+        with self._lock:
+            now = time.monotonic()
+            self._sweep(now)
+            entry = self._entries.get(key)
+            # A hit moves its entry to the back, so the front-only sweep can
+            # miss it once expired; check its age here as well.
+            if entry is not None and self.ttl_s and now - entry[2] > self.ttl_s:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, user_id: str, turn: CachedTurn):
+        user_id = str(user_id)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (user_id, turn, time.monotonic())
+            self._by_user.setdefault(user_id, set()).add(key)
+            self._sweep(time.monotonic())
+
+    def invalidate_user(self, user_id) -> None:
+        """Forget every cached answer for this user (their profile changed)."""
+        with self._lock:
+            for key in list(self._by_user.get(str(user_id), ())):
+                self._drop(key)
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._sweep(time.monotonic())
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
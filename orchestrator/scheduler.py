@@ -0,0 +1,243 @@
+# backend/orchestrator/scheduler.py
+"""
+Dependency-aware execution of specialist agents within one turn.
+
+Holds the agent dispatch table and the dependency graph between agents, and
+runs a requested group of agents in "waves": every agent whose dependencies
+are satisfied starts concurrently, and results are merged into the shared
+state as they complete. Used by the orchestrator for both one-at-a-time and
+parallel fan-out scheduling.
+"""
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from agents.symptom_agent import arun_symptom_agent
+from agents.diet_agent import arun_diet_agent
+from agents.fitness_agent import arun_fitness_agent
+from agents.lifestyle_agent import arun_lifestyle_agent
+from agents.context_builder import agent_dependencies
+from orchestrator.tracing import TurnTrace
+from orchestrator.budget import TurnBudget
+
+
+# Maps each specialist name the supervisor can return to the state key it
+# writes, the log lines streamed around it, and its async runner. All runners
+# share the (message, profile, state) signature so the loop can stay generic.
+AGENT_STEPS = {
+    "SymptomAgent": (
+        "symptoms", "Evaluating User Input...", "→ Symptoms analyzed.",
+        lambda message, profile, state: arun_symptom_agent(message, profile),
+    ),
+    "DietAgent": (
+        "diet", "Reviewing Symptom + Medical Data...", "→ Diet adjusted.",
+        lambda message, profile, state: arun_diet_agent(state, profile),
+    ),
+    "FitnessAgent": (
+        "fitness", "Creating Safe Workout Plan...", "→ Fitness plan created.",
+        lambda message, profile, state: arun_fitness_agent(state, profile),
+    ),
+    "LifestyleAgent": (
+        "lifestyle", "Improving Daily Routine...", "→ Lifestyle tips refined.",
+        lambda message, profile, state: arun_lifestyle_agent(message, profile, state),
+    ),
+}
+
+# Which agents' outputs each agent actually reads, taken from the state keys
+# it renders into its prompt (agents/context_builder.py). A dependency only
+# applies when that agent is part of the same group (or already ran this
+# turn); it never pulls extra agents in.
+AGENT_DEPENDENCIES: Dict[str, tuple] = {agent: agent_dependencies(agent) for agent in AGENT_STEPS}
+
+
+class SpeculationStats:
+    """
+    Counters for speculative agent runs started before routing was decided.
+
+    `hits` were committed to state, `wasted` were dropped because the route
+    never asked for them; `ready_early` hits were already finished when the
+    scheduler reached them, and `saved_seconds` sums how long each hit had
+    been running by then (the latency the speculation hid).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = 0
+        self.hits = 0
+        self.wasted = 0
+        self.ready_early = 0
+        self.saved_seconds = 0.0
+
+    def record_start(self):
+        with self._lock:
+            self.started += 1
+
+    def record_hit(self, head_start: float, was_ready: bool):
+        with self._lock:
+            self.hits += 1
+            self.ready_early += was_ready
+            self.saved_seconds += head_start
+
+    def record_waste(self, count: int = 1):
+        with self._lock:
+            self.wasted += count
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            resolved = self.hits + self.wasted
+            return {
+                "started": self.started,
+                "hits": self.hits,
+                "wasted": self.wasted,
+                "ready_early": self.ready_early,
+                "hit_rate": self.hits / resolved if resolved else 0.0,
+                "waste_rate": self.wasted / resolved if resolved else 0.0,
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+
+speculation_stats = SpeculationStats()
+
+
+def speculate(name: str, message: str, profile: Optional[dict], trace: Optional[TurnTrace] = None) -> asyncio.Task:
+    """
+    Start an agent in the background before the route is known.
+
+    Only agents whose runner ignores `state` (SymptomAgent) may be speculated,
+    since the result must be identical to a normal run. Its span is marked
+    speculative and ends "cancelled" if the run is discarded.
+    """
+    _, _, _, runner = AGENT_STEPS[name]
+    span = (trace or TurnTrace()).span("agent", agent=name, speculative=True)
+    task = asyncio.ensure_future(span.arun(runner(message, profile, {})))
+    task.started_at = time.perf_counter()
+    speculation_stats.record_start()
+    return task
+
+
+def discard_speculation(speculative: Optional[Dict[str, asyncio.Task]]):
+    """Cancel speculative runs nobody consumed and count them as waste."""
+    if not speculative:
+        return
+    for task in speculative.values():
+        task.cancel()
+    speculation_stats.record_waste(len(speculative))
+    speculative.clear()
+
+
+def plan_waves(agents: Iterable[str], completed: Iterable[str] = ()) -> List[List[str]]:
+    """
+    Split a group of agents into waves that can each run concurrently.
+
+    Args:
+        agents: Agent names to run, in the order they were requested.
+        completed: Agents that already ran earlier in this turn.
+
+    Returns:
+        list: Lists of agent names; every agent appears after all of its
+        in-group dependencies. Request order is preserved inside a wave.
+    """
+    pending = list(dict.fromkeys(agents))
+    done = set(completed)
+    waves: List[List[str]] = []
+
+    while pending:
+        wave = [
+            a for a in pending
+            if all(dep in done or dep not in pending for dep in AGENT_DEPENDENCIES.get(a, ()))
+        ]
+        if not wave:
+            # NOTE: Only reachable with a cyclic dependency table; fall back to
+            # running the rest one at a time in request order.
+            waves.extend([a] for a in pending)
+            break
+        waves.append(wave)
+        done.update(wave)
+        pending = [a for a in pending if a not in wave]
+
+    return waves
+
+
+async def run_agent_group(
+    agents: List[str],
+    message: str,
+    profile: Optional[dict],
+    state: dict,
+    log_event: Callable[[str, str], dict],
+    speculative: Optional[Dict[str, asyncio.Task]] = None,
+    trace: Optional[TurnTrace] = None,
+    budget: Optional[TurnBudget] = None,
+):
+    """
+    Execute a group of agents wave by wave, merging outputs into `state`.
+
+    Agents within a wave start together and each reads a snapshot of the state
+    taken when the wave starts, so siblings never see half-written output from
+    each other. Completion logs stream in the order agents actually finish.
+
+    Args:
+        agents: Known agent names to run (see AGENT_STEPS).
+        message: The raw text of the user's input.
+        profile: The user's health profile.
+        state: The turn's orchestration state; mutated in place.
+        log_event: Orchestrator callback that records and returns a log event.
+        speculative: Background runs started by speculate(), keyed by agent
+            name. A matching entry is awaited instead of calling the agent
+            again, and removed from the dict once committed.
+        trace: The turn's trace; each agent run gets an "agent" span.
+        budget: The turn's latency budget. Waves that no longer fit are
+            skipped, and agents still running when routing time runs out
+            are cancelled; both are recorded as degradations.
+
+    Yields:
+        dict: Log events for the websocket stream.
+    """
+    completed = [k for k, step in AGENT_STEPS.items() if step[0] in state]
+    trace = trace or TurnTrace()
+
+    waves = plan_waves(agents, completed)
+    for index, wave in enumerate(waves):
+        if budget is not None and not budget.can_route():
+            skipped = [name for later in waves[index:] for name in later]
+            for name in skipped:
+                budget.degrade(f"agent_skipped:{name}")
+            yield log_event("System", f"Time budget low, skipping {', '.join(skipped)}.")
+            return
+
+        snapshot = dict(state)
+
+        async def _run(name: str):
+            if speculative and name in speculative:
+                task = speculative.pop(name)
+                speculation_stats.record_hit(time.perf_counter() - task.started_at, task.done())
+                return name, await task
+            _, _, _, runner = AGENT_STEPS[name]
+            span = trace.span("agent", agent=name)
+            return name, await span.arun(runner(message, profile, snapshot))
+
+        for name in wave:
+            yield log_event(name, AGENT_STEPS[name][1])
+
+        tasks = [asyncio.ensure_future(_run(name)) for name in wave]
+        try:
+            pending = set(tasks)
+            while pending:
+                timeout = budget.timeout() if budget is not None else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Out of routing time: keep what finished, drop the rest.
+                    late = [name for name, task in zip(wave, tasks) if task in pending]
+                    for name in late:
+                        budget.degrade(f"agent_timeout:{name}")
+                    yield log_event("System", f"Time budget reached, dropping {', '.join(late)}.")
+                    return
+                for task in (t for t in tasks if t in done):
+                    name, output = task.result()
+                    state[AGENT_STEPS[name][0]] = output
+                    yield log_event(name, AGENT_STEPS[name][2])
+        finally:
+            # If the consumer stops early, don't leave sibling LLM calls running.
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
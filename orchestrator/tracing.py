@@ -0,0 +1,216 @@
+# backend/orchestrator/tracing.py
+"""
+Per-stage timing spans for one orchestration turn.
+
+A TurnTrace collects one Span per stage (profile load, memory load, intent,
+each supervisor decision, each agent, synthesis, persistence). Each span
+records its offset from the turn start, its duration, its outcome (ok,
+error, timeout or cancelled), and, for stages that call the LLM, the number
+of calls plus prompt/response sizes, captured by a LangChain callback bound
+only while that stage runs (which also feeds the per-agent LLM latency
+histogram). The orchestrator attaches the spans to the final event and the
+stored turn.
+"""
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+from core.metrics import LLM_CALL_SECONDS
+
+# LangChain adds the handler held here to every run configured while it is
+# set, so LLM calls made inside a span report to that span only.
+_span_handler: ContextVar[Optional["_SpanLLMHandler"]] = ContextVar("turn_span_handler", default=None)
+register_configure_hook(_span_handler, inheritable=True)
+
+
+class _SpanLLMHandler(BaseCallbackHandler):
+    """Counts LLM calls, prompt/response characters and call latency for one span."""
+
+    # Run on the event loop rather than in an executor; the bookkeeping is tiny.
+    run_inline = True
+
+    def __init__(self, span: "Span"):
+        self.span = span
+        self._started: Dict[Any, float] = {}
+
+    def _start(self, run_id, prompt_chars: int):
+        self.span.llm_calls += 1
+        self.span.prompt_chars += prompt_chars
+        self._started[run_id] = time.perf_counter()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._started)
+
+    def _end(self, run_id, outcome: str):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            agent = self.span.attrs.get("agent", self.span.stage)
+            LLM_CALL_SECONDS.labels(agent, outcome).observe(time.perf_counter() - started)
+
+    def on_llm_start(self, serialized: dict, prompts: List[str], *, run_id=None, **kwargs: Any):
+        self._start(run_id, sum(len(p) for p in prompts))
+
+    def on_chat_model_start(self, serialized: dict, messages: list, *, run_id=None, **kwargs: Any):
+        self._start(run_id, sum(len(str(m.content)) for batch in messages for m in batch))
+
+    def on_llm_end(self, response, *, run_id=None, **kwargs: Any):
+        self.span.response_chars += sum(len(g.text) for gens in response.generations for g in gens)
+        self._end(run_id, "ok")
+
+    def on_llm_error(self, error: BaseException, *, run_id=None, **kwargs: Any):
+        self._end(run_id, "error")
+
+
+class Span:
+    """
+    One timed stage of a turn. Starts when created; finished by arun(),
+    aiter(), a `with` block, or an explicit finish().
+    """
+
+    def __init__(self, trace: "TurnTrace", stage: str, **attrs: Any):
+        self.trace = trace
+        self.stage = stage
+        self.attrs = attrs
+        self.started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.outcome = "running"
+        self.llm_calls = 0
+        self.prompt_chars = 0
+        self.response_chars = 0
+        self._handler = _SpanLLMHandler(self)
+        trace.spans.append(self)
+
+    @property
+    def in_flight_llm_calls(self) -> int:
+        """LLM calls started in this span that haven't returned yet."""
+        return self._handler.in_flight
+
+    def finish(self, outcome: str = "ok", **attrs: Any):
+        """Close the span (only the first call counts)."""
+        if self.duration_ms is not None:
+            return
+        self.duration_ms = (time.perf_counter() - self.started) * 1000
+        self.outcome = outcome
+        self.attrs.update(attrs)
+
+    def _fail(self, exc: BaseException):
+        if isinstance(exc, asyncio.TimeoutError):
+            self.finish("timeout")
+        elif isinstance(exc, (asyncio.CancelledError, GeneratorExit)):
+            self.finish("cancelled")
+        else:
+            self.finish("error")
+
+    async def arun(self, awaitable: Awaitable):
+        """Await `awaitable` inside this span and return its result."""
+        # The handler is set and reset within this one await, which always
+        # runs in a single task, so it never leaks into other stages.
+        token = _span_handler.set(self._handler)
+        try:
+            result = await awaitable
+        except BaseException as e:
+            self._fail(e)
+            raise
+        finally:
+            _span_handler.reset(token)
+        self.finish()
+        return result
+
+    async def attach(self, awaitable: Awaitable):
+        """
+        Await `awaitable` with its LLM calls counted on this span, without
+        finishing it; for work done on the span's behalf in another task.
+        """
+        token = _span_handler.set(self._handler)
+        try:
+            return await awaitable
+        finally:
+            _span_handler.reset(token)
+
+    def link(self, other: "Span"):
+        """Record that this span waited on `other`, a span of another trace (e.g. a shared batch call)."""
+        linked = {k: v for k, v in other.to_dict().items() if k != "start_ms"}
+        self.attrs.setdefault("links", []).append(linked)
+
+    async def aiter(self, agen: AsyncIterator) -> AsyncIterator:
+        """
+        Re-yield a stream (e.g. synthesis tokens) inside this span. The
+        stream is closed when iteration stops, even early.
+        """
+        try:
+            while True:
+                token = _span_handler.set(self._handler)
+                try:
+                    item = await agen.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    _span_handler.reset(token)
+                yield item
+        except BaseException as e:
+            self._fail(e)
+            raise
+        finally:
+            await agen.aclose()
+        self.finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self._fail(exc)
+        else:
+            self.finish()
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        span = {
+            "stage": self.stage,
+            **self.attrs,
+            "start_ms": round((self.started - self.trace.started) * 1000, 1),
+            "duration_ms": round(self.duration_ms, 1) if self.duration_ms is not None else None,
+            "outcome": self.outcome,
+        }
+        if self.llm_calls:
+            span.update(
+                llm_calls=self.llm_calls,
+                prompt_chars=self.prompt_chars,
+                response_chars=self.response_chars,
+            )
+        return span
+
+
+def current_span() -> Optional[Span]:
+    """The span whose LLM calls are being recorded in this context, if any."""
+    handler = _span_handler.get()
+    return handler.span if handler is not None else None
+
+
+class TurnTrace:
+    """All spans recorded for one turn, in start order."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: List[Span] = []
+
+    def span(self, stage: str, **attrs: Any) -> Span:
+        """Start a span for `stage`; extra attrs (agent name, step...) are kept."""
+        return Span(self, stage, **attrs)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [span.to_dict() for span in self.spans]
+
+    def summary(self) -> str:
+        """One-line `stage=ms` breakdown for logs."""
+        parts = []
+        for span in self.spans:
+            label = span.attrs.get("agent", span.stage)
+            ms = f"{span.duration_ms:.0f}ms" if span.duration_ms is not None else "?"
+            parts.append(f"{label}={ms}")
+        return " ".join(parts)
@@ -3,15 +3,80 @@
 WebSocket endpoint for real-time agent streaming.
 
 Accepts a connection, reads the initial query, and streams orchestrator
-progress events (from process_query_generator) live to the frontend.
+progress events (from aprocess_query_generator) live to the frontend. A
+client that disconnects mid-turn cancels the rest of the turn.
 """
-from fastapi import APIRouter, WebSocket
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
 import asyncio
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 router = APIRouter()
 
-from orchestrator.orchestrator import process_query_generator
+from orchestrator.orchestrator import aprocess_query_generator
+from core.logging_config import get_logger
+from core.metrics import WS_INFLIGHT
+
+logger = get_logger(__name__)
+
+async def _watch_disconnect(websocket: WebSocket):
+    """Return once the client disconnects; other inbound messages are ignored."""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
+def _parse_deadline(value) -> Optional[float]:
+    """Client-supplied `deadline_s`, or None (server default) if absent or invalid."""
+    try:
+        deadline_s = float(value)
+    except (TypeError, ValueError):
+        return None
+    return deadline_s if deadline_s > 0 else None
+
+
+async def _stream_turn(websocket: WebSocket, user_id: str, query: str, deadline_s: Optional[float]):
+    """
+    Forward one orchestration turn's events to the client.
+
+    The generator is always closed on the way out, so cancelling this task
+    (client gone) also cancels the turn's pending LLM calls and background
+    agent runs instead of leaving them to the garbage collector.
+    """
+    events = aprocess_query_generator(user_id, query, deadline_s)
+    try:
+        # Iterate over real orchestrator events. The async generator awaits
+        # every LLM/DB call, so other connections keep being served meanwhile.
+        async for event in events:
+            if event["type"] == "log":
+                # Send "agent" type message to frontend
+                await websocket.send_json({
+                    "type": "agent",
+                    "agent": event["agent"],
+                    "text": event["message"]
+                })
+                # tiny sleep to ensure frontend has time to render if it's too fast
+                await asyncio.sleep(0.1)
+
+            elif event["type"] == "delta":
+                # Incremental answer text, forwarded as soon as tokens arrive
+                await websocket.send_json({"type": "delta", "text": event["text"]})
+
+            elif event["type"] == "final":
+                # Send final answer
+                await websocket.send_json({
+                    "type": "final",
+                    "answer": event["response"],
+                    "agents_used": event["agents_used"],
+                    "reasoning_logs": event.get("reasoning_logs", []),
+                    "degradations": event.get("degradations", []),
+                    "cached": event.get("cached", False),
+                    "coalesced": event.get("coalesced", False),
+                })
+    finally:
+        await events.aclose()
+
 
 @router.websocket("/ws/process-query")
 async def process_query_ws(websocket: WebSocket):
@@ -21,14 +86,19 @@ async def process_query_ws(websocket: WebSocket):
     Route: WS /ws/process-query
     
     Expected Initial Message:
-        JSON object containing `user_id` and `query`.
+        JSON object containing `user_id`, `query` and optionally
+        `deadline_s` (latency budget for the turn, in seconds).
 
     Yields:
-        JSON objects representing either intermediate logs (`type: agent`) or
-        the final synthesized response (`type: final`).
+        JSON objects representing intermediate logs (`type: agent`), pieces of
+        the answer as it is generated (`type: delta`), or the final
+        synthesized response (`type: final`, including any `degradations`
+        taken to meet the deadline).
 
     Error Cases:
         - Missing user_id: Sends a JSON error message and closes the connection.
+        - Client disconnects mid-turn: the turn is cancelled (pending LLM
+          calls included) and counted in the cancellation metrics.
         - Unhandled exception: Sends a JSON error message containing the stack trace.
     """
     await websocket.accept()
@@ -43,31 +113,33 @@ async def process_query_ws(websocket: WebSocket):
              await websocket.send_json({"type": "error", "text": "user_id is required"})
              return
 
-        # Iterate over real orchestrator events
-        for event in process_query_generator(user_id, query):
-            if event["type"] == "log":
-                # Send "agent" type message to frontend
-                await websocket.send_json({
-                    "type": "agent",
-                    "agent": event["agent"],
-                    "text": event["message"]
-                })
-                # tiny sleep to ensure frontend has time to render if it's too fast
-                await asyncio.sleep(0.1)
-            
-            elif event["type"] == "final":
-                # Send final answer
-                await websocket.send_json({
-                    "type": "final",
-                    "answer": event["response"],
-                    "agents_used": event["agents_used"],
-                    "reasoning_logs": event.get("reasoning_logs", [])
-                })
+        # Run the turn alongside a watcher for the disconnect message; a
+        # closed tab would otherwise only surface on the next send, after
+        # the current LLM call had already been paid for.
+        with WS_INFLIGHT.track_inprogress():
+            deadline_s = _parse_deadline(init.get("deadline_s"))
+            turn = asyncio.ensure_future(_stream_turn(websocket, user_id, query, deadline_s))
+            watcher = asyncio.ensure_future(_watch_disconnect(websocket))
+            try:
+                await asyncio.wait({turn, watcher}, return_when=asyncio.FIRST_COMPLETED)
+                if not turn.done():
+                    logger.info(f"WS client disconnected, cancelling turn for {user_id}")
+                    turn.cancel()
+                    await asyncio.gather(turn, return_exceptions=True)
+                else:
+                    turn.result()
+            finally:
+                turn.cancel()
+                watcher.cancel()
 
+    except WebSocketDisconnect:
+        logger.info("WS client disconnected")
     except Exception as e:
         print(f"CRITICAL WS ERROR: {e}")
         import traceback
         traceback.print_exc()
-        await websocket.send_json({"type": "error", "text": f"WebSocket error: {str(e)}"})
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.send_json({"type": "error", "text": f"WebSocket error: {str(e)}"})
     finally:
-        await websocket.close()
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close()
@@ -5,8 +5,9 @@ Synchronous chat endpoint.
 Receives user messages and calls the orchestrator (process_query) to generate
 a response. Useful for simple REST clients that don't support WebSockets.
 """
+from typing import Optional
 from fastapi import APIRouter
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from orchestrator.orchestrator import process_query
 
 router = APIRouter()
@@ -14,6 +15,8 @@ router = APIRouter()
 class ChatRequest(BaseModel):
     user_id: str
     message: str
+    # Optional latency budget for this turn, overriding TURN_DEADLINE_S
+    deadline_s: Optional[float] = Field(default=None, gt=0)
 
 @router.post("/chat")
 def chat(req: ChatRequest):
@@ -23,10 +26,11 @@ def chat(req: ChatRequest):
     Route: POST /chat
 
     Args:
-        req: Parsed request body containing `user_id` and `message`.
+        req: Parsed request body containing `user_id`, `message` and an
+            optional `deadline_s`.
 
     Returns:
         dict: The synthesized final `response` string and an `agents_used` list.
     """
-    response, trace = process_query(req.user_id, req.message)
+    response, trace = process_query(req.user_id, req.message, req.deadline_s)
     return {"response": response, "agents_used": trace}
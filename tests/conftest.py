@@ -0,0 +1,36 @@
+# backend/tests/conftest.py
+"""
+Shared test setup: make the backend importable from the repo root, give
+config.py the settings it refuses to start without, and run every LLM call
+against the offline fake backend with no simulated latency. MONGODB_URI is
+deliberately unusable, so db.client starts disconnected without waiting on
+a server; tests that run whole turns stub the repositories instead.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("MONGODB_URI", "mongodb://:0/test")
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY", "fixed")
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "0")
+
+
+@pytest.fixture
+def orchestrator(monkeypatch):
+    """
+    The orchestrator module with its Mongo reads and writes stubbed out.
+    Turns it persists are collected in `orchestrator.saved_turns`.
+    """
+    from orchestrator import orchestrator as module
+
+    saved_turns = []
+    monkeypatch.setattr(module, "get_profile", lambda user_id: {"age": 30, "fitness_goal": "run a 10k"})
+    monkeypatch.setattr(module, "get_recent_conversation_turns", lambda user_id, limit: [])
+    monkeypatch.setattr(module, "append_conversation_turn", lambda **turn: saved_turns.append(turn))
+    monkeypatch.setattr(module, "saved_turns", saved_turns, raising=False)
+    return module
@@ -0,0 +1,69 @@
+# backend/tests/test_agent_stream.py
+import asyncio
+
+from starlette.websockets import WebSocketState
+
+from core.metrics import TURNS_CANCELLED
+
+
+class _FakeWebSocket:
+    """Just enough of a WebSocket: one init message, then a disconnect after `stay_s`."""
+
+    def __init__(self, init: dict, stay_s: float):
+        self.init = init
+        self.stay_s = stay_s
+        self.sent = []
+        self.client_state = WebSocketState.CONNECTED
+
+    async def accept(self):
+        pass
+
+    async def receive_json(self):
+        return self.init
+
+    async def receive(self):
+        await asyncio.sleep(self.stay_s)
+        self.client_state = WebSocketState.DISCONNECTED
+        return {"type": "websocket.disconnect", "code": 1001}
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def close(self):
+        self.client_state = WebSocketState.DISCONNECTED
+
+
+def _cancelled_total() -> float:
+    return sum(
+        sample.value
+        for metric in TURNS_CANCELLED.collect()
+        for sample in metric.samples
+        if sample.name.endswith("_total")
+    )
+
+
+def test_disconnect_cancels_the_turn_without_persisting_it(orchestrator, monkeypatch):
+    from routers.agent_stream import process_query_ws
+
+    supervisor_cancelled = []
+
+    async def stuck_supervisor(*_args):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            supervisor_cancelled.append(True)
+            raise
+
+    monkeypatch.setattr(orchestrator, "asupervisor", stuck_supervisor)
+    monkeypatch.setattr(orchestrator, "asupervisor_group", stuck_supervisor)
+    monkeypatch.setattr(orchestrator, "ROUTING_MODE", "step")
+    monkeypatch.setattr(orchestrator, "SPECULATIVE_SYMPTOM_AGENT", False)
+    before = _cancelled_total()
+
+    websocket = _FakeWebSocket({"user_id": "ws-user", "query": "I feel tired and stressed lately"}, stay_s=1.0)
+    asyncio.run(asyncio.wait_for(process_query_ws(websocket), timeout=5))
+
+    assert supervisor_cancelled == [True]
+    assert orchestrator.saved_turns == []
+    assert not any(message["type"] == "final" for message in websocket.sent)
+    assert _cancelled_total() == before + 1
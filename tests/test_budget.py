@@ -0,0 +1,78 @@
+# backend/tests/test_budget.py
+import asyncio
+import math
+
+import pytest
+
+from orchestrator.budget import TurnBudget
+
+
+def test_no_deadline_never_limits():
+    budget = TurnBudget(None, synthesis_reserve_s=3, min_step_s=1)
+    assert not budget.enabled
+    assert budget.remaining() == math.inf
+    assert budget.can_route() and budget.can_synthesize()
+    assert budget.timeout() is None
+
+
+def test_routing_gets_only_the_time_above_the_reserve():
+    budget = TurnBudget(5, synthesis_reserve_s=3, min_step_s=1)
+    assert 1.9 < budget.timeout() <= 2.0
+    assert 4.9 < budget.timeout(for_routing=False) <= 5.0
+    assert budget.can_route()
+
+    budget = TurnBudget(3.5, synthesis_reserve_s=3, min_step_s=1)
+    assert not budget.can_route()
+    assert budget.can_synthesize()
+
+
+def test_reserve_is_still_spent_on_synthesis_after_a_routing_timeout():
+    budget = TurnBudget(0.3, synthesis_reserve_s=0.2, min_step_s=0.05)
+
+    async def route():
+        with pytest.raises(asyncio.TimeoutError):
+            await budget.wait_for(asyncio.sleep(1))
+        budget.degrade("supervisor_timeout")
+        # Routing used everything above the reserve, and then some.
+        await asyncio.sleep(0.01)
+
+    asyncio.run(route())
+    assert budget.remaining() < budget.synthesis_reserve_s
+    assert not budget.can_route()
+    assert budget.can_synthesize()
+    assert budget.degradations == ["supervisor_timeout"]
+
+
+def test_synthesis_is_skipped_once_the_reserve_is_really_gone():
+    budget = TurnBudget(1, synthesis_reserve_s=3, min_step_s=1)
+    assert not budget.can_synthesize()
+
+
+def test_degradations_are_recorded_once():
+    budget = TurnBudget(1, synthesis_reserve_s=0, min_step_s=0)
+    budget.degrade("agent_skipped:DietAgent")
+    budget.degrade("agent_skipped:DietAgent")
+    budget.degrade("synthesis_template")
+    assert budget.degradations == ["agent_skipped:DietAgent", "synthesis_template"]
+
+
+def test_turn_synthesizes_with_the_llm_after_a_supervisor_timeout(orchestrator, monkeypatch):
+    async def stuck_supervisor(*_args):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(orchestrator, "asupervisor", stuck_supervisor)
+    monkeypatch.setattr(orchestrator, "asupervisor_group", stuck_supervisor)
+    monkeypatch.setattr(orchestrator, "ROUTING_MODE", "step")
+    monkeypatch.setattr(orchestrator, "SPECULATIVE_SYMPTOM_AGENT", False)
+    monkeypatch.setattr(orchestrator, "DEADLINE_SYNTHESIS_RESERVE_S", 0.5)
+    monkeypatch.setattr(orchestrator, "DEADLINE_MIN_STEP_S", 0.1)
+
+    async def run():
+        stream = orchestrator.aprocess_query_generator("budget-user", "I feel tired and stressed at work", 1.0)
+        return [event async for event in stream]
+
+    final = asyncio.run(run())[-1]
+    assert final["type"] == "final"
+    assert "supervisor_timeout" in final["degradations"]
+    assert not {"synthesis_template", "synthesis_skipped"} & set(final["degradations"])
+    assert final["response"] != orchestrator._OUT_OF_TIME_RESPONSE
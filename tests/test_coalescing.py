@@ -0,0 +1,61 @@
+# backend/tests/test_coalescing.py
+import asyncio
+
+from orchestrator.coalescing import Singleflight
+
+
+def _source(started: asyncio.Event, cancelled: list):
+    async def events():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+            yield {"type": "final", "response": "late"}
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    return events
+
+
+def test_subscriber_cancelled_before_its_first_event_stops_the_flight():
+    async def main():
+        flights = Singleflight()
+        started, cancelled = asyncio.Event(), []
+        stream = flights.stream("k", _source(started, cancelled))
+        first = asyncio.ensure_future(stream.__anext__())
+        await started.wait()
+        first.cancel()
+        await asyncio.sleep(0.01)
+        await stream.aclose()
+        return flights.stats(), cancelled
+
+    stats, cancelled = asyncio.run(main())
+    assert cancelled == [True]
+    assert stats["in_flight"] == 0
+
+
+def test_follower_replays_and_marks_the_final_event():
+    async def main():
+        flights = Singleflight()
+        gate = asyncio.Event()
+
+        def start():
+            async def events():
+                yield {"type": "log", "n": 1}
+                await gate.wait()
+                yield {"type": "final", "response": "ok"}
+            return events()
+
+        async def collect():
+            return [e async for e in flights.stream("k", start)]
+
+        leader = asyncio.ensure_future(collect())
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(collect())
+        await asyncio.sleep(0)
+        gate.set()
+        return await leader, await follower
+
+    leader, follower = asyncio.run(main())
+    assert [e["type"] for e in leader] == [e["type"] for e in follower] == ["log", "final"]
+    assert "coalesced" not in leader[-1] and follower[-1]["coalesced"] is True
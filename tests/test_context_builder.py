@@ -0,0 +1,33 @@
+# backend/tests/test_context_builder.py
+import pytest
+
+from agents.context_builder import AGENT_CONTEXT, agent_dependencies, render_profile, render_state
+from schemas.profile_schemas import ProfileSchema
+
+PROFILE = ProfileSchema(
+    user_id=7, age=34, gender="female", weight_kg=68.0, height_cm=165.0, diet_type="veg",
+    activity_level="moderate", sleep_hours=6.5, health_conditions="mild asthma",
+    fitness_goal="run a 10k",
+).model_dump()
+
+
+@pytest.mark.parametrize("agent", ["DietAgent", "FitnessAgent", "LifestyleAgent", "Supervisor"])
+def test_real_profile_renders_the_fitness_goal(agent):
+    assert "fitness_goal: run a 10k" in render_profile(PROFILE, agent)
+
+
+def test_declared_profile_fields_exist_in_the_schema():
+    # Fields that are added to the stored profile outside the schema.
+    extra = {"medical_report_text", "bio", "bmi"}
+    known = set(ProfileSchema.model_fields) | extra
+    for agent, spec in AGENT_CONTEXT.items():
+        assert set(spec.profile_fields) <= known, agent
+
+
+def test_specialists_only_see_what_they_wait_for():
+    from orchestrator.scheduler import AGENT_DEPENDENCIES
+
+    state = {"symptoms": "- Shin pain when running", "diet": "- More iron", "lifestyle": "- Sleep 8h"}
+    rendered = render_state(state, "FitnessAgent")
+    assert "SymptomAgent:" in rendered and "DietAgent:" not in rendered
+    assert AGENT_DEPENDENCIES["FitnessAgent"] == agent_dependencies("FitnessAgent") == ("SymptomAgent",)
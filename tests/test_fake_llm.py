@@ -0,0 +1,21 @@
+# backend/tests/test_fake_llm.py
+import json
+
+from agents.fake_llm import fake_reply
+from agents.supervisor_agent import STEP_OUTPUT_FORMAT, _supervisor_inputs, supervisor_prompt
+
+MESSAGE = "I want a better diet and more sleep"
+
+
+def _next_agent(state: dict) -> str:
+    prompt = supervisor_prompt.format(**_supervisor_inputs(MESSAGE, None, state), output_format=STEP_OUTPUT_FORMAT)
+    return json.loads(fake_reply(prompt))["next_agent"]
+
+
+def test_step_route_finishes_after_both_agents():
+    state = {}
+    assert _next_agent(state) == "DietAgent"
+    state["diet"] = "- Eat more vegetables.\n- Drink water."
+    assert _next_agent(state) == "LifestyleAgent"
+    state["lifestyle"] = "- Keep a fixed bedtime."
+    assert _next_agent(state) == "FINISH"
@@ -0,0 +1,53 @@
+# backend/tests/test_groq_client.py
+"""Connection-reuse accounting behind get_client_stats()."""
+import socket
+
+import httpx
+import pytest
+
+from agents.groq_client import _ConnectionStats
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_requests_on_kept_alive_connections_count_as_reused():
+    stats = _ConnectionStats("test")
+    stats.request()
+    stats.connection("connection.connect_tcp.started")
+    stats.connection("connection.connect_tcp.complete")
+    for _ in range(3):
+        stats.request()
+
+    assert stats.to_dict() == {
+        "requests": 4,
+        "connections_opened": 1,
+        "connect_failures": 0,
+        "reuse_ratio": 0.75,
+    }
+
+
+def test_failed_connects_are_not_counted_as_reused():
+    stats = _ConnectionStats("test")
+    transport = httpx.HTTPTransport()
+    url = f"http://127.0.0.1:{_closed_port()}/"
+
+    def trace(event: str, info: dict):
+        stats.connection(event)
+
+    for _ in range(5):
+        stats.request()
+        request = httpx.Request("GET", url, extensions={"trace": trace})
+        with pytest.raises(httpx.ConnectError):
+            transport.handle_request(request)
+    transport.close()
+
+    assert stats.to_dict() == {
+        "requests": 5,
+        "connections_opened": 0,
+        "connect_failures": 5,
+        "reuse_ratio": 0.0,
+    }
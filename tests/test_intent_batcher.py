@@ -0,0 +1,32 @@
+# backend/tests/test_intent_batcher.py
+import asyncio
+import json
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from agents.intent_batcher import IntentBatcher
+from agents.stage_memo import stage_memo
+from orchestrator.tracing import TurnTrace
+
+
+def test_batch_call_gets_its_own_span_linked_from_each_caller(monkeypatch):
+    monkeypatch.setattr(stage_memo, "enabled", False)
+    llm = FakeListChatModel(responses=["[true, false]"])
+    batcher = IntentBatcher(window_ms=20, max_batch=8)
+    traces = [TurnTrace(), TurnTrace()]
+
+    async def main():
+        calls = [
+            trace.span("intent").arun(batcher.classify(llm, message, f"single: {message}", json.loads))
+            for trace, message in zip(traces, ("I feel tired", "Who won the match?"))
+        ]
+        return await asyncio.gather(*calls)
+
+    assert asyncio.run(main()) == [{"is_wellness": True}, {"is_wellness": False}]
+    for trace in traces:
+        (span,) = trace.to_list()
+        # The caller's own span made no LLM call; the batch span did.
+        assert "llm_calls" not in span
+        (link,) = span["links"]
+        assert link["batch_size"] == 2 and link["llm_calls"] == 1
+    assert traces[0].spans[0].attrs["links"][0]["batch_id"] == traces[1].spans[0].attrs["links"][0]["batch_id"]
@@ -0,0 +1,47 @@
+# backend/tests/test_intent_prefilter.py
+import pytest
+
+from agents.intent_prefilter import prefilter_intent, score_message
+
+
+@pytest.mark.parametrize("message", [
+    "Who painted the Mona Lisa?",
+    "Who was Napoleon?",
+    "What is carbon dating?",
+    "How do I open a joint bank account?",
+])
+def test_off_topic_messages_are_not_marked_wellness(message):
+    assert prefilter_intent(message) != {"is_wellness": True}
+
+
+@pytest.mark.parametrize("message", [
+    "I have a headache and feel tired all the time",
+    "Suggest a high protein vegetarian meal plan",
+    "I can't sleep because of stress",
+])
+def test_clear_wellness_messages_skip_the_llm(message):
+    assert prefilter_intent(message) == {"is_wellness": True}
+
+
+@pytest.mark.parametrize("message", [
+    "Write python code to track my calories",
+    "Can a movie help me unwind?",
+    "Is investing stress making my sleep worse?",
+    "Which song helps me relax before bed?",
+])
+def test_mixed_or_borderline_messages_are_never_rejected_locally(message):
+    assert prefilter_intent(message) != {"is_wellness": False}
+
+
+def test_single_strong_term_is_left_to_the_llm():
+    assert score_message("my knee")["confidence"] == 0.75
+    assert prefilter_intent("my knee") is None
+
+
+def test_inflections_still_match():
+    assert score_message("headaches")["wellness"] == 2.0
+    assert score_message("stretching")["wellness"] == 2.0
+
+
+def test_clear_off_topic_message_is_decided_locally():
+    assert prefilter_intent("Write a python script to parse this SQL") == {"is_wellness": False}
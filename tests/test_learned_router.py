@@ -0,0 +1,85 @@
+# backend/tests/test_learned_router.py
+import asyncio
+
+from orchestrator.learned_router import LearnedRouter, build_training_set, get_learned_router, route_label
+
+_TRAINING = [
+    ("what should I eat for breakfast", "DietAgent"),
+    ("healthy dinner ideas with more protein", "DietAgent"),
+    ("is this meal plan too high in sugar", "DietAgent"),
+    ("give me a running workout for the week", "FitnessAgent"),
+    ("how many squats and push ups should I do", "FitnessAgent"),
+    ("build a strength training routine", "FitnessAgent"),
+    ("I have a headache and a fever", "SymptomAgent>DietAgent"),
+    ("my stomach hurts after I eat, what should I eat instead", "SymptomAgent>DietAgent"),
+    ("fever and sore throat, what food helps", "SymptomAgent>DietAgent"),
+]
+
+
+def _fit() -> LearnedRouter:
+    messages, labels = zip(*_TRAINING)
+    return LearnedRouter.fit(list(messages), list(labels))
+
+
+def test_fit_and_predict_are_deterministic():
+    router = _fit()
+    assert router.labels == ["DietAgent", "FitnessAgent", "SymptomAgent>DietAgent"]
+
+    route, confidence = router.predict("ideas for a protein breakfast")
+    assert route == ["DietAgent"]
+    assert router.predict("a running and squats routine")[0] == ["FitnessAgent"]
+    assert router.predict("fever and headache, what should I eat")[0] == ["SymptomAgent", "DietAgent"]
+    assert 1 / len(router.labels) < confidence <= 1.0
+
+    # Same data and seed, same model.
+    assert _fit().predict("ideas for a protein breakfast") == (route, confidence)
+
+
+def test_saved_model_predicts_like_the_trained_one(tmp_path):
+    router = _fit()
+    path = str(tmp_path / "models" / "router.json")
+    router.save(path)
+
+    loaded = get_learned_router(path)
+    for message in ("ideas for a protein breakfast", "fever and headache, what should I eat"):
+        route, confidence = router.predict(message)
+        loaded_route, loaded_confidence = loaded.predict(message)
+        assert loaded_route == route
+        assert abs(loaded_confidence - confidence) < 1e-3
+
+
+def test_missing_model_file_means_no_router(tmp_path):
+    assert get_learned_router(str(tmp_path / "missing.json")) is None
+
+
+def test_training_set_keeps_labelled_routes_seen_often_enough():
+    turns = [{"user_message": "what to eat", "agents_used": ["DietAgent", "DietAgent", "ChefAgent"]}] * 3 + [
+        {"user_message": "off topic", "agents_used": []},
+        {"user_message": "", "agents_used": ["DietAgent"]},
+        {"user_message": "rare route", "agents_used": ["LifestyleAgent"]},
+    ]
+    assert route_label(["SymptomAgent", "DietAgent"]) == "SymptomAgent>DietAgent"
+    assert build_training_set(turns) == (["what to eat"] * 3, ["DietAgent"] * 3)
+
+
+def test_learned_mode_without_a_model_falls_back_to_the_supervisor(orchestrator, monkeypatch, tmp_path):
+    calls = []
+    real_supervisor = orchestrator.asupervisor
+
+    async def counting_supervisor(*args):
+        calls.append(args)
+        return await real_supervisor(*args)
+
+    monkeypatch.setattr(orchestrator, "asupervisor", counting_supervisor)
+    monkeypatch.setattr(orchestrator, "ROUTING_MODE", "learned")
+    monkeypatch.setattr(orchestrator, "LEARNED_ROUTER_PATH", str(tmp_path / "missing.json"))
+    monkeypatch.setattr(orchestrator, "SPECULATIVE_SYMPTOM_AGENT", False)
+
+    async def run():
+        stream = orchestrator.aprocess_query_generator("learned-user", "What should I eat before a long run?", None)
+        return [event async for event in stream]
+
+    final = asyncio.run(run())[-1]
+    assert final["type"] == "final"
+    assert calls, "supervisor was not consulted"
+    assert final["response"]
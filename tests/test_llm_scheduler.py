@@ -0,0 +1,56 @@
+# backend/tests/test_llm_scheduler.py
+import asyncio
+
+import httpx
+
+from agents.llm_scheduler import LLMScheduler
+
+
+def _request(max_tokens: int = 1000) -> httpx.Request:
+    body = {"max_tokens": max_tokens, "messages": [{"role": "user", "content": "x" * 400}]}
+    return httpx.Request("POST", "https://llm.local/v1/chat/completions", json=body)
+
+
+def _scheduler(tpm: float) -> LLMScheduler:
+    return LLMScheduler(rpm=0, tpm=tpm, max_retries=0, backoff_base_s=0, backoff_max_s=0)
+
+
+def test_remaining_tokens_header_gives_back_an_over_estimate():
+    scheduler = _scheduler(6000)
+    scheduler.send(lambda r: httpx.Response(200, headers={"x-ratelimit-remaining-tokens": "5900"}, request=r),
+                   _request())
+    # 1100 tokens were reserved, but the call really used 100.
+    assert 5890 <= scheduler.stats()["tokens_available"] <= 6000
+
+
+def test_remaining_tokens_header_still_lowers_the_bucket():
+    scheduler = _scheduler(6000)
+    scheduler.send(lambda r: httpx.Response(200, headers={"x-ratelimit-remaining-tokens": "500"}, request=r),
+                   _request(0))
+    assert scheduler.stats()["tokens_available"] < 600
+
+
+def test_other_in_flight_reservations_stay_counted():
+    scheduler = _scheduler(6000)
+
+    async def main():
+        release = asyncio.Event()
+
+        async def slow(request):
+            await release.wait()
+            return httpx.Response(200, request=request)
+
+        async def fast(request):
+            return httpx.Response(200, headers={"x-ratelimit-remaining-tokens": "6000"}, request=request)
+
+        pending = asyncio.ensure_future(scheduler.asend(slow, _request()))
+        await asyncio.sleep(0)
+        await scheduler.asend(fast, _request(0))
+        available = scheduler.stats()["tokens_available"]
+        release.set()
+        await pending
+        return available
+
+    # The slow call's 1100-token reservation is still held back.
+    assert asyncio.run(main()) <= 4901
+
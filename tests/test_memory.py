@@ -0,0 +1,119 @@
+# backend/tests/test_memory.py
+import asyncio
+
+import pytest
+
+import orchestrator.memory as memory_module
+from agents.memory_summarizer import asummarize_history
+from orchestrator.memory import EMPTY_HISTORY, ConversationBufferMemory, MemoryStore, SummarizingMemory
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(memory_module.time, "monotonic", clock)
+    return clock
+
+
+def _store(**kwargs) -> MemoryStore:
+    return MemoryStore(lambda user_id: ConversationBufferMemory(), **kwargs)
+
+
+def test_least_recently_used_user_is_evicted_past_the_cap(clock):
+    store = _store(max_users=2)
+    a = store.get("a")
+    store.get("b")
+    assert store.get("a") is a  # "a" is now the most recent
+    store.get("c")
+    assert store.peek("b") is None
+    assert store.peek("a") is a and store.peek("c") is not None
+    assert store.stats()["lru_evictions"] == 1
+
+
+def test_idle_users_expire_after_the_ttl(clock):
+    store = _store(idle_ttl_s=60)
+    old = store.get("idle")
+    clock.now += 30
+    store.get("active")
+    clock.now += 45
+    store.get("active")
+    assert store.peek("idle") is None
+    assert store.get("idle") is not old
+    assert store.stats()["ttl_evictions"] == 1
+
+
+def test_stats_report_entries_and_bytes(clock):
+    store = _store()
+    store.get("u1").save_context({"input": "hi"}, {"output": "hello"})
+    store.get("u2")
+    stats = store.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == len("Human: hi") + len("AI: hello")
+    store.discard("u2")
+    assert store.stats()["entries"] == 1
+
+
+def test_buffer_caps_drop_whole_exchanges():
+    memory = ConversationBufferMemory(max_turns=2)
+    assert memory.load_memory_variables({})["history"] == EMPTY_HISTORY
+    for i in range(3):
+        memory.save_context({"input": f"q{i}"}, {"output": f"a{i}"})
+    assert memory.recent_lines() == ["Human: q1", "AI: a1", "Human: q2", "AI: a2"]
+
+    memory = ConversationBufferMemory(max_chars=20)
+    memory.save_context({"input": "first"}, {"output": "answer"})
+    memory.save_context({"input": "second"}, {"output": "answer"})
+    assert memory.recent_lines() == ["Human: second", "AI: answer"]
+
+
+def test_summarizing_memory_folds_old_turns_with_the_fake_llm():
+    memory = SummarizingMemory(keep_turns=2)
+    for i in range(3):
+        memory.save_context({"input": f"question {i}"}, {"output": f"answer {i}"})
+    assert memory.needs_compaction
+    history = memory.load_memory_variables({})["history"]
+    # Pushed-out turns stay visible verbatim until they are summarized.
+    assert history.startswith("Human: question 0")
+
+    asyncio.run(memory.acompact(asummarize_history))
+    assert not memory.needs_compaction
+    assert "Human: question 0" in memory.summary
+    assert memory.recent_lines() == ["Human: question 1", "AI: answer 1", "Human: question 2", "AI: answer 2"]
+    assert memory.load_memory_variables({})["history"].startswith("Summary of earlier conversation: ")
+
+
+def test_turns_saved_during_compaction_are_kept():
+    memory = SummarizingMemory(keep_turns=1)
+    memory.save_context({"input": "q0"}, {"output": "a0"})
+    memory.save_context({"input": "q1"}, {"output": "a1"})
+
+    async def slow_summary(previous, lines):
+        # Another turn lands while the summarizer is still running.
+        memory.save_context({"input": "q2"}, {"output": "a2"})
+        return "summary of " + " ".join(lines)
+
+    asyncio.run(memory.acompact(slow_summary))
+    assert memory.summary == "summary of Human: q0 AI: a0"
+    assert memory.to_dict()["pending"] == ["Human: q1", "AI: a1"]
+    assert memory.recent_lines() == ["Human: q2", "AI: a2"]
+
+
+def test_failed_summarization_keeps_the_raw_turns():
+    memory = SummarizingMemory(keep_turns=1)
+    memory.save_context({"input": "q0"}, {"output": "a0"})
+    memory.save_context({"input": "q1"}, {"output": "a1"})
+
+    async def failing(previous, lines):
+        raise RuntimeError("HTTP 500")
+
+    asyncio.run(memory.acompact(failing))
+    assert memory.summary == ""
+    assert memory.needs_compaction
@@ -0,0 +1,65 @@
+# backend/tests/test_memory_backends.py
+import asyncio
+
+import pytest
+
+from orchestrator.memory import ConversationBufferMemory, SummarizingMemory
+from orchestrator.memory_backends import MemoryBackend, MongoMemoryBackend, RedisMemoryBackend
+
+
+def _failing(*_args):
+    raise ConnectionError("database unreachable")
+
+
+def test_mongo_backend_keeps_the_summary_across_loads():
+    snapshots = {}
+    backend = MongoMemoryBackend(
+        lambda: SummarizingMemory(keep_turns=1), None, snapshots.get, snapshots.__setitem__
+    )
+    calls = []
+
+    async def summarize(summary, lines):
+        calls.append(lines)
+        return "user wants better sleep"
+
+    for i in range(3):
+        memory = backend.load("u1")
+        memory.save_context({"input": f"q{i}"}, {"output": f"a{i}"})
+        if memory.needs_compaction:
+            asyncio.run(memory.acompact(summarize))
+        backend.save("u1", memory)
+
+    memory = backend.load("u1")
+    assert memory.summary == "user wants better sleep"
+    assert not memory.needs_compaction
+    # Each pushed-out exchange was summarized exactly once.
+    assert calls == [["Human: q0", "AI: a0"], ["Human: q1", "AI: a1"]]
+
+
+def test_mongo_backend_rehydrates_without_a_snapshot():
+    turns = [{"user_message": "hi", "assistant_response": "hello"}]
+    backend = MongoMemoryBackend(ConversationBufferMemory, lambda _: turns, lambda _: None, _failing)
+    assert backend.load("u1").recent_lines() == ["Human: hi", "AI: hello"]
+
+
+def test_load_errors_fall_back_to_empty_memory():
+    mongo = MongoMemoryBackend(ConversationBufferMemory, _failing, _failing, _failing)
+    assert mongo.load("u1").recent_lines() == []
+    mongo.save("u1", ConversationBufferMemory())
+    assert mongo.stats()["errors"] == 2
+
+    class _DownRedis:
+        get = set = staticmethod(_failing)
+
+    redis = RedisMemoryBackend(_DownRedis(), ConversationBufferMemory, _failing)
+    assert redis.load("u1").recent_lines() == []
+    assert redis.stats()["errors"] == 1
+
+
+def test_backend_missing_a_method_fails_when_created():
+    class LoadOnly(MemoryBackend):
+        def load(self, user_id):
+            return ConversationBufferMemory()
+
+    with pytest.raises(TypeError):
+        LoadOnly()
@@ -0,0 +1,44 @@
+# backend/tests/test_response_cache.py
+from orchestrator.memory import ConversationBufferMemory
+from orchestrator.response_cache import CachedTurn, ResponseCache, cache_context, cache_key
+
+PROFILE = {"age": 30, "fitness_goal": "Lose weight"}
+
+
+def _lookup(cache: ResponseCache, memory: ConversationBufferMemory, message: str, turns: int = 1):
+    key = cache_key("u1", message, PROFILE, cache_context(message, memory.recent_lines(), turns))
+    return key, cache.get(key)
+
+
+def test_same_message_twice_in_a_row_hits():
+    cache = ResponseCache()
+    memory = ConversationBufferMemory()
+    memory.save_context({"input": "hi"}, {"output": "Hello!"})
+
+    key, cached = _lookup(cache, memory, "How can I sleep better?")
+    assert cached is None
+    cache.put(key, "u1", CachedTurn("Sleep tips", ["LifestyleAgent"], []))
+    memory.save_context({"input": "How can I sleep better?"}, {"output": "Sleep tips"})
+
+    _, cached = _lookup(cache, memory, "how can I sleep better")
+    assert cached is not None and cached.response == "Sleep tips"
+
+    # A third ask (after the replayed answer was saved too) still hits.
+    memory.save_context({"input": "how can I sleep better"}, {"output": "Sleep tips"})
+    _, cached = _lookup(cache, memory, "How can I sleep better?")
+    assert cached is not None
+
+
+def test_different_context_misses():
+    cache = ResponseCache()
+    memory = ConversationBufferMemory()
+    key, _ = _lookup(cache, memory, "How can I sleep better?")
+    cache.put(key, "u1", CachedTurn("Sleep tips", [], []))
+    memory.save_context({"input": "I started night shifts"}, {"output": "Noted."})
+
+    _, cached = _lookup(cache, memory, "How can I sleep better?")
+    assert cached is None
+
+
+def test_cache_context_without_turns_is_empty():
+    assert cache_context("x", ["Human: a", "AI: b"], 0) == []
@@ -0,0 +1,62 @@
+# backend/tests/test_scheduler.py
+import asyncio
+
+from orchestrator.budget import TurnBudget
+from orchestrator.scheduler import AGENT_DEPENDENCIES, AGENT_STEPS, plan_waves, run_agent_group
+
+
+def _log(agent: str, message: str) -> dict:
+    return {"type": "log", "agent": agent, "message": message}
+
+
+def test_waves_respect_the_dependency_table():
+    agents = ["FitnessAgent", "DietAgent", "SymptomAgent", "LifestyleAgent"]
+    waves = plan_waves(agents)
+    assert waves == [["SymptomAgent"], ["FitnessAgent", "DietAgent", "LifestyleAgent"]]
+    position = {agent: i for i, wave in enumerate(waves) for agent in wave}
+    for agent in agents:
+        for dep in AGENT_DEPENDENCIES[agent]:
+            assert position[dep] < position[agent]
+
+
+def test_duplicate_agents_run_once():
+    assert plan_waves(["DietAgent", "SymptomAgent", "DietAgent"]) == [["SymptomAgent"], ["DietAgent"]]
+
+
+def test_dependencies_outside_the_group_or_already_done_do_not_wait():
+    assert plan_waves(["DietAgent", "LifestyleAgent"]) == [["DietAgent", "LifestyleAgent"]]
+    assert plan_waves(["DietAgent"], completed=["SymptomAgent"]) == [["DietAgent"]]
+
+
+def test_group_merges_outputs_into_state():
+    state = {}
+
+    async def run():
+        return [e async for e in run_agent_group(["SymptomAgent", "DietAgent"], "my knee hurts", None, state, _log)]
+
+    events = asyncio.run(run())
+    assert state["symptoms"] and state["diet"]
+    assert [e["agent"] for e in events] == ["SymptomAgent", "SymptomAgent", "DietAgent", "DietAgent"]
+
+
+def test_agents_used_only_names_agents_whose_output_was_merged(orchestrator, monkeypatch):
+    async def slow(message, profile, state):
+        await asyncio.sleep(10)
+
+    key, start, end, _ = AGENT_STEPS["DietAgent"]
+    monkeypatch.setitem(AGENT_STEPS, "DietAgent", (key, start, end, slow))
+    state, agents_used = {}, []
+    budget = TurnBudget(0.3, synthesis_reserve_s=0, min_step_s=0)
+
+    async def run():
+        runnable, _ = orchestrator._admit_agents(
+            ["SymptomAgent", "DietAgent", "DietAgent", "MadeUpAgent"], agents_used, _log
+        )
+        assert runnable == ["SymptomAgent", "DietAgent"]
+        async for _ in run_agent_group(runnable, "I feel bloated", None, state, _log, budget=budget):
+            pass
+        orchestrator._record_agents_run(runnable, state, agents_used)
+
+    asyncio.run(run())
+    assert agents_used == ["SymptomAgent"]
+    assert "agent_timeout:DietAgent" in budget.degradations
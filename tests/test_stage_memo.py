@@ -0,0 +1,86 @@
+# backend/tests/test_stage_memo.py
+import asyncio
+
+import pytest
+
+import agents.stage_memo as stage_memo_module
+from agents.fake_llm import FakeChatModel
+from agents.stage_memo import StageMemo, ainvoke_text, generation_settings, invoke_text
+
+
+class _Counting:
+    """Runnable that answers with a call counter, optionally failing."""
+
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+
+    def invoke(self, inputs):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("HTTP 500")
+        return f"answer {self.calls}"
+
+    async def ainvoke(self, inputs):
+        return self.invoke(inputs)
+
+
+@pytest.fixture
+def memo(monkeypatch):
+    memo = StageMemo(max_entries=8)
+    monkeypatch.setattr(stage_memo_module, "stage_memo", memo)
+    return memo
+
+
+def test_key_is_stable_and_ignores_dict_order():
+    first = StageMemo.key("DietAgent", {"profile": "age: 30", "state": "None yet."}, {"model": "m", "max_tokens": 5})
+    again = StageMemo.key("DietAgent", {"state": "None yet.", "profile": "age: 30"}, {"max_tokens": 5, "model": "m"})
+    assert first == again
+    assert first != StageMemo.key("FitnessAgent", {"profile": "age: 30", "state": "None yet."},
+                                  {"model": "m", "max_tokens": 5})
+
+
+def test_different_generation_settings_get_different_keys():
+    llm = FakeChatModel()
+    short, long = llm.bind(model="a", max_tokens=10), llm.bind(model="a", max_tokens=200)
+    assert generation_settings(short) == {"model": "a", "max_tokens": 10}
+    assert StageMemo.key("intent", "prompt", generation_settings(short)) != \
+        StageMemo.key("intent", "prompt", generation_settings(long))
+
+
+def test_repeated_calls_are_served_from_the_memo(memo):
+    runnable = _Counting()
+    assert invoke_text("DietAgent", runnable, "prompt") == "answer 1"
+    assert invoke_text("DietAgent", runnable, "prompt") == "answer 1"
+    assert asyncio.run(ainvoke_text("DietAgent", runnable, "prompt")) == "answer 1"
+    assert runnable.calls == 1
+    assert memo.stats()["stages"]["DietAgent"] == {"hits": 2, "misses": 1}
+
+
+def test_lru_bound_evicts_the_least_recently_used(memo):
+    memo.max_entries = 2
+    memo.put("a", "1")
+    memo.put("b", "2")
+    assert memo.get("s", "a") == "1"
+    memo.put("c", "3")
+    assert memo.get("s", "b") is None
+    assert memo.get("s", "a") == "1" and memo.get("s", "c") == "3"
+    assert memo.stats()["entries"] == 2
+
+
+def test_kill_switch_bypasses_the_memo(memo):
+    memo.enabled = False
+    runnable = _Counting()
+    invoke_text("DietAgent", runnable, "prompt")
+    invoke_text("DietAgent", runnable, "prompt")
+    assert runnable.calls == 2
+    assert memo.stats()["entries"] == 0
+
+
+def test_failed_calls_are_not_stored(memo):
+    with pytest.raises(RuntimeError):
+        asyncio.run(ainvoke_text("supervisor", _Counting(fail=True), "prompt"))
+    assert memo.stats()["entries"] == 0
+    runnable = _Counting()
+    assert invoke_text("supervisor", runnable, "prompt") == "answer 1"
+    assert runnable.calls == 1
@@ -0,0 +1,53 @@
+# backend/tests/test_supervisor_plan.py
+import asyncio
+
+import agents.supervisor_agent as supervisor_agent
+from agents.supervisor_agent import _parse_plan, aplan_route
+
+
+def test_valid_plan_with_parallel_groups():
+    raw = '{"agents": ["SymptomAgent", "DietAgent", "LifestyleAgent"], ' \
+          '"parallel": [["SymptomAgent"], ["DietAgent", "LifestyleAgent"]]}'
+    assert _parse_plan(raw) == {
+        "agents": ["SymptomAgent", "DietAgent", "LifestyleAgent"],
+        "parallel": [["SymptomAgent"], ["DietAgent", "LifestyleAgent"]],
+    }
+
+
+def test_plan_in_a_fenced_block_without_parallel():
+    raw = 'Here you go:\n```json\n{"agents": ["DietAgent"]}\n```'
+    assert _parse_plan(raw) == {"agents": ["DietAgent"], "parallel": None}
+
+
+def test_parallel_groups_that_do_not_cover_the_plan_are_dropped():
+    raw = '{"agents": ["SymptomAgent", "DietAgent"], "parallel": [["SymptomAgent"]]}'
+    assert _parse_plan(raw) == {"agents": ["SymptomAgent", "DietAgent"], "parallel": None}
+
+
+def test_unknown_agent_names_are_passed_on_for_the_orchestrator_to_report():
+    plan = _parse_plan('{"agents": ["DietAgent", "ChefAgent", "DietAgent"]}')
+    assert plan == {"agents": ["DietAgent", "ChefAgent"], "parallel": None}
+
+
+def test_finish_is_removed_from_the_route():
+    assert _parse_plan('{"agents": ["FINISH"]}') == {"agents": [], "parallel": None}
+    assert _parse_plan('{"agents": ["DietAgent", "FINISH"]}')["agents"] == ["DietAgent"]
+
+
+def test_garbled_replies_are_not_a_plan():
+    for raw in ("FINISH", "I think DietAgent.", '{"agents": "DietAgent"}', '{"agents": [1, 2]}',
+                '{"next_agent": "DietAgent"}', '{"agents": ["DietAgent"'):
+        assert _parse_plan(raw) is None, raw
+
+
+def test_aplan_route_with_the_fake_llm():
+    plan = asyncio.run(aplan_route("My knee hurts when I run", None, {"intent": {"is_wellness": True}}))
+    assert plan == {"agents": ["SymptomAgent", "FitnessAgent"], "parallel": [["SymptomAgent"], ["FitnessAgent"]]}
+
+
+def test_aplan_route_returns_none_when_the_call_fails(monkeypatch):
+    async def failing(*_args, **_kwargs):
+        raise RuntimeError("HTTP 500")
+
+    monkeypatch.setattr(supervisor_agent, "ainvoke_text", failing)
+    assert asyncio.run(aplan_route("diet plan please", None, {})) is None
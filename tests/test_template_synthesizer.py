@@ -0,0 +1,34 @@
+# backend/tests/test_template_synthesizer.py
+from agents.template_synthesizer import DISCLAIMER, can_format, format_report
+
+
+def test_nothing_to_format_without_specialist_output():
+    assert not can_format({})
+    assert not can_format({"intent": {"is_wellness": True}, "note": "Budget ran out."})
+
+
+def test_single_agent_report():
+    state = {"diet": "## My Plan\n- Add lentils to lunch.\n- Swap soda for water."}
+    report = format_report(state, "  What should I eat?  ")
+    assert can_format(state)
+    assert report.startswith('### Wellness Summary\n\nHere is personalised guidance for: "What should I eat?"')
+    # The agent's own heading is demoted so it doesn't compete with sections.
+    assert "### 🍽 Diet Plan\n\n**My Plan**\n- Add lentils to lunch." in report
+    assert "Exercise Plan" not in report and "Lifestyle" not in report
+    assert report.endswith(f"### ⚠ Disclaimer\n\n{DISCLAIMER}")
+
+
+def test_symptom_output_becomes_the_summary():
+    report = format_report({"symptoms": "- Likely tension headache.", "note": "Partial answer."}, "headache")
+    assert report.startswith("### Wellness Summary\n\n- Likely tension headache.\n\n_Partial answer._")
+
+
+def test_single_mode_refuses_multi_agent_turns(orchestrator, monkeypatch):
+    monkeypatch.setattr(orchestrator, "TEMPLATE_SYNTHESIS", "single")
+    monkeypatch.setattr(orchestrator, "TEMPLATE_SYNTHESIS_LOAD_THRESHOLD", 0)
+    assert orchestrator._use_template_synthesis({"diet": "- Eat oats."})
+    assert not orchestrator._use_template_synthesis({"diet": "- Eat oats.", "fitness": "- Walk daily."})
+    assert not orchestrator._use_template_synthesis({})
+
+    monkeypatch.setattr(orchestrator, "TEMPLATE_SYNTHESIS", "off")
+    assert not orchestrator._use_template_synthesis({"diet": "- Eat oats."})